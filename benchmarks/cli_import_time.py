@@ -0,0 +1,112 @@
+"""
+Import-time budget of the CLI commands that should start instantly.
+
+Runs each command in a fresh interpreter with `python -X importtime` and
+sums the cumulative time of the imports it triggers, leaving out the modules
+the interpreter itself loads at startup. The median over several runs is
+compared with a budget, and a command fails when it exceeds the budget or
+loads one of the modules only other commands need.
+
+    python benchmarks/cli_import_time.py
+    python benchmarks/cli_import_time.py --budget-ms 40 --runs 10
+
+Exits with status 1 when a command fails.
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = [
+    ['config', 'show'],
+    ['prompts', 'list'],
+]
+
+# Imported only by the commands that call AI services, watch the clipboard or list windows
+FORBIDDEN_MODULES = ('requests', 'pyperclip', 'psutil', 'selit.notification', 'selit.utils', 'flask')
+
+DEFAULT_BUDGET_MS = 60
+DEFAULT_RUNS = 5
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        list: (module, cumulative microseconds, nesting level) per import
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(cumulative), level))
+    return imports
+
+def run_importtime(code, env):
+    """Run code in a fresh interpreter and return the imports it made."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return parse_importtime(result.stderr)
+
+def measure_command(argv, env, startup_modules):
+    """
+    Measure the imports of one CLI command.
+
+    Returns:
+        tuple: (milliseconds spent importing, set of imported modules)
+    """
+    code = f"import sys; sys.argv = ['selit'] + {argv!r}; from selit.main import main; main()"
+    imports = run_importtime(code, env)
+    total = sum(cumulative for name, cumulative, level in imports
+                if level == 0 and name not in startup_modules)
+    return total / 1000, {name for name, _, _ in imports}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help="Import time allowed per command")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="Runs per command, the median is compared")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        # A throwaway home, so the commands neither read nor create real configuration
+        env = dict(os.environ, HOME=home, APPDATA=home, PYTHONPATH=ROOT)
+        startup_modules = {name for name, _, _ in run_importtime('pass', env)}
+        # The first run writes the bytecode caches
+        measure_command(COMMANDS[0], env, startup_modules)
+
+        failed = False
+        print(f"{'command':<16} {'median ms':>10} {'budget ms':>10}  result")
+        for argv in COMMANDS:
+            timings = []
+            modules = set()
+            for _ in range(args.runs):
+                elapsed, modules = measure_command(argv, env, startup_modules)
+                timings.append(elapsed)
+            median = statistics.median(timings)
+
+            problems = []
+            if median > args.budget_ms:
+                problems.append("over budget")
+            loaded = [name for name in FORBIDDEN_MODULES if name in modules]
+            if loaded:
+                problems.append(f"imports {', '.join(loaded)}")
+            failed = failed or bool(problems)
+
+            print(f"{' '.join(argv):<16} {median:>10.1f} {args.budget_ms:>10.1f}  {'; '.join(problems) or 'ok'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
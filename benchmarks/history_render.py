@@ -0,0 +1,88 @@
+"""
+Benchmark of the /history page on a large synthetic day.
+
+Compares rendering the whole page in memory (the day loaded with
+get_call_history and passed to render_template) with the streamed route,
+uncompressed and with gzip/brotli, measuring time to first byte, total time,
+bytes sent and peak Python memory.
+
+    python benchmarks/history_render.py --entries 50000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def fill_history(entries):
+    """Write a synthetic history for today into the current home directory."""
+    from selit.history_logger import log_call
+
+    for i in range(entries):
+        window = {"title": f"Window {i % 40}", "process_name": f"app{i % 7}.exe"}
+        log_call(window, f"input text {i} " * (i % 50 + 1), f"output text {i} " * (i % 30 + 1), "~")
+
+def measure(run):
+    """Run a render, returning (time to first byte, total time, bytes, peak memory)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    for chunk in run():
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        size += len(chunk)
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_byte, total, size, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=50000, help="Synthetic history entries for today")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ['HOME'] = os.environ['APPDATA'] = home
+        sys.path.insert(0, ROOT)
+
+        print(f"Writing {args.entries} entries...")
+        fill_history(args.entries)
+
+        from flask import render_template
+        from selit.web import app
+        from selit.history_logger import get_call_history
+        from selit.compression import brotli
+
+        client = app.test_client()
+
+        def buffered():
+            with app.test_request_context('/history'):
+                yield render_template('history.html', history=get_call_history(1), days=1).encode('utf-8')
+
+        def streamed(encoding):
+            def run():
+                response = client.get('/history', headers={'Accept-Encoding': encoding}, buffered=False)
+                try:
+                    yield from response.response
+                finally:
+                    response.close()
+            return run
+
+        cases = [('in-memory render_template', buffered), ('streamed, identity', streamed('identity')),
+                 ('streamed, gzip', streamed('gzip'))]
+        if brotli is not None:
+            cases.append(('streamed, br', streamed('br')))
+
+        print(f"{'case':<28} {'TTFB ms':>9} {'total ms':>9} {'sent KB':>9} {'peak MB':>9}")
+        for name, run in cases:
+            first_byte, total, size, peak = measure(run)
+            print(f"{name:<28} {first_byte * 1000:>9.1f} {total * 1000:>9.1f} {size / 1024:>9.0f} {peak / 2**20:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
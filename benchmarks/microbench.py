@@ -0,0 +1,475 @@
+"""
+Microbenchmarks of selit's hot paths, compared against tracked baselines.
+
+Covers prompt and keyword trigger lookup with 10 to 10k rules, history
+loading, day summaries and the analyzer's formatting with 1k to 1M synthetic
+entries, and window lookup through fake xdotool/xprop/wmctrl programs put
+first on PATH (and the X11 backend under Xvfb, when Xvfb is installed).
+Everything runs offline in a throwaway home directory.
+
+Each case is timed in several rounds with the garbage collector off, as timeit
+does. Every round is measured against a fixed reference workload timed right
+before and after it, so a machine that changes speed between or during runs
+(CPU frequency scaling, a busy host) moves both alike. The case's cost relative
+to the reference, median over the rounds, is what is compared with the
+baseline file: a case fails when it is more than the threshold above its
+baseline, and the script then exits with status 1.
+
+    python benchmarks/microbench.py                     # compare with benchmarks/baselines.json
+    python benchmarks/microbench.py --quick             # at most 100k history entries
+    python benchmarks/microbench.py -k prompts          # only cases whose name contains 'prompts'
+    python benchmarks/microbench.py --update-baseline   # record the timings as the new baseline
+
+Relative costs still depend on the Python version and the machine; record the
+baselines again when either changes.
+"""
+import gc
+import os
+import sys
+import json
+import time
+import atexit
+import ctypes
+import ctypes.util
+import shutil
+import statistics
+import argparse
+import datetime
+import tempfile
+import subprocess
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+RULE_COUNTS = (10, 100, 1000, 10000)
+HISTORY_SIZES = (1000, 10000, 100000, 1000000)
+QUICK_HISTORY_LIMIT = 100000
+
+# Slower than baseline * (1 + threshold) is a regression
+DEFAULT_THRESHOLD = 0.3
+
+# Each round runs the call often enough to take at least this long
+MIN_ROUND_TIME = 0.1
+ROUNDS = 11
+# Calls slower than this are measured in fewer rounds
+SLOW_CALL_TIME = 1.0
+SLOW_ROUNDS = 5
+
+WINDOW_COUNT = 50
+
+CASES = []
+
+
+def case(name, params=(None,)):
+    """Register a benchmark: a context manager function that sets up and yields the call to time."""
+    def decorator(function):
+        for param in params:
+            CASES.append((name if param is None else f'{name}[{param}]', function, param))
+        return function
+    return decorator
+
+
+def _reference_work():
+    """A fixed mix of the dict, string and JSON work the cases do."""
+    windows = {}
+    for i in range(1000):
+        title = f'Window {i} - Application {i}'
+        windows[title] = title.lower().split(' - ')
+    json.loads(json.dumps(windows))
+
+def _reference_time():
+    """Gauge the machine's current speed: the fastest of a few runs of the reference workload."""
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        _reference_work()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def measure(call):
+    """
+    Time a call with the garbage collector off, so collections started by earlier cases do not land in the timing.
+
+    Returns:
+        tuple: (median seconds per call, median cost per call relative to the reference workload)
+    """
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        call()
+        first = time.perf_counter() - started
+
+        number = max(1, int(MIN_ROUND_TIME / first)) if first > 0 else 1000
+        rounds = SLOW_ROUNDS if first > SLOW_CALL_TIME else ROUNDS
+        timings = []
+        relative = []
+        for _ in range(rounds):
+            reference_before = _reference_time()
+            started = time.perf_counter()
+            for _ in range(number):
+                call()
+            seconds = (time.perf_counter() - started) / number
+            reference = (reference_before + _reference_time()) / 2
+            timings.append(seconds)
+            relative.append(seconds / reference)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return statistics.median(timings), statistics.median(relative)
+
+
+# Prompt lookup
+
+@contextmanager
+def _prompt_manager(window_prompts=0, keyword_triggers=0):
+    from selit.main import PromptManager
+    from selit.prompt_store import PromptStore
+
+    prompts = {f'Window {i} - Application {i}': f'Prompt {i}: {{text}}' for i in range(window_prompts)}
+    prompts['keyword_triggers'] = {f'kw{i}:': {'prompt': f'Keyword prompt {i}: {{text}}'} for i in range(keyword_triggers)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'prompts.db')
+        # Seeding fills a new store in one transaction
+        PromptStore(path, seed=lambda: prompts).close()
+        manager = PromptManager(path)
+        yield manager
+        manager.store.close()
+
+@case('prompts.get_prompt_for_window', RULE_COUNTS)
+@contextmanager
+def bench_get_prompt_for_window(rules):
+    # No identifier matches, every rule is checked before the default prompt is returned
+    window_info = {'title': 'notes.txt - Text Editor', 'process_name': 'gedit'}
+    with _prompt_manager(window_prompts=rules) as manager:
+        yield lambda: manager.get_prompt_for_window(window_info)
+
+@case('prompts.find_keyword_trigger', RULE_COUNTS)
+@contextmanager
+def bench_find_keyword_trigger(rules):
+    text = "Please have a look at this paragraph, it has no keyword in it at all. " * 3
+    with _prompt_manager(keyword_triggers=rules) as manager:
+        yield lambda: manager.find_keyword_trigger(text)
+
+
+# History
+
+def write_synthetic_day(date, entries):
+    """Write a day log the way log_call stores it, without going through log_call for every entry."""
+    from selit.history_logger import get_log_file_for_date, STORED_ENTRY_VERSION
+    from selit.history_store import intern_string, pack_body
+
+    titles = [intern_string(f'Document {i} - Editor') for i in range(40)]
+    apps = [intern_string(f'app{i}') for i in range(7)]
+    start = datetime.datetime.combine(date, datetime.time())
+    step = 86400 / entries
+
+    with open(get_log_file_for_date(date), 'w', encoding='utf-8') as f:
+        for i in range(entries):
+            f.write(json.dumps({
+                'v': STORED_ENTRY_VERSION,
+                'timestamp': (start + datetime.timedelta(seconds=i * step)).isoformat(),
+                'window': {'title': titles[i % len(titles)], 'process_name': apps[i % len(apps)]},
+                'trigger_word': 'aiit',
+                'input': pack_body(f'input text {i} ' * (i % 8 + 1)),
+                'output': pack_body(f'output text {i} ' * (i % 6 + 1)),
+            }) + '\n')
+
+@contextmanager
+def _history(entries):
+    """A home directory whose history has a synthetic day of entries for today."""
+    with tempfile.TemporaryDirectory() as home, _environment(HOME=home, APPDATA=home):
+        write_synthetic_day(datetime.datetime.now().date(), entries)
+        yield
+
+@case('history.get_call_history', HISTORY_SIZES)
+@contextmanager
+def bench_get_call_history(entries):
+    from selit.history_logger import get_call_history
+    with _history(entries):
+        yield lambda: get_call_history(1)
+
+@case('history.generate_day_summary', HISTORY_SIZES)
+@contextmanager
+def bench_generate_day_summary(entries):
+    from selit.history_logger import generate_day_summary
+    with _history(entries):
+        yield lambda: generate_day_summary()
+
+@case('analyzer.format_detailed_history_for_ai', HISTORY_SIZES)
+@contextmanager
+def bench_format_detailed_history(entries):
+    from selit.history_logger import generate_day_summary
+    from selit.history_analyzer import get_detailed_history_for_date, format_detailed_history_for_ai
+    with _history(entries):
+        today = datetime.datetime.now().date()
+        history_data = get_detailed_history_for_date(today)
+        summary_data = generate_day_summary(today)
+        yield lambda: format_detailed_history_for_ai(history_data, summary_data)
+
+
+# Window lookup
+
+@contextmanager
+def _environment(**variables):
+    """Set (or with None, remove) environment variables for the duration of a block."""
+    saved = {name: os.environ.get(name) for name in variables}
+    try:
+        for name, value in variables.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def _write_shim(directory, name, script):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('#!/bin/sh\n' + script)
+    os.chmod(path, 0o755)
+
+@contextmanager
+def _window_tool_shims():
+    """Put fake xdotool, xprop and wmctrl programs with canned answers first on PATH, without any display."""
+    pid = os.getpid()
+    windows = '\n'.join(f'0x{0x2800000 + i:08x}  0 {pid} host Window {i} - Application' for i in range(WINDOW_COUNT))
+    with tempfile.TemporaryDirectory() as directory:
+        _write_shim(directory, 'xdotool', f'''case "$1" in
+  getactivewindow) echo 41943047 ;;
+  getwindowname) echo "Window $2 - Application" ;;
+  getwindowpid) echo {pid} ;;
+  search) seq 41943040 {41943040 + WINDOW_COUNT - 1} ;;
+  *) exit 1 ;;
+esac
+''')
+        _write_shim(directory, 'xprop', f'''case "$*" in
+  *_NET_ACTIVE_WINDOW*) echo "_NET_ACTIVE_WINDOW(WINDOW): window id # 0x2800007" ;;
+  *WM_NAME*) echo 'WM_NAME(STRING) = "Window 7 - Application"' ;;
+  *_NET_WM_PID*) echo "_NET_WM_PID(CARDINAL) = {pid}" ;;
+  *) exit 1 ;;
+esac
+''')
+        _write_shim(directory, 'wmctrl', f'''cat <<'EOF'
+{windows}
+EOF
+''')
+        no_display = dict(DISPLAY=None, WAYLAND_DISPLAY=None, SWAYSOCK=None, HYPRLAND_INSTANCE_SIGNATURE=None)
+        with _environment(PATH=directory + os.pathsep + os.environ.get('PATH', ''), **no_display):
+            yield
+
+@case('window.get_window_info.active', ('shims',))
+@contextmanager
+def bench_active_window_shims(_):
+    from selit.utils import get_window_info
+    with _window_tool_shims():
+        yield lambda: get_window_info(get_active_only=True)
+
+@case('window.get_window_info.all', ('shims',))
+@contextmanager
+def bench_all_windows_shims(_):
+    from selit.utils import get_window_info
+    with _window_tool_shims():
+        yield lambda: get_window_info(get_active_only=False)
+
+def _create_x11_windows(display_name, count):
+    """
+    Create titled windows with PIDs and publish them on the root window, as a window manager would.
+
+    Returns:
+        tuple: (libX11, connection); the windows live as long as the connection stays open
+    """
+    xlib = ctypes.CDLL(ctypes.util.find_library('X11'))
+    xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    xlib.XOpenDisplay.restype = ctypes.c_void_p
+    xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+    xlib.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+    xlib.XInternAtom.restype = ctypes.c_ulong
+    xlib.XCreateSimpleWindow.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_int,
+        ctypes.c_uint, ctypes.c_uint, ctypes.c_uint, ctypes.c_ulong, ctypes.c_ulong,
+    ]
+    xlib.XCreateSimpleWindow.restype = ctypes.c_ulong
+    xlib.XChangeProperty.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_ulong,
+        ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_int,
+    ]
+    xlib.XMapWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+    xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+
+    handle = xlib.XOpenDisplay(display_name.encode())
+    if not handle:
+        raise RuntimeError(f"Cannot connect to {display_name}")
+    root = xlib.XDefaultRootWindow(handle)
+
+    def set_property(window, name, type_name, data, length, bits=32):
+        atom = xlib.XInternAtom(handle, name.encode(), False)
+        property_type = xlib.XInternAtom(handle, type_name.encode(), False)
+        # Format 32 data is passed as C longs, whatever their size
+        xlib.XChangeProperty(handle, window, atom, property_type, bits, 0, data, length)
+
+    windows = []
+    for i in range(count):
+        window = xlib.XCreateSimpleWindow(handle, root, 0, 0, 100, 100, 0, 0, 0)
+        title = f'Window {i} - Application {i}'.encode('utf-8')
+        set_property(window, '_NET_WM_NAME', 'UTF8_STRING', title, len(title), bits=8)
+        set_property(window, 'WM_NAME', 'STRING', title, len(title), bits=8)
+        set_property(window, '_NET_WM_PID', 'CARDINAL', (ctypes.c_long * 1)(os.getpid()), 1)
+        xlib.XMapWindow(handle, window)
+        windows.append(window)
+
+    set_property(root, '_NET_CLIENT_LIST', 'WINDOW', (ctypes.c_long * count)(*windows), count)
+    set_property(root, '_NET_ACTIVE_WINDOW', 'WINDOW', (ctypes.c_long * 1)(windows[count // 2]), 1)
+    xlib.XSync(handle, False)
+    return xlib, handle
+
+_xvfb_display = None
+_xvfb_windows = None
+
+def _start_xvfb():
+    """
+    Start an Xvfb server with WINDOW_COUNT windows, once for the whole run.
+
+    selit keeps its X connection open between calls, so every X11 case uses the
+    same server instead of one that is gone by the next case.
+
+    Returns:
+        str: The display name, or None if Xvfb or libX11 is not installed
+    """
+    global _xvfb_display, _xvfb_windows
+    if _xvfb_display is not None:
+        return _xvfb_display
+    if not shutil.which('Xvfb') or not ctypes.util.find_library('X11'):
+        return None
+
+    display = ':97'
+    server = subprocess.Popen(['Xvfb', display, '-nolisten', 'tcp'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    atexit.register(lambda: (server.terminate(), server.wait()))
+
+    deadline = time.monotonic() + 10
+    while not os.path.exists(f'/tmp/.X11-unix/X{display[1:]}'):
+        if time.monotonic() > deadline or server.poll() is not None:
+            raise RuntimeError("Xvfb did not start")
+        time.sleep(0.05)
+
+    # Kept for the whole run, closing the connection would destroy the windows
+    _xvfb_windows = _create_x11_windows(display, WINDOW_COUNT)
+    _xvfb_display = display
+    return display
+
+@contextmanager
+def _xvfb():
+    """Point DISPLAY at the Xvfb server for the block, or yield False if Xvfb is not installed."""
+    display = _start_xvfb()
+    if display is None:
+        yield False
+        return
+    with _environment(DISPLAY=display, WAYLAND_DISPLAY=None, SWAYSOCK=None, HYPRLAND_INSTANCE_SIGNATURE=None):
+        yield True
+
+def _check_x11_windows():
+    """Fail early if selit does not see the windows, a timing of empty answers measures nothing."""
+    from selit import x11
+    active = x11.get_active_window_info()
+    windows = x11.list_windows() or []
+    if not active or len(windows) != WINDOW_COUNT:
+        raise RuntimeError(f"Expected an active window and {WINDOW_COUNT} windows under Xvfb, got {active!r} and {len(windows)}")
+
+@case('window.x11.get_active_window_info', ('xvfb',))
+@contextmanager
+def bench_x11_active_window(_):
+    from selit import x11
+    with _xvfb() as available:
+        if available:
+            _check_x11_windows()
+        yield (lambda: x11.get_active_window_info()) if available else None
+
+@case('window.x11.list_windows', ('xvfb',))
+@contextmanager
+def bench_x11_list_windows(_):
+    from selit import x11
+    with _xvfb() as available:
+        if available:
+            _check_x11_windows()
+        yield (lambda: x11.list_windows()) if available else None
+
+
+def load_baselines():
+    try:
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='pattern', help="Only run cases whose name contains this text")
+    parser.add_argument('--quick', action='store_true', help=f"Skip histories larger than {QUICK_HISTORY_LIMIT} entries")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown against the baseline, 0.3 = 30%% (default: 0.3)")
+    parser.add_argument('--update-baseline', action='store_true', help="Record the timings as the baseline")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    baselines = load_baselines()
+    results = {}
+    failed = False
+
+    with tempfile.TemporaryDirectory() as home, _environment(HOME=home, APPDATA=home):
+        print(f"{'case':<52} {'time/call':>12} {'relative':>10} {'baseline':>10} {'change':>8}  result")
+        for name, function, param in CASES:
+            if args.pattern and args.pattern not in name:
+                continue
+            if args.quick and name.startswith(('history.', 'analyzer.')) and param > QUICK_HISTORY_LIMIT:
+                continue
+
+            with function(param) as call:
+                if call is None:
+                    print(f"{name:<52} {'':>12} {'':>10} {'':>10} {'':>8}  skipped")
+                    continue
+                seconds, relative = measure(call)
+            results[name] = relative
+
+            baseline = baselines.get(name)
+            if baseline is None:
+                change, result = '', 'new'
+            else:
+                ratio = relative / baseline
+                change = f"{(ratio - 1) * 100:+.0f}%"
+                result = 'REGRESSION' if ratio > 1 + args.threshold else 'ok'
+                failed = failed or result == 'REGRESSION'
+            print(f"{name:<52} {format_time(seconds):>12} {format_relative(relative):>10} {format_relative(baseline):>10} {change:>8}  {result}")
+
+    if args.update_baseline:
+        baselines.update(results)
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {BASELINE_FILE}")
+        return
+
+    sys.exit(1 if failed else 0)
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def format_relative(relative):
+    """Cost in reference workloads, e.g. 0.012x or 310x."""
+    if relative is None:
+        return '-'
+    return f"{relative:.3g}x"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Load benchmark of the web interface: Flask development server vs waitress.
+
+Each server runs in its own process against a throwaway home directory filled
+with a synthetic history, and is hit by concurrent keep-alive clients.
+
+    python benchmarks/web_load.py --entries 2000 --clients 8 --requests 200
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import datetime
+import tempfile
+import textwrap
+import threading
+import subprocess
+import http.client
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = ['/', '/history', '/history/summary']
+
+SERVER_SCRIPT = textwrap.dedent('''
+    import sys
+    from selit.web import app
+
+    server, port, threads = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    if server == 'waitress':
+        from waitress import serve
+        serve(app, host='127.0.0.1', port=port, threads=threads, _quiet=True)
+    else:
+        import logging
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        app.run(host='127.0.0.1', port=port)
+''')
+
+
+def fill_history(home, entries):
+    """Write a synthetic history for today into a home directory."""
+    env = dict(os.environ, HOME=home, APPDATA=home, PYTHONPATH=ROOT)
+    script = textwrap.dedent(f'''
+        from selit.history_logger import log_call
+        for i in range({entries}):
+            window = {{"title": f"Window {{i % 40}}", "process_name": f"app{{i % 7}}.exe"}}
+            log_call(window, f"input text {{i}} " * (i % 50 + 1), f"output text {{i}} " * (i % 30 + 1), "~")
+    ''')
+    subprocess.run([sys.executable, '-c', script], env=env, check=True)
+    return env
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def run_clients(port, path, clients, requests_per_client):
+    """Hit one path with concurrent keep-alive clients and collect latencies."""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        try:
+            for _ in range(requests_per_client):
+                started = time.perf_counter()
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                local.append(time.perf_counter() - started)
+                if response.status != 200:
+                    errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(repr(e))
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': median(latencies) * 1000 if latencies else None,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else None,
+    }
+
+def benchmark_server(server, env, args):
+    port = get_free_port()
+    process = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT, server, str(port), str(args.threads)],
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        results = {}
+        for path in PATHS:
+            # Warm up caches and connections
+            run_clients(port, path, 1, 3)
+            results[path] = run_clients(port, path, args.clients, args.requests)
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=2000, help="Synthetic history entries for today")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent clients")
+    parser.add_argument('--requests', type=int, default=100, help="Requests per client and path")
+    parser.add_argument('--threads', type=int, default=8, help="waitress worker threads")
+    parser.add_argument('--servers', nargs='+', default=['dev', 'waitress'], choices=['dev', 'waitress'])
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        env = fill_history(home, args.entries)
+        results = {server: benchmark_server(server, env, args) for server in args.servers}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{datetime.date.today()}: {args.entries} entries, {args.clients} clients x {args.requests} requests")
+    print(f"{'server':<10} {'path':<18} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for server, paths in results.items():
+        for path, result in paths.items():
+            print(f"{server:<10} {path:<18} {result['rps']:>9.1f} {result['p50_ms']:>9.2f} "
+                  f"{result['p95_ms']:>9.2f} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+
+from selit.compression import brotli
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+
+# Built assets and their manifest, generated and not tracked in git
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_FILE = os.path.join(DIST_DIR, 'manifest.json')
+
+# Source directories (below static/) whose files are built
+SOURCE_DIRS = ('css', 'js')
+
+# Length of the content hash put in built file names
+HASH_LENGTH = 12
+
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def iter_sources():
+    """
+    List the asset sources.
+
+    Yields:
+        str: Paths relative to the static directory, such as 'js/history.js'
+    """
+    for source_dir in SOURCE_DIRS:
+        directory = os.path.join(STATIC_DIR, source_dir)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if os.path.isfile(os.path.join(directory, name)):
+                yield f'{source_dir}/{name}'
+
+def _write(path, data):
+    """Write a file atomically, so a running server never serves half of it."""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def build_assets():
+    """
+    Build every asset source into a content-hashed file with precompressed variants.
+
+    'js/history.js' becomes 'js/history.<hash>.js' in the dist directory, next to
+    '.gz' and, if the brotli module is installed, '.br' variants. The manifest maps
+    source paths to built names. Files of earlier builds are removed.
+
+    Returns:
+        dict: The manifest
+    """
+    manifest = {}
+    keep = {MANIFEST_FILE}
+
+    for source in iter_sources():
+        with open(os.path.join(STATIC_DIR, source), 'rb') as f:
+            data = f.read()
+
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        stem, ext = os.path.splitext(source)
+        built = f'{stem}.{digest}{ext}'
+        manifest[source] = built
+
+        path = os.path.join(DIST_DIR, built)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        variants = {path: data}
+        if len(data) >= MIN_COMPRESS_SIZE:
+            # A fixed mtime keeps the gzip output identical between builds
+            variants[f'{path}.gz'] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                variants[f'{path}.br'] = brotli.compress(data, quality=11)
+
+        for variant, content in variants.items():
+            keep.add(variant)
+            # Content-hashed names never change content, existing files are up to date
+            if not os.path.exists(variant):
+                _write(variant, content)
+
+    # Drop files of earlier builds
+    for root, _, files in os.walk(DIST_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            if path not in keep:
+                os.remove(path)
+
+    _write(MANIFEST_FILE, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+def _is_manifest_stale():
+    """Check whether any source changed since the last build."""
+    try:
+        built_at = os.path.getmtime(MANIFEST_FILE)
+    except OSError:
+        return True
+
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            built_sources = set(json.load(f))
+    except (OSError, ValueError):
+        return True
+
+    sources = set(iter_sources())
+    if sources != built_sources:
+        return True
+    return any(os.path.getmtime(os.path.join(STATIC_DIR, source)) > built_at for source in sources)
+
+def get_manifest():
+    """
+    Get the asset manifest, building the assets first if they are missing or out of date.
+
+    Returns:
+        dict: Source path -> built name, empty if the assets cannot be built
+    """
+    global _manifest
+
+    if _manifest is not None:
+        return _manifest
+
+    with _manifest_lock:
+        if _manifest is not None:
+            return _manifest
+        try:
+            if _is_manifest_stale():
+                manifest = build_assets()
+            else:
+                with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+        except OSError as e:
+            # E.g. installed read-only, the sources are served as they are
+            print(f"Error building static assets: {e}")
+            manifest = {}
+        _manifest = manifest
+        return _manifest
+
+def get_built_name(source):
+    """
+    Get the content-hashed name of an asset.
+
+    Args:
+        source (str): Path relative to the static directory, such as 'js/history.js'
+
+    Returns:
+        str: The built name, or None if the asset was not built
+    """
+    return get_manifest().get(source)
+
+def find_variant(built_name, accept_encodings):
+    """
+    Choose the best precompressed variant of a built asset for a client.
+
+    Args:
+        built_name (str): Name from the manifest
+        accept_encodings: The request's parsed Accept-Encoding header
+
+    Returns:
+        tuple: (file name below the dist directory, Content-Encoding or None)
+    """
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accept_encodings[encoding] and os.path.exists(os.path.join(DIST_DIR, built_name + suffix)):
+            return built_name + suffix, encoding
+    return built_name, None
@@ -0,0 +1,69 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bytes of output collected before they are flushed to the client
+STREAM_FLUSH_SIZE = 16 * 1024
+
+# Favour speed over ratio, responses are compressed while they are generated
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def negotiate_encoding(accept_encodings):
+    """
+    Choose a content encoding for a generated response.
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header
+
+    Returns:
+        str: 'br', 'gzip', or None to send the response uncompressed
+    """
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def iter_encoded(chunks, encoding=None, flush_size=STREAM_FLUSH_SIZE):
+    """
+    Encode and compress a stream of text chunks as they are produced.
+
+    Small chunks (a template yields one per expression) are gathered into writes
+    of about flush_size bytes. Each write is a complete compressor flush, so the
+    browser can render what has arrived so far.
+
+    Args:
+        chunks (iterable): Text chunks, e.g. from flask.stream_template
+        encoding (str): 'br', 'gzip' or None
+        flush_size (int): Bytes of input per flushed write
+
+    Yields:
+        bytes: Body chunks
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    elif encoding == 'gzip':
+        # wbits 31 selects the gzip container
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        compress, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    else:
+        compress, flush, finish = (lambda data: data), (lambda: b''), (lambda: b'')
+
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= flush_size:
+            yield compress(b''.join(pending)) + flush()
+            pending = []
+            pending_size = 0
+
+    yield compress(b''.join(pending)) + finish()
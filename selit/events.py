@@ -0,0 +1,124 @@
+import queue
+import threading
+from collections import defaultdict
+
+# Topic published by log_call for every new history entry
+HISTORY_TOPIC = 'history'
+
+# Topic published by ConfigManager.update with the names of the changed settings
+CONFIG_TOPIC = 'config'
+
+# Events buffered per subscriber; past this the oldest are dropped
+MAX_QUEUED_EVENTS = 256
+
+
+class Subscription:
+    """
+    A subscriber's queue of events on one topic.
+
+    Use it as a context manager so it is removed from the bus when the consumer
+    goes away.
+    """
+
+    def __init__(self, bus, topic, max_queued=MAX_QUEUED_EVENTS):
+        self.bus = bus
+        self.topic = topic
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+
+    def put(self, event):
+        """Queue an event without ever blocking the publisher, dropping the oldest one if full."""
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(event)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        """
+        Wait for the next event.
+
+        Args:
+            timeout (float): Seconds to wait, or None to wait forever
+
+        Returns:
+            The event, or None if the timeout passed first
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """Stop receiving events."""
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class EventBus:
+    """An in-process publish/subscribe bus, safe to use from any thread."""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, max_queued=MAX_QUEUED_EVENTS):
+        """
+        Start receiving the events published on a topic.
+
+        Args:
+            topic (str): The topic name
+            max_queued (int): Events buffered before the oldest are dropped
+
+        Returns:
+            Subscription: The subscriber's queue
+        """
+        subscription = Subscription(self, topic, max_queued)
+        with self._lock:
+            self._subscriptions[topic].append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop delivering events to a subscription."""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.topic, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+
+    def publish(self, topic, event):
+        """
+        Deliver an event to every subscriber of a topic.
+
+        Args:
+            topic (str): The topic name
+            event: The event, shared by all subscribers and not to be modified
+
+        Returns:
+            int: Number of subscribers it was delivered to
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, []))
+        for subscription in subscriptions:
+            subscription.put(event)
+        return len(subscriptions)
+
+    def subscriber_count(self, topic):
+        """Get the number of subscribers of a topic."""
+        with self._lock:
+            return len(self._subscriptions.get(topic, []))
+
+
+# Shared by the clipboard monitor and the web UI running in the same process
+event_bus = EventBus()
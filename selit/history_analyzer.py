@@ -0,0 +1,455 @@
+import os
+import json
+import time
+import hashlib
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from selit.workdir import get_app_data_dir
+from selit.metrics import cache_hits_total, cache_misses_total
+from selit.history_logger import get_log_file_for_date, iter_log_file, expand_entry
+
+# Bump whenever one of the prompts below changes so cached summaries are not reused
+ANALYZER_PROMPT_VERSION = 1
+
+# Rough size limits, in tokens, of what is sent to the model in one call
+BATCH_TOKEN_BUDGET = 6000
+REDUCE_TOKEN_BUDGET = 12000
+
+# A single input or output never takes more than this share of a batch
+MAX_BODY_TOKENS = BATCH_TOKEN_BUDGET // 4
+
+# Number of batch summaries requested at the same time
+MAX_PARALLEL_CALLS = 4
+
+# Partial summaries no analysis has used for this long are deleted, in seconds
+PART_CACHE_MAX_AGE = 7 * 24 * 3600
+
+MAP_PROMPT = (
+    "You are an assistant analyzing how a user worked with an AI assistant tool called 'Select it!'.\n\n"
+    "Below is one part of the user's interactions for a day, with the input text, output text and "
+    "the application where each was used. Write a compact summary of this part that keeps:\n"
+    "1. The time span it covers and the applications used\n"
+    "2. The topics, projects and tasks the user worked on\n"
+    "3. The kinds of requests made to the assistant\n"
+    "4. Concrete accomplishments or progress visible in the content\n\n"
+    "Use short bullet points and keep names of projects, files and people. "
+    "Do not add anything that is not in the interactions.\n\n"
+)
+
+COMBINE_PROMPT = (
+    "You are an assistant analyzing how a user worked with an AI assistant tool called 'Select it!'.\n\n"
+    "Below are summaries of consecutive parts of the user's interactions for a day. "
+    "Merge them into one compact summary in the same bullet point style, keeping the time spans, "
+    "applications, topics, kinds of requests and accomplishments. "
+    "Do not add anything that is not in the summaries.\n\n"
+)
+
+REDUCE_PROMPT = (
+    "You are an assistant analyzing daily usage patterns of an AI assistant tool called 'Select it!'.\n\n"
+    "Below is a summary of a user's interactions for a day, followed by all interactions in chronological order "
+    "(listed in full, or summarized part by part on busy days) including input text, output text, and the applications where they were used. "
+    "Please provide two distinct sections in your response:\n\n"
+
+    "SECTION 1 - USAGE ANALYSIS:\n"
+    "Please analyze the data and provide insights about their usage patterns, including:\n"
+    "1. When they were most active\n"
+    "2. Which applications they used most frequently\n"
+    "3. Common themes or topics in their inputs\n"
+    "4. Patterns in the types of tasks they're using the assistant for\n"
+    "5. Any other interesting observations\n\n"
+
+    "SECTION 2 - DAILY WORK REPORT:\n"
+    "Based on the interactions and their content, create a professional daily work report that the user could share with their boss. "
+    "This report should:\n"
+    "1. Summarize the main work activities performed today\n"
+    "2. Highlight key accomplishments and progress made\n"
+    "3. Identify the main projects or tasks worked on\n"
+    "4. Be written in a professional first-person tone (as if the user wrote it)\n"
+    "5. Be concise but comprehensive (approximately 150-250 words)\n\n"
+)
+
+REDUCE_PROMPT_FOOTER = (
+    "Format both sections with appropriate headers. For the work report section, focus only on professional work-related activities "
+    "that would be appropriate to share with management, ignoring any personal conversations or activities."
+)
+
+
+def get_analysis_cache_dir():
+    """Get or create the directory where analysis results are cached."""
+    cache_dir = os.path.join(get_app_data_dir(), 'analysis_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def estimate_tokens(text):
+    """Estimate the number of tokens in a text (about four characters per token)."""
+    return len(text) // 4 + 1
+
+def get_detailed_history_for_date(date):
+    """Get detailed history data for a specific date"""
+    interactions = [expand_entry(entry) for entry in iter_log_file(get_log_file_for_date(date))]
+
+    # Sort by timestamp (oldest first for chronological analysis)
+    interactions.sort(key=lambda x: x.get('timestamp', ''))
+    return interactions
+
+def format_summary_for_ai(summary_data):
+    """Format the day summary statistics into text for AI analysis"""
+    lines = [
+        "=== DAILY SUMMARY ===",
+        f"Date: {summary_data['date']}",
+        f"Total Interactions: {summary_data['total_interactions']}",
+    ]
+
+    # Add busiest hour if available
+    if summary_data.get('busiest_hour') is not None:
+        hour = summary_data['busiest_hour']
+        lines.append(f"Busiest Hour: {hour}:00 - {hour}:59")
+
+    # Add average lengths
+    lines.append(f"Average Input Length: {summary_data['average_input_length']} characters")
+    lines.append(f"Average Output Length: {summary_data['average_output_length']} characters")
+    lines.append("")
+
+    # Add applications usage
+    lines.append("Most Used Applications:")
+    for app_name, count in summary_data.get('apps', {}).items():
+        lines.append(f"- {app_name}: {count} interactions")
+
+    # Add hour distribution
+    lines.append("")
+    lines.append("Activity by Hour:")
+    for hour, count in summary_data.get('hour_distribution', {}).items():
+        if count > 0:
+            lines.append(f"- {hour}:00 - {hour}:59: {count} interactions")
+
+    return "\n".join(lines) + "\n"
+
+def _truncate(text, max_tokens):
+    """Cut a body so it stays within a token budget."""
+    max_length = max_tokens * 4
+    if len(text) > max_length:
+        return text[:max_length] + "... [truncated]"
+    return text
+
+def format_interaction(number, entry):
+    """Format a single interaction into text for AI analysis"""
+    timestamp = entry.get('timestamp', '')
+    try:
+        dt = datetime.datetime.fromisoformat(timestamp)
+        formatted_time = dt.strftime('%H:%M:%S')
+    except (ValueError, TypeError):
+        formatted_time = timestamp
+
+    window = entry.get('window', {})
+    return "".join([
+        f"\n--- INTERACTION {number} (Time: {formatted_time}) ---\n",
+        f"Application: {window.get('process_name', 'Unknown')}\n",
+        f"Window Title: {window.get('title', 'Unknown')}\n",
+        f"Triggered by: {entry.get('trigger_word', 'Unknown')}\n\n",
+        f"INPUT:\n{_truncate(entry.get('input', ''), MAX_BODY_TOKENS)}\n\n",
+        f"OUTPUT:\n{_truncate(entry.get('output', ''), MAX_BODY_TOKENS)}\n",
+    ])
+
+def format_detailed_history_for_ai(history_data, summary_data):
+    """Format detailed history and summary data into text for AI analysis"""
+    parts = [format_summary_for_ai(summary_data), "\n\n=== DETAILED INTERACTIONS ===\n"]
+    parts.extend(format_interaction(i, entry) for i, entry in enumerate(history_data, 1))
+    return "".join(parts)
+
+def pack_batches(texts, token_budget):
+    """
+    Group consecutive texts into batches that fit a token budget.
+
+    Packing is greedy and always starts from the first text, so appending texts
+    later only changes the last batch and adds new ones; earlier batches stay
+    identical and keep hitting the cache.
+
+    Args:
+        texts (list): Texts in order
+        token_budget (int): Maximum estimated tokens per batch
+
+    Returns:
+        list: Batches, each a single string
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > token_budget:
+            batches.append("".join(current))
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+
+    if current:
+        batches.append("".join(current))
+    return batches
+
+def _get_part_cache_file(cache_key):
+    """Get the path of the cached partial summary with the given key."""
+    return os.path.join(get_analysis_cache_dir(), f'part_{cache_key}.json')
+
+def _get_cached_summary(cache_key):
+    """Load a cached partial summary, or None if it was never computed."""
+    cache_file = _get_part_cache_file(cache_key)
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            summary = json.load(f)['summary']
+        # Keeps a part that is still in use from being pruned by age
+        os.utime(cache_file)
+        return summary
+    except (json.JSONDecodeError, KeyError, OSError):
+        return None
+
+def _store_cached_summary(cache_key, summary):
+    """Persist a partial summary under its content key."""
+    cache_file = _get_part_cache_file(cache_key)
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'summary': summary}, f, ensure_ascii=False)
+    os.replace(tmp_file, cache_file)
+
+def _delete_cached_summaries(cache_keys):
+    """Remove cached partial summaries, skipping ones that are already gone."""
+    for cache_key in cache_keys:
+        try:
+            os.remove(_get_part_cache_file(cache_key))
+        except FileNotFoundError:
+            pass
+
+def prune_part_cache(max_age=PART_CACHE_MAX_AGE):
+    """
+    Delete the cached partial summaries that no analysis used for a while.
+
+    These are left behind by analyses that failed half way, or that were run
+    for a day while another one was already cached in its place.
+
+    Args:
+        max_age (float): Seconds since a part was last written or read
+
+    Returns:
+        int: The number of deleted files
+    """
+    cutoff = time.time() - max_age
+    deleted = 0
+    with os.scandir(get_analysis_cache_dir()) as entries:
+        for entry in entries:
+            if not (entry.name.startswith('part_') and entry.name.endswith('.json')):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    deleted += 1
+            except FileNotFoundError:
+                pass
+    return deleted
+
+def _summarize(prompt, text, generate_text, model='', part_keys=None):
+    """
+    Summarize one batch, reusing the cached result for identical input.
+
+    Args:
+        prompt (str): Instructions placed before the batch
+        text (str): The batch content
+        generate_text (callable): Sends a prompt to the AI service and returns the reply or None
+        model (str): The AI service and model generate_text uses
+        part_keys (list): Collects the cache key of the summary, if given
+
+    Returns:
+        str: The summary
+    """
+    cache_key = hashlib.sha256(f"{ANALYZER_PROMPT_VERSION}\0{model}\0{prompt}\0{text}".encode('utf-8')).hexdigest()
+    if part_keys is not None:
+        part_keys.append(cache_key)
+    summary = _get_cached_summary(cache_key)
+    if summary is not None:
+        cache_hits_total.inc(cache='analysis_batch')
+        return summary
+    cache_misses_total.inc(cache='analysis_batch')
+
+    summary = generate_text(prompt + text)
+    if not summary:
+        raise RuntimeError("The AI service did not return a summary")
+
+    _store_cached_summary(cache_key, summary)
+    return summary
+
+def _summarize_all(prompt, batches, generate_text, model='', part_keys=None):
+    """Summarize batches concurrently, keeping their order."""
+    if len(batches) == 1:
+        return [_summarize(prompt, batches[0], generate_text, model, part_keys)]
+
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_CALLS) as executor:
+        return list(executor.map(lambda batch: _summarize(prompt, batch, generate_text, model, part_keys), batches))
+
+def analyze_day(history_data, summary_data, generate_text, model='', part_keys=None):
+    """
+    Produce the usage analysis and work report for a day with a map-reduce pass.
+
+    Interactions are packed into token-budgeted batches that are summarized in
+    parallel (map). The summaries are merged level by level until they fit in one
+    prompt, which then produces the final analysis (reduce). Every partial summary
+    is cached by content, so re-analysing a day only sends the new interactions.
+
+    Args:
+        history_data (list): The day's interactions, oldest first
+        summary_data (dict): Statistics from generate_day_summary
+        generate_text (callable): Sends a prompt to the AI service and returns the reply or None
+        model (str): The AI service and model generate_text uses, partial summaries are cached per model
+        part_keys (list): Collects the cache keys of the partial summaries, if given
+
+    Returns:
+        str: The analysis text
+    """
+    summary_text = format_summary_for_ai(summary_data)
+    interactions = [format_interaction(i, entry) for i, entry in enumerate(history_data, 1)]
+
+    if estimate_tokens(summary_text + "".join(interactions)) <= REDUCE_TOKEN_BUDGET:
+        # Small day, everything fits into the final prompt as is
+        parts = interactions
+        heading = "=== DETAILED INTERACTIONS ==="
+    else:
+        parts = _summarize_all(MAP_PROMPT, pack_batches(interactions, BATCH_TOKEN_BUDGET), generate_text, model, part_keys)
+        parts = [f"\n--- PART {i} ---\n{part}\n" for i, part in enumerate(parts, 1)]
+
+        # Merge summaries until they fit next to the day summary
+        while len(parts) > 1 and estimate_tokens(summary_text + "".join(parts)) > REDUCE_TOKEN_BUDGET:
+            groups = pack_batches(parts, BATCH_TOKEN_BUDGET)
+            if len(groups) == len(parts):
+                # Every summary fills a batch on its own, merging cannot shrink them further
+                break
+            parts = _summarize_all(COMBINE_PROMPT, groups, generate_text, model, part_keys)
+            parts = [f"\n--- PART {i} ---\n{part}\n" for i, part in enumerate(parts, 1)]
+        heading = "=== INTERACTION SUMMARIES ==="
+
+    prompt = "".join([
+        REDUCE_PROMPT,
+        summary_text,
+        f"\n\n{heading}\n",
+        *parts,
+        "\n\n",
+        REDUCE_PROMPT_FOOTER,
+    ])
+
+    result = generate_text(prompt)
+    if not result:
+        raise RuntimeError("The AI service did not return an analysis")
+    return result
+
+def get_day_content_hash(date):
+    """
+    Hash the content of a day's log file.
+
+    Bodies in the log are content hashes themselves, so the log alone identifies
+    everything an analysis was based on.
+
+    Args:
+        date (datetime.date): The day to hash
+
+    Returns:
+        str: SHA-256 hex digest of the log, or None if nothing was logged that day
+    """
+    log_file = get_log_file_for_date(date)
+    if not os.path.exists(log_file):
+        return None
+
+    digest = hashlib.sha256()
+    with open(log_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _get_day_cache_file(date):
+    """Get the path where the analysis of a day is cached."""
+    return os.path.join(get_analysis_cache_dir(), f"day_{date.strftime('%Y-%m-%d')}.json")
+
+def _get_day_cache_key(date, content_hash, model):
+    """Build the key an analysis is valid for: the day, its log content, the model and the prompt version."""
+    return f"{date.strftime('%Y-%m-%d')}:{content_hash}:{model}:{ANALYZER_PROMPT_VERSION}"
+
+def get_cached_analysis(date, model=''):
+    """
+    Get the cached analysis of a day if the day's log has not changed since.
+
+    Args:
+        date (datetime.date): The analyzed day
+        model (str): The AI service and model the analysis must come from
+
+    Returns:
+        dict: The cached record with 'analysis' and 'created' keys, or None if missing or stale
+    """
+    cache_file = _get_day_cache_file(date)
+    content_hash = get_day_content_hash(date)
+    if content_hash is None or not os.path.exists(cache_file):
+        return None
+
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+
+    # Any new log entry changes the hash, which invalidates the record, and so does another model
+    if record.get('key') != _get_day_cache_key(date, content_hash, model):
+        return None
+    return record
+
+def _get_recorded_parts(cache_file):
+    """Get the partial summary keys stored with a cached day analysis, empty if there is none."""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return set(json.load(f).get('parts', []))
+    except (json.JSONDecodeError, OSError, AttributeError):
+        return set()
+
+def get_day_analysis(date, summary_data, generate_text, model='', refresh=False):
+    """
+    Analyze a day, serving the cached result while the day's log is unchanged.
+
+    Args:
+        date (datetime.date): The day to analyze
+        summary_data (dict): Statistics from generate_day_summary
+        generate_text (callable): Sends a prompt to the AI service and returns the reply or None
+        model (str): The AI service and model generate_text uses, such as 'openai:gpt-4o'
+        refresh (bool): Ignore a cached result and analyze again
+
+    Returns:
+        tuple: (analysis text, True if it was served from the cache)
+    """
+    if not refresh:
+        record = get_cached_analysis(date, model)
+        if record:
+            cache_hits_total.inc(cache='day_analysis')
+            return record['analysis'], True
+    cache_misses_total.inc(cache='day_analysis')
+
+    # Hash before reading so entries logged during the analysis invalidate the result
+    content_hash = get_day_content_hash(date)
+    part_keys = []
+    analysis = analyze_day(get_detailed_history_for_date(date), summary_data, generate_text, model, part_keys)
+
+    if content_hash is not None:
+        cache_file = _get_day_cache_file(date)
+        previous_parts = _get_recorded_parts(cache_file)
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'key': _get_day_cache_key(date, content_hash, model),
+                'created': datetime.datetime.now().isoformat(),
+                'analysis': analysis,
+                # Partial summaries a later analysis of the day may reuse
+                'parts': sorted(set(part_keys))
+            }, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+
+        # Parts of the replaced analysis that were not reused are never read again
+        _delete_cached_summaries(previous_parts - set(part_keys))
+    prune_part_cache()
+
+    return analysis, False
@@ -1,9 +1,31 @@
+import io
 import os
+import csv
 import json
+import mmap
+import time
+import struct
 import datetime
+import threading
 from pathlib import Path
 
 from selit.workdir import get_app_data_dir
+from selit.history_store import intern_string, resolve_string, pack_body, unpack_body
+from selit.events import event_bus, HISTORY_TOPIC
+from selit.metrics import history_write_seconds
+from selit.tracing import traced
+
+# Version marker of entries whose bodies and window metadata live in the history store
+STORED_ENTRY_VERSION = 2
+
+# Each record of a day's ``.idx`` sidecar is the byte offset of one line in its ``.log`` file
+INDEX_RECORD = struct.Struct('<Q')
+
+# Entries decoded at a time when history is streamed
+HISTORY_CHUNK_SIZE = 500
+
+# Serializes appends so the log line and its index record are written together
+_log_lock = threading.Lock()
 
 
 def get_history_dir():
@@ -18,6 +40,70 @@ def get_current_day_log_file():
     history_dir = get_history_dir()
     return os.path.join(history_dir, f'selit_{today}.log')
 
+def get_log_file_for_date(date):
+    """Get the log file path for a specific date."""
+    date_str = date.strftime('%Y-%m-%d')
+    return os.path.join(get_history_dir(), f'selit_{date_str}.log')
+
+def get_index_file(log_file):
+    """Get the path of the offset index kept next to a log file."""
+    return os.path.splitext(log_file)[0] + '.idx'
+
+def _sync_index(log_file):
+    """
+    Bring the offset index of a log file up to date.
+    
+    Only lines appended after the last indexed one are scanned. If the index does not
+    match the log (e.g. the log was edited by hand) it is rebuilt from scratch.
+    
+    Args:
+        log_file (str): Path to the day log file
+        
+    Returns:
+        int: Number of indexed entries
+    """
+    index_file = get_index_file(log_file)
+    log_size = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+    index_size = os.path.getsize(index_file) if os.path.exists(index_file) else 0
+    count = index_size // INDEX_RECORD.size
+    
+    if log_size == 0:
+        if index_size:
+            open(index_file, 'wb').close()
+        return 0
+    
+    offsets = []
+    with open(log_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        position = 0
+        if count:
+            with open(index_file, 'rb') as idx:
+                idx.seek((count - 1) * INDEX_RECORD.size)
+                last_offset = INDEX_RECORD.unpack(idx.read(INDEX_RECORD.size))[0]
+            
+            line_end = mm.find(b'\n', last_offset) if last_offset < log_size else -1
+            if line_end == -1 or (last_offset > 0 and mm[last_offset - 1] != ord('\n')):
+                # The index points somewhere that is not a line start, start over
+                count = 0
+            else:
+                position = line_end + 1
+        
+        while position < log_size:
+            line_end = mm.find(b'\n', position)
+            if line_end == -1:
+                # Partially written line, it will be indexed on the next sync
+                break
+            offsets.append(position)
+            position = line_end + 1
+    
+    if count * INDEX_RECORD.size != index_size or offsets:
+        with open(index_file, 'r+b' if os.path.exists(index_file) else 'wb') as idx:
+            idx.truncate(count * INDEX_RECORD.size)
+            idx.seek(count * INDEX_RECORD.size)
+            idx.write(b''.join(INDEX_RECORD.pack(offset) for offset in offsets))
+    
+    return count + len(offsets)
+
+@traced()
 def log_call(window_info, input_text, output_text, trigger_word):
     """
     Log a call to the history file.
@@ -28,27 +114,219 @@ def log_call(window_info, input_text, output_text, trigger_word):
         output_text (str): The generated output text
         trigger_word (str): The magic word/trigger used
     """
-    timestamp = datetime.datetime.now().isoformat()
+    now = datetime.datetime.now()
+    timestamp = now.isoformat()
+    log_file = get_log_file_for_date(now.date())
+    started = time.perf_counter()
+    
+    try:
+        # Bodies go to the deduplicated blob store and window metadata is interned,
+        # the log line only keeps references
+        log_entry = {
+            'v': STORED_ENTRY_VERSION,
+            'timestamp': timestamp,
+            'window': {
+                'title': intern_string(window_info.get('title', 'Unknown')),
+                'process_name': intern_string(window_info.get('process_name', 'Unknown'))
+            },
+            'trigger_word': trigger_word,
+            'input': pack_body(input_text),
+            'output': pack_body(output_text)
+        }
+        line = (json.dumps(log_entry) + '\n').encode('utf-8')
+        
+        with _log_lock:
+            # Make sure earlier lines are indexed so the new record lands in its own slot
+            number = _sync_index(log_file)
+            with open(log_file, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line)
+            with open(get_index_file(log_file), 'ab') as idx:
+                idx.write(INDEX_RECORD.pack(offset))
+    except Exception as e:
+        print(f"Error logging call history: {str(e)}")
+        return
+    history_write_seconds.observe(time.perf_counter() - started)
+    
+    # Let live views (the web UI's history stream) show the entry without re-reading the log
+    event_bus.publish(HISTORY_TOPIC, {
+        'date': now.date().isoformat(),
+        'number': number,
+        'entry': {
+            'timestamp': timestamp,
+            'window': {
+                'title': window_info.get('title', 'Unknown'),
+                'process_name': window_info.get('process_name', 'Unknown')
+            },
+            'trigger_word': trigger_word,
+            'input': input_text,
+            'output': output_text
+        }
+    })
+
+def _is_stored_entry(entry):
+    """Check whether a log entry references the history store instead of holding its data inline."""
+    return entry.get('v') == STORED_ENTRY_VERSION
+
+def _get_entry_app_name(entry):
+    """Get the process name of a raw log entry without loading its bodies."""
+    app_name = entry['window']['process_name']
+    return resolve_string(app_name) if _is_stored_entry(entry) else app_name
+
+def _get_body_length(body):
+    """Get the length of an input/output body without loading it from the blob store."""
+    return len(body) if isinstance(body, str) else body['length']
+
+def expand_entry(entry):
+    """
+    Restore a raw log entry to the shape callers expect.
+    
+    Args:
+        entry (dict): An entry as read from the log file
+        
+    Returns:
+        dict: The entry with the window title, process name, input and output as plain strings
+    """
+    if not _is_stored_entry(entry):
+        return entry
     
-    # Create a log entry
-    log_entry = {
-        'timestamp': timestamp,
+    window = entry.get('window', {})
+    return {
+        'timestamp': entry['timestamp'],
         'window': {
-            'title': window_info.get('title', 'Unknown'),
-            'process_name': window_info.get('process_name', 'Unknown')
+            'title': resolve_string(window.get('title', '')),
+            'process_name': resolve_string(window.get('process_name', ''))
         },
-        'trigger_word': trigger_word,
-        'input': input_text,
-        'output': output_text
+        'trigger_word': entry.get('trigger_word'),
+        'input': unpack_body(entry['input']),
+        'output': unpack_body(entry['output'])
     }
+
+def iter_log_file(log_file):
+    """
+    Iterate over the raw entries of a log file, skipping lines that cannot be parsed.
     
-    log_file = get_current_day_log_file()
+    Args:
+        log_file (str): Path to the day log file
+        
+    Yields:
+        dict: Raw log entries in the order they were written
+    """
+    if not os.path.exists(log_file):
+        return
     
     try:
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(log_entry) + '\n')
+        with open(log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line.strip())
+                except json.JSONDecodeError:
+                    # Skip invalid lines
+                    continue
     except Exception as e:
-        print(f"Error logging call history: {str(e)}")
+        print(f"Error reading history from {log_file}: {str(e)}")
+
+def get_history_entry_count(date):
+    """
+    Get the number of entries logged on a specific day.
+    
+    Args:
+        date (datetime.date): The day to count
+        
+    Returns:
+        int: Number of log lines for that day
+    """
+    with _log_lock:
+        return _sync_index(get_log_file_for_date(date))
+
+def get_history_entries(date, start=0, count=None):
+    """
+    Read a range of entries of a day without decoding the lines before it.
+    
+    The offset index gives the position of every line, so only the requested
+    records are sliced out of the memory-mapped log and parsed.
+    
+    Args:
+        date (datetime.date): The day to read
+        start (int): Number of the first entry (0 = oldest of the day)
+        count (int, optional): Maximum number of entries to return. Defaults to all remaining.
+        
+    Returns:
+        list: Log entries in chronological order. Lines that cannot be parsed are returned as None
+              so entry numbers stay stable.
+    """
+    log_file = get_log_file_for_date(date)
+    
+    with _log_lock:
+        total = _sync_index(log_file)
+    
+    start = max(start, 0)
+    stop = total if count is None else min(total, start + max(count, 0))
+    if start >= stop:
+        return []
+    
+    entries = []
+    try:
+        with open(get_index_file(log_file), 'rb') as idx:
+            idx.seek(start * INDEX_RECORD.size)
+            # Read one extra record to know where the last requested line ends
+            raw = idx.read((stop - start + 1) * INDEX_RECORD.size)
+        offsets = [INDEX_RECORD.unpack_from(raw, i)[0] for i in range(0, len(raw), INDEX_RECORD.size)]
+        
+        with open(log_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for i in range(stop - start):
+                line_start = offsets[i]
+                line_end = offsets[i + 1] if i + 1 < len(offsets) else mm.find(b'\n', line_start)
+                try:
+                    entries.append(expand_entry(json.loads(mm[line_start:line_end])))
+                except (json.JSONDecodeError, UnicodeDecodeError, KeyError):
+                    entries.append(None)
+    except Exception as e:
+        print(f"Error reading history from {log_file}: {str(e)}")
+    
+    return entries
+
+def get_history_entry(date, number):
+    """
+    Get a single entry of a day by its number.
+    
+    Args:
+        date (datetime.date): The day to read
+        number (int): Entry number (0 = oldest of the day)
+        
+    Returns:
+        dict: The log entry, or None if it does not exist or cannot be parsed
+    """
+    entries = get_history_entries(date, number, 1) if number >= 0 else []
+    return entries[0] if entries else None
+
+def iter_recent_history(days=1, chunk_size=HISTORY_CHUNK_SIZE):
+    """
+    Iterate over the call history of the last days, newest first, without loading it all.
+    
+    Each day log is appended in chronological order, so walking the offset index
+    backwards in chunks gives the same order as get_call_history while only a
+    chunk of entries is in memory at a time.
+    
+    Args:
+        days (int): Number of days to retrieve (default: 1 - current day only)
+        chunk_size (int): Entries decoded at a time
+        
+    Yields:
+        dict: Log entries with 'timestamp_parsed' added, newest first
+    """
+    today = datetime.datetime.now().date()
+    
+    for date in (today - datetime.timedelta(days=i) for i in range(days)):
+        stop = get_history_entry_count(date)
+        while stop > 0:
+            start = max(stop - chunk_size, 0)
+            for entry in reversed(get_history_entries(date, start, stop - start)):
+                if entry is None:
+                    continue
+                entry['timestamp_parsed'] = datetime.datetime.fromisoformat(entry['timestamp'])
+                yield entry
+            stop = start
 
 def get_call_history(days=1):
     """
@@ -61,7 +339,6 @@ def get_call_history(days=1):
         list: List of log entries, sorted by timestamp (newest first)
     """
     history = []
-    history_dir = get_history_dir()
     
     # Calculate date range
     today = datetime.datetime.now().date()
@@ -69,28 +346,106 @@ def get_call_history(days=1):
     
     # Collect logs for each date
     for date in dates:
-        date_str = date.strftime('%Y-%m-%d')
-        log_file = os.path.join(history_dir, f'selit_{date_str}.log')
+        log_file = get_log_file_for_date(date)
         
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            entry = json.loads(line.strip())
-                            # Parse timestamp for sorting
-                            entry['timestamp_parsed'] = datetime.datetime.fromisoformat(entry['timestamp'])
-                            history.append(entry)
-                        except json.JSONDecodeError:
-                            # Skip invalid lines
-                            continue
-            except Exception as e:
-                print(f"Error reading history from {log_file}: {str(e)}")
+        try:
+            for raw_entry in iter_log_file(log_file):
+                entry = expand_entry(raw_entry)
+                # Parse timestamp for sorting
+                entry['timestamp_parsed'] = datetime.datetime.fromisoformat(entry['timestamp'])
+                history.append(entry)
+        except Exception as e:
+            print(f"Error reading history from {log_file}: {str(e)}")
     
     # Sort by timestamp (newest first)
     history.sort(key=lambda x: x['timestamp_parsed'], reverse=True)
     return history
 
+def iter_call_history(start_date, end_date, app=None, trigger=None, start_time=None, end_time=None):
+    """
+    Iterate over the call history of a date range, one entry at a time.
+    
+    Days are read one line at a time and filters are checked on the raw record, so
+    bodies are only loaded for matching entries and memory use does not depend on
+    the size of the range.
+    
+    Args:
+        start_date (datetime.date): First day to include
+        end_date (datetime.date): Last day to include
+        app (str, optional): Only entries whose process name contains this text (case-insensitive)
+        trigger (str, optional): Only entries triggered by this word
+        start_time (datetime.time, optional): Only entries logged at or after this time of day
+        end_time (datetime.time, optional): Only entries logged at or before this time of day
+        
+    Yields:
+        dict: Log entries in chronological order
+    """
+    app = app.lower() if app else None
+    date = start_date
+    
+    while date <= end_date:
+        for entry in iter_log_file(get_log_file_for_date(date)):
+            try:
+                if trigger and entry.get('trigger_word') != trigger:
+                    continue
+                if app and app not in _get_entry_app_name(entry).lower():
+                    continue
+                if start_time or end_time:
+                    logged_at = datetime.datetime.fromisoformat(entry['timestamp']).time()
+                    if (start_time and logged_at < start_time) or (end_time and logged_at > end_time):
+                        continue
+                yield expand_entry(entry)
+            except (KeyError, ValueError, TypeError):
+                # Skip entries missing the fields the filters need
+                continue
+        date += datetime.timedelta(days=1)
+
+# Columns of the CSV export, in order
+EXPORT_CSV_FIELDS = ['timestamp', 'process_name', 'window_title', 'trigger_word', 'input', 'output']
+
+def export_history(fmt, start_date, end_date, **filters):
+    """
+    Serialize a date range of call history as a stream of text chunks.
+    
+    Args:
+        fmt (str): 'ndjson' (one JSON entry per line) or 'csv'
+        start_date (datetime.date): First day to include
+        end_date (datetime.date): Last day to include
+        **filters: Passed on to iter_call_history (app, trigger, start_time, end_time)
+        
+    Yields:
+        str: Serialized chunks, one per entry (plus the header row for CSV)
+    """
+    entries = iter_call_history(start_date, end_date, **filters)
+    
+    if fmt == 'ndjson':
+        for entry in entries:
+            yield json.dumps(entry, ensure_ascii=False) + '\n'
+    elif fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_FIELDS)
+        
+        for entry in entries:
+            window = entry.get('window', {})
+            writer.writerow([
+                entry.get('timestamp', ''),
+                window.get('process_name', ''),
+                window.get('title', ''),
+                entry.get('trigger_word', ''),
+                entry.get('input', ''),
+                entry.get('output', '')
+            ])
+            # Hand out what has been written so far and reuse the buffer
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}. Must be 'ndjson' or 'csv'.")
+
 def generate_day_summary(date=None):
     """
     Generate a summary of all interactions for a specific day.
@@ -105,7 +460,7 @@ def generate_day_summary(date=None):
         date = datetime.datetime.now().date()
     
     date_str = date.strftime('%Y-%m-%d')
-    log_file = os.path.join(get_history_dir(), f'selit_{date_str}.log')
+    log_file = get_log_file_for_date(date)
     
     if not os.path.exists(log_file):
         return {
@@ -125,36 +480,30 @@ def generate_day_summary(date=None):
     hour_distribution = {}
     
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    entry = json.loads(line.strip())
-                    interactions.append(entry)
-                    
-                    # Count app usage
-                    app_name = entry['window']['process_name']
-                    if app_name in apps:
-                        apps[app_name] += 1
-                    else:
-                        apps[app_name] = 1
-                    
-                    # Calculate input/output lengths
-                    input_length = len(entry['input'])
-                    output_length = len(entry['output'])
-                    total_input_length += input_length
-                    total_output_length += output_length
-                    
-                    # Track activity by hour
-                    timestamp = datetime.datetime.fromisoformat(entry['timestamp'])
-                    hour = timestamp.hour
-                    if hour in hour_distribution:
-                        hour_distribution[hour] += 1
-                    else:
-                        hour_distribution[hour] = 1
-                        
-                except json.JSONDecodeError:
-                    # Skip invalid lines
-                    continue
+        # Summaries only need metadata, bodies stay in the blob store
+        for entry in iter_log_file(log_file):
+            interactions.append(entry)
+            
+            # Count app usage
+            app_name = _get_entry_app_name(entry)
+            if app_name in apps:
+                apps[app_name] += 1
+            else:
+                apps[app_name] = 1
+            
+            # Calculate input/output lengths
+            input_length = _get_body_length(entry['input'])
+            output_length = _get_body_length(entry['output'])
+            total_input_length += input_length
+            total_output_length += output_length
+            
+            # Track activity by hour
+            timestamp = datetime.datetime.fromisoformat(entry['timestamp'])
+            hour = timestamp.hour
+            if hour in hour_distribution:
+                hour_distribution[hour] += 1
+            else:
+                hour_distribution[hour] = 1
     except Exception as e:
         print(f"Error reading history from {log_file}: {str(e)}")
     
@@ -0,0 +1,165 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+from functools import lru_cache
+
+from selit.workdir import get_app_data_dir
+
+# Bodies shorter than this are kept inline in the log entry, a blob file would cost more than it saves
+BLOB_MIN_LENGTH = 256
+
+_strings_lock = threading.Lock()
+_strings = {}
+# How far each strings table has been read, so later loads only read what other processes appended
+_strings_offsets = {}
+
+
+def get_store_dir():
+    """Get or create the directory holding deduplicated history data."""
+    store_dir = os.path.join(get_app_data_dir(), 'history', 'store')
+    os.makedirs(store_dir, exist_ok=True)
+    return store_dir
+
+def _get_blob_path(blob_hash):
+    """Get the file path of a blob, fanned out by the first two hash characters."""
+    return os.path.join(get_store_dir(), 'blobs', blob_hash[:2], blob_hash[2:])
+
+def _get_strings_file():
+    """Get the path of the interned strings table."""
+    return os.path.join(get_store_dir(), 'strings.jsonl')
+
+def put_blob(text):
+    """
+    Store a text body once, addressed by its content hash.
+
+    Args:
+        text (str): The body to store
+
+    Returns:
+        str: The SHA-256 hex digest identifying the body
+    """
+    data = text.encode('utf-8')
+    blob_hash = hashlib.sha256(data).hexdigest()
+    blob_path = _get_blob_path(blob_hash)
+
+    if not os.path.exists(blob_path):
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        # Write under a unique name first so readers never see a partial blob
+        tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(data))
+        os.replace(tmp_path, blob_path)
+
+    return blob_hash
+
+@lru_cache(maxsize=512)
+def get_blob(blob_hash):
+    """
+    Load a text body by its content hash.
+
+    Blobs never change once written, so recently used ones are kept in memory.
+
+    Args:
+        blob_hash (str): The hash returned by put_blob
+
+    Returns:
+        str: The stored body
+    """
+    with open(_get_blob_path(blob_hash), 'rb') as f:
+        return zlib.decompress(f.read()).decode('utf-8')
+
+def _load_strings():
+    """Read interned strings written by this or any other selit process since the last load."""
+    strings_file = _get_strings_file()
+    if not os.path.exists(strings_file):
+        return
+
+    with open(strings_file, 'rb') as f:
+        f.seek(_strings_offsets.get(strings_file, 0))
+        for line in f:
+            if not line.endswith(b'\n'):
+                # Another process is still writing this record
+                break
+            _strings_offsets[strings_file] = f.tell()
+            try:
+                record = json.loads(line)
+                _strings[record['id']] = record['s']
+            except (json.JSONDecodeError, KeyError):
+                continue
+
+def intern_string(value):
+    """
+    Intern a short metadata string such as a window title or process name.
+
+    Ids are derived from the string itself, so several processes appending to the
+    table at once can only ever write duplicate, identical records.
+
+    Args:
+        value (str): The string to intern
+
+    Returns:
+        str: The id to store instead of the string
+    """
+    string_id = hashlib.sha1(value.encode('utf-8')).hexdigest()[:16]
+
+    with _strings_lock:
+        if string_id not in _strings:
+            # Another process, or an earlier run, may have interned it already
+            _load_strings()
+        if string_id not in _strings:
+            with open(_get_strings_file(), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'id': string_id, 's': value}) + '\n')
+            _strings[string_id] = value
+
+    return string_id
+
+def resolve_string(string_id):
+    """
+    Get the string behind an interned id.
+
+    Args:
+        string_id (str): The id returned by intern_string
+
+    Returns:
+        str: The interned string, or 'Unknown' if the id is not in the table
+    """
+    with _strings_lock:
+        if string_id not in _strings:
+            _load_strings()
+        return _strings.get(string_id, 'Unknown')
+
+def pack_body(text):
+    """
+    Turn a body into the fields stored in a log entry.
+
+    Args:
+        text (str): The input or output text
+
+    Returns:
+        dict: Either the inline text or a blob reference, plus the body length
+    """
+    if len(text) < BLOB_MIN_LENGTH:
+        return {'text': text, 'length': len(text)}
+    return {'blob': put_blob(text), 'length': len(text)}
+
+def unpack_body(body):
+    """
+    Restore a body stored by pack_body.
+
+    Args:
+        body (dict or str): The stored body, plain strings are returned as-is
+
+    Returns:
+        str: The original text
+    """
+    if isinstance(body, str):
+        return body
+    if 'blob' in body:
+        try:
+            return get_blob(body['blob'])
+        except (OSError, zlib.error) as e:
+            print(f"Error reading history blob {body['blob']}: {str(e)}")
+            return ''
+    return body.get('text', '')
@@ -0,0 +1,175 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from selit.events import event_bus
+
+# Jobs that may run at the same time; the rest wait in the queue
+JOB_WORKERS = 2
+
+# Seconds finished jobs stay available, so reloading a page picks up their result
+JOB_RESULT_TTL = 600
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+FINISHED_STATES = (DONE, FAILED)
+
+_current_job = threading.local()
+
+
+class Job:
+    """A unit of background work and its outcome."""
+
+    def __init__(self, key=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self):
+        """Describe the job for API responses."""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+
+def get_job_topic(job_id):
+    """Get the event bus topic on which a job's updates are published."""
+    return f"job:{job_id}"
+
+def report_progress(message):
+    """
+    Update the progress message of the job running in the current thread.
+
+    Does nothing outside of a job, so job functions can be called directly too.
+
+    Args:
+        message (str): A short description of the current step
+    """
+    job = getattr(_current_job, 'job', None)
+    runner = getattr(_current_job, 'runner', None)
+    if job is not None:
+        job.progress = message
+        runner._publish(job)
+
+
+class JobRunner:
+    """
+    Runs slow work such as AI calls on a bounded thread pool.
+
+    Submitting returns at once with a job whose status can be polled or followed
+    on the event bus. Jobs submitted with the same key while one is queued,
+    running or recently finished share that job instead of starting another.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, result_ttl=JOB_RESULT_TTL):
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='selit-job')
+        self._jobs = {}
+        self._jobs_by_key = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, key=None, reuse_finished=True, **kwargs):
+        """
+        Run a function in the background.
+
+        Args:
+            fn (callable): The work; its return value becomes the job result
+            key (str): Identifies equivalent work, to share one job between callers
+            reuse_finished (bool): Also share a job with the same key that already finished successfully
+            *args, **kwargs: Passed to fn
+
+        Returns:
+            Job: The new or shared job
+        """
+        with self._lock:
+            self._expire()
+
+            existing = self._jobs_by_key.get(key) if key is not None else None
+            if existing is not None and (not existing.finished or (reuse_finished and existing.status == DONE)):
+                return existing
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._jobs_by_key[key] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """
+        Get a job by its id.
+
+        Returns:
+            Job: The job, or None if it is unknown or expired
+        """
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def count(self, status):
+        """
+        Count the jobs in a state, e.g. QUEUED for the number waiting for a worker.
+
+        Returns:
+            int: Number of jobs
+        """
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def _run(self, job, fn, args, kwargs):
+        """Run a job in a worker thread and record its outcome."""
+        job.status = RUNNING
+        self._publish(job)
+
+        _current_job.job = job
+        _current_job.runner = self
+        try:
+            result, error, status = fn(*args, **kwargs), None, DONE
+        except Exception as e:
+            result, error, status = None, str(e), FAILED
+        finally:
+            _current_job.job = None
+            _current_job.runner = None
+
+        # The status goes last: other threads treat a finished job as having its outcome and finish time
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.status = status
+        self._publish(job)
+
+    def _publish(self, job):
+        """Announce a change of a job's status or progress."""
+        event_bus.publish(get_job_topic(job.id), job.to_dict())
+
+    def _expire(self):
+        """Forget jobs that finished longer ago than the TTL. Must be called with the lock held."""
+        cutoff = time.time() - self.result_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                if self._jobs_by_key.get(job.key) is job:
+                    del self._jobs_by_key[job.key]
+
+
+# Shared by the web UI
+job_runner = JobRunner()
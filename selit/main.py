@@ -1,14 +1,22 @@
 import os
+import sys
 import time
-import pyperclip
+import datetime
 import platform
-import requests
 import json
 import argparse
-
-from selit.utils import get_window_info
-from selit.notification import notification
-from selit.history_logger import log_call, get_app_data_dir
+import sqlite3
+import tempfile
+import threading
+
+# Only what every command needs is imported here. HTTP, clipboard, window and
+# process modules are imported by the code that uses them, so commands such as
+# 'selit config show' start without loading requests, pyperclip or psutil.
+from selit.workdir import get_app_data_dir
+from selit.events import event_bus, CONFIG_TOPIC
+from selit.prompt_store import PromptStore, get_prompt_store_path
+from selit import metrics
+from selit.tracing import span, traced
 
 class ClipboardMonitor:
     def __init__(self, log_callback):
@@ -17,9 +25,23 @@ class ClipboardMonitor:
         self.running = True
         self.monitor_thread = None
 
+    @traced()
     def get_active_window_info(self):
+        from selit import wayland, x11
+        from selit.utils import get_window_info
+
+        started = time.perf_counter()
         try:
+            # The focus tracker keeps the current window in memory, no lookup needed
+            tracker = wayland.get_focus_tracker() or x11.get_focus_tracker()
+            if tracker:
+                window_info = tracker.get_snapshot()
+                if window_info:
+                    metrics.window_lookup_seconds.observe(time.perf_counter() - started, source='tracker')
+                    return window_info
+            
             window_info = get_window_info(get_active_only=True)
+            metrics.window_lookup_seconds.observe(time.perf_counter() - started, source='lookup')
             if window_info:
                 return window_info
             
@@ -40,67 +62,96 @@ class ClipboardMonitor:
 
     def monitor_clipboard(self):
         """Monitor the clipboard for changes."""
+        import pyperclip
+        from selit import wayland, x11
+        from selit.profiling import event_profiler
+
         print("Clipboard monitor started. Press Ctrl+C to stop.")
+        event_profiler.arm_from_environment()
+        if platform.system() == 'Linux':
+            # Under sway or Hyprland the compositor knows every window, X only the XWayland ones
+            if not wayland.start_focus_tracker():
+                x11.start_focus_tracker()
+        metrics.monitor_running.set(1)
         try:
             while self.running:
                 try:
-                    current_clipboard = pyperclip.paste()
+                    with metrics.clipboard_read_seconds.time():
+                        current_clipboard = pyperclip.paste()
                     if current_clipboard != self.previous_clipboard and current_clipboard.strip():
-                        window_info = self.get_active_window_info()
+                        with span('monitor_clipboard'), event_profiler.event('clipboard'):
+                            window_info = self.get_active_window_info()
 
-                        current_clipboard = self.log_callback(window_info, current_clipboard)
-                        pyperclip.copy(current_clipboard)
+                            current_clipboard = self.log_callback(window_info, current_clipboard)
+                            with metrics.paste_back_seconds.time():
+                                pyperclip.copy(current_clipboard)
 
                         self.previous_clipboard = current_clipboard
                 
                 except Exception as e:
+                    metrics.skipped_events_total.inc(reason='error')
                     self.log_callback({"error": str(e)}, "Error monitoring clipboard")
                 
                 time.sleep(0.1)
         except KeyboardInterrupt:
             print("\nClipboard monitor stopped.")
+        finally:
+            metrics.monitor_running.set(0)
 
 
 class PromptManager:
     def __init__(self, prompts_file=None):
         self.prompts_file = prompts_file or get_prompts_path()
-        self.prompts = self._load_prompts()
-        self.config_manager = ConfigManager()
-        # Add a section for keyword-triggered prompts (works across all windows)
-        self.keyword_triggers = self.prompts.get('keyword_triggers', {})
-        if 'keyword_triggers' not in self.prompts:
-            self.prompts['keyword_triggers'] = {}
-
-    def _load_prompts(self):
-        """Load prompts from the JSON file."""
-        try:
-            if os.path.exists(self.prompts_file):
-                with open(self.prompts_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                # If prompts.json exists in current directory, migrate it
-                local_prompts = 'prompts.json'
-                if os.path.exists(local_prompts):
-                    print(f"Migrating prompts from {local_prompts} to {self.prompts_file}")
-                    with open(local_prompts, 'r', encoding='utf-8') as f:
-                        prompts = json.load(f)
-                    with open(self.prompts_file, 'w', encoding='utf-8') as f:
-                        json.dump(prompts, f, ensure_ascii=False, indent=2)
-                    return prompts
-                return {}
-        except Exception as e:
-            print(f"Error loading prompts: {str(e)}")
-            return {}
-
-    def _save_prompts(self):
-        """Save prompts to the JSON file."""
-        try:
-            with open(self.prompts_file, 'w', encoding='utf-8') as f:
-                json.dump(self.prompts, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"Error saving prompts: {str(e)}")
-            return False
+        self._migrated_from = None
+        self.store = PromptStore(self.prompts_file, seed=self._load_json_prompts)
+        if self._migrated_from == get_json_prompts_path():
+            # Keep the old file as a backup, under a name that is not read again
+            os.replace(self._migrated_from, f"{self._migrated_from}.migrated")
+        self.config_manager = get_config_manager()
+        self._data_version = None
+        self._prompts = {'keyword_triggers': {}}
+        self._identifiers_by_length = None
+
+    def _load_json_prompts(self):
+        """Load the prompts of the JSON file used before the database, to migrate them."""
+        # The app data directory first, then prompts.json in the current directory
+        for json_file in (get_json_prompts_path(), 'prompts.json'):
+            if not os.path.exists(json_file):
+                continue
+            try:
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    prompts = json.load(f)
+            except Exception as e:
+                print(f"Error loading prompts: {str(e)}")
+                return None
+            print(f"Migrating prompts from {json_file} to {self.prompts_file}")
+            self._migrated_from = json_file
+            return prompts
+        return None
+
+    def _refresh(self):
+        """Reload the prompts if another process or manager changed them."""
+        data_version = self.store.get_data_version()
+        if data_version == self._data_version:
+            return
+        window_prompts, keyword_triggers = self.store.load()
+        prompts = dict(window_prompts)
+        # Same layout as the old prompts.json, with the keyword triggers in their own section
+        prompts['keyword_triggers'] = {keyword: {'prompt': prompt} for keyword, prompt in keyword_triggers.items()}
+        self._prompts = prompts
+        self._identifiers_by_length = None
+        self._data_version = data_version
+
+    @property
+    def prompts(self):
+        """Window identifier -> prompt, plus the keyword triggers under 'keyword_triggers'."""
+        self._refresh()
+        return self._prompts
+
+    @property
+    def keyword_triggers(self):
+        """Keyword -> {'prompt': prompt} of the prompts that work in all windows."""
+        return self.prompts['keyword_triggers']
 
     def list_prompts(self):
         """List all available prompts."""
@@ -129,56 +180,77 @@ class PromptManager:
 
     def add_prompt(self, window_identifier, prompt_text):
         """Add or update a prompt."""
-        self.prompts[window_identifier] = prompt_text
-        if self._save_prompts():
-            print(f"Prompt for '{window_identifier}' added successfully.")
-            return True
-        return False
+        if window_identifier == 'keyword_triggers':
+            print("'keyword_triggers' is reserved and cannot be used as a window identifier.")
+            return False
+        prompts = self.prompts
+        try:
+            self.store.set_window_prompt(window_identifier, prompt_text)
+        except sqlite3.Error as e:
+            print(f"Error saving prompts: {str(e)}")
+            return False
+        if window_identifier not in prompts:
+            self._identifiers_by_length = None
+        prompts[window_identifier] = prompt_text
+        print(f"Prompt for '{window_identifier}' added successfully.")
+        return True
     
     def add_keyword_trigger(self, keyword, prompt_text):
         """Add or update a keyword trigger prompt that works in all windows."""
-        if 'keyword_triggers' not in self.prompts:
-            self.prompts['keyword_triggers'] = {}
-        
-        self.prompts['keyword_triggers'][keyword] = {
+        keyword_triggers = self.keyword_triggers
+        try:
+            self.store.set_keyword_trigger(keyword, prompt_text)
+        except sqlite3.Error as e:
+            print(f"Error saving prompts: {str(e)}")
+            return False
+        keyword_triggers[keyword] = {
             'prompt': prompt_text
         }
-        self.keyword_triggers = self.prompts['keyword_triggers']
-        
-        if self._save_prompts():
-            print(f"Keyword trigger '{keyword}' added successfully.")
-            return True
-        return False
+        print(f"Keyword trigger '{keyword}' added successfully.")
+        return True
 
     def remove_prompt(self, window_identifier):
         """Remove a prompt."""
-        if window_identifier in self.prompts:
-            del self.prompts[window_identifier]
-            if self._save_prompts():
-                print(f"Prompt for '{window_identifier}' removed successfully.")
-                return True
+        prompts = self.prompts
+        if window_identifier != 'keyword_triggers' and window_identifier in prompts:
+            try:
+                self.store.delete_window_prompt(window_identifier)
+            except sqlite3.Error as e:
+                print(f"Error saving prompts: {str(e)}")
+                return False
+            del prompts[window_identifier]
+            self._identifiers_by_length = None
+            print(f"Prompt for '{window_identifier}' removed successfully.")
+            return True
         else:
             print(f"No prompt found for '{window_identifier}'.")
         return False
     
     def remove_keyword_trigger(self, keyword):
         """Remove a keyword trigger."""
-        if 'keyword_triggers' in self.prompts and keyword in self.prompts['keyword_triggers']:
-            del self.prompts['keyword_triggers'][keyword]
-            self.keyword_triggers = self.prompts['keyword_triggers']
-            if self._save_prompts():
-                print(f"Keyword trigger '{keyword}' removed successfully.")
-                return True
+        keyword_triggers = self.keyword_triggers
+        if keyword in keyword_triggers:
+            try:
+                self.store.delete_keyword_trigger(keyword)
+            except sqlite3.Error as e:
+                print(f"Error saving prompts: {str(e)}")
+                return False
+            del keyword_triggers[keyword]
+            print(f"Keyword trigger '{keyword}' removed successfully.")
+            return True
         else:
             print(f"No keyword trigger found for '{keyword}'.")
         return False
 
     def get_prompt_for_window(self, window_info):
         """Get the appropriate prompt for the current window."""
-        for key in sorted(self.prompts, key=lambda k: -len(k)):
-            # Skip the keyword_triggers section when checking for window matches
-            if key != 'keyword_triggers' and (key in window_info['title'] or key in window_info['process_name']):
-                return self.prompts[key]
+        prompts = self.prompts
+        if self._identifiers_by_length is None:
+            # Longest identifiers first, so the most specific match wins; sorted once per change
+            self._identifiers_by_length = sorted((key for key in prompts if key != 'keyword_triggers'), key=lambda k: -len(k))
+        for key in self._identifiers_by_length:
+            if key in window_info['title'] or key in window_info['process_name']:
+                return prompts[key]
         # If no prompt matches, return the default prompt from configuration
         return self.config_manager.get_default_prompt()
     
@@ -208,11 +280,46 @@ class ConfigManager:
         "Output only the corrected text; "
         "do not provide any analysis or additional information.\n{text}"
     )
+
+    ai_services = ("gemini", "openai", "deepseek")
+
+    # Settings that can be changed through update()
+    settings = (
+        "api_key", "openai_api_key", "openai_model", "deepseek_api_key",
+        "deepseek_model", "ai_service", "trigger_word", "default_prompt"
+    )
     
     def __init__(self, config_file=None):
         self.config_file = config_file or get_config_path()
         self.config = self._load_config()
 
+    def _get_file_signature(self):
+        """Identify the saved version of the file; it is replaced on every save, which changes it."""
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @property
+    def config(self):
+        """The settings, re-read when the file was saved by another manager or process since."""
+        signature = self._get_file_signature()
+        if signature is not None and signature != self._signature:
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    self._config = json.load(f)
+                self._signature = signature
+            except (OSError, ValueError):
+                # Keep the settings already read
+                pass
+        return self._config
+
+    @config.setter
+    def config(self, config):
+        self._config = config
+        self._signature = self._get_file_signature()
+
     def _load_config(self):
         """Load configuration from the JSON file."""
         try:
@@ -226,8 +333,7 @@ class ConfigManager:
                     print(f"Migrating configuration from {local_config} to {self.config_file}")
                     with open(local_config, 'r', encoding='utf-8') as f:
                         config = json.load(f)
-                    with open(self.config_file, 'w', encoding='utf-8') as f:
-                        json.dump(config, f, indent=2)
+                    write_json_atomic(self.config_file, config)
                     return config
                 
                 # Create default config if file doesn't exist
@@ -241,8 +347,7 @@ class ConfigManager:
                     "deepseek_api_key": "",
                     "deepseek_model": "deepseek-chat"  # default model
                 }
-                with open(self.config_file, 'w', encoding='utf-8') as f:
-                    json.dump(default_config, f, indent=2)
+                write_json_atomic(self.config_file, default_config)
                 return default_config
         except Exception as e:
             print(f"Error loading configuration: {str(e)}")
@@ -251,21 +356,82 @@ class ConfigManager:
     def _save_config(self):
         """Save configuration to the JSON file."""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2)
+            write_json_atomic(self.config_file, self.config)
             return True
         except Exception as e:
             print(f"Error saving configuration: {str(e)}")
             return False
 
+    def validate(self, changes):
+        """
+        Check settings before they are applied.
+
+        Args:
+            changes (dict): Setting name -> new value
+
+        Returns:
+            list: Error messages, empty if all changes are valid
+        """
+        errors = []
+        for key, value in changes.items():
+            if key not in self.settings:
+                errors.append(f"Unknown setting: {key}")
+            elif not isinstance(value, str):
+                errors.append(f"Invalid value for {key}: must be text.")
+            elif key == "ai_service" and value not in self.ai_services:
+                errors.append(f"Invalid AI service: {value}. Must be 'gemini', 'openai', or 'deepseek'.")
+            elif key in ("trigger_word", "default_prompt") and not value.strip():
+                errors.append(f"Invalid value for {key}: must not be empty.")
+        return errors
+
+    def update(self, **changes):
+        """
+        Change several settings in one transaction.
+
+        Every change is validated first, and nothing is applied if one is invalid.
+        The file is re-read, so changes saved meanwhile by another process are kept,
+        then written once through a temporary file that replaces it, and subscribers
+        of CONFIG_TOPIC on the event bus are notified once.
+
+        Args:
+            **changes: Setting name -> new value, e.g. ai_service="openai"
+
+        Returns:
+            bool: True if the configuration is saved with the changes
+        """
+        errors = self.validate(changes)
+        if errors:
+            for error in errors:
+                print(error)
+            return False
+
+        try:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            config = dict(self.config)
+
+        changed = sorted(key for key, value in changes.items() if config.get(key) != value)
+        config.update(changes)
+        if changed:
+            try:
+                write_json_atomic(self.config_file, config)
+            except Exception as e:
+                print(f"Error saving configuration: {str(e)}")
+                return False
+        self.config = config
+
+        if changed:
+            event_bus.publish(CONFIG_TOPIC, {"config_file": self.config_file, "changed": changed})
+        return True
+
     def get_api_key(self):
         """Get the API key from configuration."""
         return self.config.get("api_key", "")
 
     def set_api_key(self, api_key):
         """Set the API key in configuration."""
-        self.config["api_key"] = api_key
-        if self._save_config():
+        if self.update(api_key=api_key):
             print(f"API key updated successfully.")
             return True
         return False
@@ -276,8 +442,7 @@ class ConfigManager:
 
     def set_openai_api_key(self, api_key):
         """Set the OpenAI API key in configuration."""
-        self.config["openai_api_key"] = api_key
-        if self._save_config():
+        if self.update(openai_api_key=api_key):
             print(f"OpenAI API key updated successfully.")
             return True
         return False
@@ -288,8 +453,7 @@ class ConfigManager:
 
     def set_openai_model(self, model):
         """Set the OpenAI model in configuration."""
-        self.config["openai_model"] = model
-        if self._save_config():
+        if self.update(openai_model=model):
             print(f"OpenAI model updated to '{model}' successfully.")
             return True
         return False
@@ -300,8 +464,7 @@ class ConfigManager:
 
     def set_deepseek_api_key(self, api_key):
         """Set the DeepSeek API key in configuration."""
-        self.config["deepseek_api_key"] = api_key
-        if self._save_config():
+        if self.update(deepseek_api_key=api_key):
             print(f"DeepSeek API key updated successfully.")
             return True
         return False
@@ -312,8 +475,7 @@ class ConfigManager:
 
     def set_deepseek_model(self, model):
         """Set the DeepSeek model in configuration."""
-        self.config["deepseek_model"] = model
-        if self._save_config():
+        if self.update(deepseek_model=model):
             print(f"DeepSeek model updated to '{model}' successfully.")
             return True
         return False
@@ -324,12 +486,7 @@ class ConfigManager:
 
     def set_ai_service(self, service):
         """Set the AI service to use (gemini, openai, or deepseek)."""
-        if service not in ["gemini", "openai", "deepseek"]:
-            print(f"Invalid AI service: {service}. Must be 'gemini', 'openai', or 'deepseek'.")
-            return False
-
-        self.config["ai_service"] = service
-        if self._save_config():
+        if self.update(ai_service=service):
             print(f"AI service updated to '{service}' successfully.")
             return True
         return False
@@ -340,8 +497,7 @@ class ConfigManager:
         
     def set_trigger_word(self, trigger_word):
         """Set the trigger word in configuration."""
-        self.config["trigger_word"] = trigger_word
-        if self._save_config():
+        if self.update(trigger_word=trigger_word):
             print(f"Trigger word updated to '{trigger_word}' successfully.")
             return True
         return False
@@ -352,8 +508,7 @@ class ConfigManager:
         
     def set_default_prompt(self, default_prompt):
         """Set the default prompt in configuration."""
-        self.config["default_prompt"] = default_prompt
-        if self._save_config():
+        if self.update(default_prompt=default_prompt):
             print(f"Default prompt updated successfully.")
             return True
         return False
@@ -389,14 +544,39 @@ class ConfigManager:
         print(f"Prompts Location: {get_prompts_path()}")
         print("-" * 50)
 
+# Managers shared by the clipboard monitor and the web interface, created on first use
+_config_manager = None
+_prompt_manager = None
+# Reentrant, the prompt manager gets the config manager while it is created
+_managers_lock = threading.RLock()
+
+def get_config_manager():
+    """Get the configuration manager shared within this process."""
+    global _config_manager
+    if _config_manager is None:
+        with _managers_lock:
+            if _config_manager is None:
+                _config_manager = ConfigManager()
+    return _config_manager
+
+def get_prompt_manager():
+    """Get the prompt manager shared within this process, it reloads the prompts only after a change."""
+    global _prompt_manager
+    if _prompt_manager is None:
+        with _managers_lock:
+            if _prompt_manager is None:
+                _prompt_manager = PromptManager()
+    return _prompt_manager
+
 class GeminiAPI:
     def __init__(self):
-        config_manager = ConfigManager()
+        config_manager = get_config_manager()
         self.api_key = config_manager.get_api_key()
         if not self.api_key:
             print("Warning: API key not configured. Please set it using 'selit config api-key YOUR_API_KEY'")
         
-        self.url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={self.api_key}"
+        self.model = "gemini-2.0-flash"
+        self.url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={self.api_key}"
         self.headers = {
             'Content-Type': 'application/json'
         }
@@ -414,36 +594,70 @@ class GeminiAPI:
                 }]
             }
 
-            response = requests.post(
-                self.url, 
-                headers=self.headers, 
-                data=json.dumps(data, ensure_ascii=True)
-            )
+            import requests
+
+            with span('generate_text', provider='gemini', model=self.model), \
+                    metrics.provider_request_seconds.time(provider='gemini', model=self.model):
+                response = requests.post(
+                    self.url, 
+                    headers=self.headers, 
+                    data=json.dumps(data, ensure_ascii=True)
+                )
 
             if response.status_code == 200:
                 result = response.json()
                 return result['candidates'][0]['content']['parts'][0]['text']
             else:
+                metrics.provider_errors_total.inc(provider='gemini', model=self.model)
                 print(f"API Error: {response.status_code} - {response.text}")
                 return None
         except Exception as e:
+            metrics.provider_errors_total.inc(provider='gemini', model=self.model)
             print(f"Exception in Gemini API call: {str(e)}")
             return None
 
 
+def write_json_atomic(path, data):
+    """
+    Write JSON so that the file holds either its old or its new content, never a part.
+
+    The data goes to a temporary file in the same directory, which is flushed to
+    disk and then renamed over the target.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def get_config_path():
     """Get the path to the config file."""
     return os.path.join(get_app_data_dir(), 'config.json')
 
 
 def get_prompts_path():
-    """Get the path to the prompts file."""
+    """Get the path to the prompts database."""
+    return get_prompt_store_path()
+
+
+def get_json_prompts_path():
+    """Get the path of the JSON prompts file, migrated to the database on first use."""
     return os.path.join(get_app_data_dir(), 'prompts.json')
 
 
 class OpenAIAPI:
     def __init__(self):
-        config_manager = ConfigManager()
+        config_manager = get_config_manager()
         self.api_key = config_manager.get_openai_api_key()
         self.model = config_manager.get_openai_model()
 
@@ -471,26 +685,32 @@ class OpenAIAPI:
                 "temperature": 0.7
             }
 
-            response = requests.post(
-                self.url,
-                headers=self.headers,
-                data=json.dumps(data)
-            )
+            import requests
+
+            with span('generate_text', provider='openai', model=self.model), \
+                    metrics.provider_request_seconds.time(provider='openai', model=self.model):
+                response = requests.post(
+                    self.url,
+                    headers=self.headers,
+                    data=json.dumps(data)
+                )
 
             if response.status_code == 200:
                 result = response.json()
                 return result['choices'][0]['message']['content']
             else:
+                metrics.provider_errors_total.inc(provider='openai', model=self.model)
                 print(f"API Error: {response.status_code} - {response.text}")
                 return None
         except Exception as e:
+            metrics.provider_errors_total.inc(provider='openai', model=self.model)
             print(f"Exception in OpenAI API call: {str(e)}")
             return None
 
 
 class DeepSeekAPI:
     def __init__(self):
-        config_manager = ConfigManager()
+        config_manager = get_config_manager()
         self.api_key = config_manager.get_deepseek_api_key()
         self.model = config_manager.get_deepseek_model()
 
@@ -518,33 +738,45 @@ class DeepSeekAPI:
                 "temperature": 0.7
             }
 
-            response = requests.post(
-                self.url,
-                headers=self.headers,
-                data=json.dumps(data)
-            )
+            import requests
+
+            with span('generate_text', provider='deepseek', model=self.model), \
+                    metrics.provider_request_seconds.time(provider='deepseek', model=self.model):
+                response = requests.post(
+                    self.url,
+                    headers=self.headers,
+                    data=json.dumps(data)
+                )
 
             if response.status_code == 200:
                 result = response.json()
                 return result['choices'][0]['message']['content']
             else:
+                metrics.provider_errors_total.inc(provider='deepseek', model=self.model)
                 print(f"API Error: {response.status_code} - {response.text}")
                 return None
         except Exception as e:
+            metrics.provider_errors_total.inc(provider='deepseek', model=self.model)
             print(f"Exception in DeepSeek API call: {str(e)}")
             return None
 
 
+@traced()
 def process_call(window_info, current_clipboard):
     """Process clipboard content using the selected AI API."""
     print(f"Processing clipboard from {window_info['process_name']} - {window_info['title']}")
 
-    config_manager = ConfigManager()
+    config_manager = get_config_manager()
     trigger_word = config_manager.get_trigger_word()
-    prompt_manager = PromptManager()
+    prompt_manager = get_prompt_manager()
+    
+    with metrics.trigger_match_seconds.time():
+        has_trigger_word = trigger_word in current_clipboard
+        keyword, keyword_prompt = (None, None) if has_trigger_word else prompt_manager.find_keyword_trigger(current_clipboard)
     
     # Check for trigger word
-    if trigger_word in current_clipboard:
+    if has_trigger_word:
+        metrics.triggers_total.inc(kind='trigger_word')
         original_input = current_clipboard
         current_clipboard = current_clipboard.replace(trigger_word, "")
         # Get window-specific prompt or default
@@ -552,17 +784,22 @@ def process_call(window_info, current_clipboard):
         return process_with_prompt(window_info, current_clipboard, original_input, prompt, trigger_word)
     
     # Check for keyword triggers
-    keyword, keyword_prompt = prompt_manager.find_keyword_trigger(current_clipboard)
     if keyword and keyword_prompt:
+        metrics.triggers_total.inc(kind='keyword')
         original_input = current_clipboard
         current_clipboard = current_clipboard.replace(keyword, "")
         return process_with_prompt(window_info, current_clipboard, original_input, keyword_prompt, keyword)
     
     # No triggers found
+    metrics.skipped_events_total.inc(reason='no_trigger')
     return current_clipboard
 
+@traced()
 def process_with_prompt(window_info, text, original_input, prompt, trigger_word):
     """Process text with a specific prompt using the configured AI service."""
+    from selit.notification import notification
+    from selit.history_logger import log_call
+
     print('Start processing')
     try:
         if isinstance(text, str):
@@ -578,7 +815,7 @@ def process_with_prompt(window_info, text, original_input, prompt, trigger_word)
 
         print(prompt_text)
 
-        config_manager = ConfigManager()
+        config_manager = get_config_manager()
         ai_service = config_manager.get_ai_service()
 
         if ai_service == "gemini":
@@ -611,6 +848,35 @@ def monitor_command():
     monitor.monitor_clipboard()
 
 
+def export_history_command(args):
+    """Stream the call history of a date range to a file or stdout."""
+    from selit.history_logger import export_history
+
+    today = datetime.datetime.now().date()
+    start_date = args.start or today
+    end_date = args.end or today
+    if end_date < start_date:
+        print("Error: --end must not be before --start")
+        return
+
+    chunks = export_history(
+        args.format, start_date, end_date,
+        app=args.app,
+        trigger=args.trigger,
+        start_time=args.start_time,
+        end_time=args.end_time
+    )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        print(f"History exported to {args.output}")
+    else:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(description="SeLit - Select it! A clipboard monitoring tool to process copied text with AI model assistance")
@@ -683,9 +949,31 @@ def main():
     prompts_remove_keyword_trigger = prompts_subparsers.add_parser("remove-keyword-trigger", help="Remove a keyword trigger prompt")
     prompts_remove_keyword_trigger.add_argument("keyword", help="The keyword to remove")
 
+    # History command
+    history_parser = subparsers.add_parser("history", help="Work with the call history")
+    history_subparsers = history_parser.add_subparsers(dest="history_action", help="History action")
+
+    # History: export
+    history_export = history_subparsers.add_parser("export", help="Export call history as NDJSON or CSV")
+    history_export.add_argument("--format", choices=["ndjson", "csv"], default="ndjson", help="Output format (default: ndjson)")
+    history_export.add_argument("--start", type=datetime.date.fromisoformat, help="First day to export, YYYY-MM-DD (default: today)")
+    history_export.add_argument("--end", type=datetime.date.fromisoformat, help="Last day to export, YYYY-MM-DD (default: today)")
+    history_export.add_argument("--app", help="Only export entries whose process name contains this text")
+    history_export.add_argument("--trigger", help="Only export entries triggered by this word")
+    history_export.add_argument("--from", dest="start_time", type=datetime.time.fromisoformat, help="Only export entries logged at or after this time of day, HH:MM")
+    history_export.add_argument("--to", dest="end_time", type=datetime.time.fromisoformat, help="Only export entries logged at or before this time of day, HH:MM")
+    history_export.add_argument("--output", "-o", help="File to write to (default: stdout)")
+
     # Web interface command
     web_parser = subparsers.add_parser("web", help="Start the web interface")
     web_parser.add_argument("--port", type=int, default=5000, help="Port to run the web interface on (default: 5000)")
+    web_parser.add_argument("--server", choices=["dev", "waitress"], default="dev", help="Flask development server or the multi-threaded waitress server (default: dev)")
+    web_parser.add_argument("--threads", type=int, default=8, help="Worker threads of the waitress server, 4 are kept for pages and the rest also serve live updates (default: 8)")
+    web_parser.add_argument("--timeout", type=int, default=120, help="Seconds waitress keeps an idle keep-alive or stalled connection open (default: 120)")
+    web_parser.add_argument("--connection-limit", type=int, default=100, help="Simultaneous connections waitress accepts (default: 100)")
+
+    # Static asset build
+    subparsers.add_parser("build-assets", help="Build the web interface's fingerprinted, precompressed CSS and JS")
 
     args = parser.parse_args()
     
@@ -729,12 +1017,24 @@ def main():
             prompt_manager.remove_keyword_trigger(args.keyword)
         else:
             prompt_manager.list_prompts()
+    elif args.command == "history":
+        if args.history_action == "export":
+            export_history_command(args)
+        else:
+            history_parser.print_help()
+    elif args.command == "build-assets":
+        from selit.assets import build_assets, DIST_DIR
+        manifest = build_assets()
+        for source, built_name in sorted(manifest.items()):
+            print(f"{source} -> {built_name}")
+        print(f"Built {len(manifest)} assets into {DIST_DIR}")
     elif args.command == "web":
         # Import web module here to avoid circular imports
         from selit.web import run_web_server
         print(f"Starting web interface at http://localhost:{args.port}")
         print("Press Ctrl+C to stop the server")
-        run_web_server(host="localhost", port=args.port, debug=False)
+        run_web_server(host="localhost", port=args.port, debug=False, server=args.server,
+                       threads=args.threads, timeout=args.timeout, connection_limit=args.connection_limit)
     else:
         parser.print_help()
 
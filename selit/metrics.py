@@ -0,0 +1,227 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Histogram bucket bounds in seconds, from in-memory lookups to slow AI calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value):
+    """Format a sample value the way Prometheus expects."""
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape_help(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+def _escape(text):
+    """Escape a label value."""
+    return _escape_help(text).replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    """Format label values as {name="value",...}, empty without labels."""
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    """A named metric with one value per combination of label values."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """Turn keyword label values into the key of a series, checking they match the declared labels."""
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} takes the labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _samples(self):
+        """Yield (suffix, label values, extra label, value) for each sample of the metric."""
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield '', key, None, value
+
+    def render(self):
+        """Render the metric in the Prometheus text format."""
+        lines = [
+            f'# HELP {self.name} {_escape_help(self.documentation)}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for suffix, key, extra, value in self._samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(self.label_names, key, extra)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up, such as a number of events."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down, such as a queue depth."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Read the value from a callable at every scrape instead; only for gauges without labels."""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            yield '', (), None, self._function()
+            return
+        yield from super()._samples()
+
+
+class Histogram(Metric):
+    """Counts observations, such as durations, into cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # The first bound the value fits under; past the last one it only counts towards +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block in seconds, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            values = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield '_bucket', key, ('le', _format_value(bound)), cumulative
+            yield '_sum', key, None, total
+            yield '_count', key, None, count
+
+
+class MetricsRegistry:
+    """The metrics of the process, rendered together for a scrape."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The scrape body
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(metric.render() + '\n' for metric in metrics)
+
+
+# Shared by the clipboard pipeline and the web UI running in the same process
+registry = MetricsRegistry()
+
+# Stages of the clipboard pipeline
+clipboard_read_seconds = registry.histogram(
+    'selit_clipboard_read_seconds', 'Time to read the clipboard contents.')
+window_lookup_seconds = registry.histogram(
+    'selit_window_lookup_seconds', 'Time to find the active window, by source (tracker or lookup).', ['source'])
+trigger_match_seconds = registry.histogram(
+    'selit_trigger_match_seconds', 'Time to match clipboard text against the trigger word and keyword triggers.')
+provider_request_seconds = registry.histogram(
+    'selit_provider_request_seconds', 'Duration of AI provider requests.', ['provider', 'model'])
+paste_back_seconds = registry.histogram(
+    'selit_paste_back_seconds', 'Time to write the result back to the clipboard.')
+history_write_seconds = registry.histogram(
+    'selit_history_write_seconds', 'Time to append a call to the history log.')
+
+triggers_total = registry.counter(
+    'selit_triggers_total', 'Clipboard changes that matched a trigger, by kind (trigger_word or keyword).', ['kind'])
+skipped_events_total = registry.counter(
+    'selit_skipped_events_total', 'Clipboard changes that were not processed, by reason.', ['reason'])
+provider_errors_total = registry.counter(
+    'selit_provider_errors_total', 'AI provider requests that failed or returned an error.', ['provider', 'model'])
+cache_hits_total = registry.counter(
+    'selit_cache_hits_total', 'Lookups served from a cache, by cache.', ['cache'])
+cache_misses_total = registry.counter(
+    'selit_cache_misses_total', 'Lookups a cache could not serve, by cache.', ['cache'])
+
+monitor_running = registry.gauge(
+    'selit_monitor_running', 'Whether the clipboard monitor loop is running (1) or not (0).')
+job_queue_depth = registry.gauge(
+    'selit_job_queue_depth', 'Background jobs waiting for a worker.')
+monitor_running.set(0)
@@ -3,6 +3,9 @@ import platform
 import os
 import threading
 
+from selit.tracing import traced
+
+@traced()
 def notification(title="SeLit", message="Text generated successfully"):
     """
     Display a desktop notification.
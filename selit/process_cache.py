@@ -0,0 +1,195 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+from selit.metrics import cache_hits_total, cache_misses_total
+
+# Upper bound on the number of processes remembered
+MAX_CACHED_PROCESSES = 2048
+
+# Seconds between sweeps that drop processes which have exited
+PRUNE_INTERVAL = 60.0
+
+# Threads used to read many processes at once
+PREFETCH_WORKERS = 8
+
+
+class ProcessInfoCache:
+    """
+    Remembers name, exe and command line of processes by (pid, create time).
+
+    Checking the create time on every lookup detects a PID that was reused by a
+    new process, so stale names are never returned. Entries are evicted least
+    recently used first, and processes that have exited are swept out regularly.
+    """
+
+    def __init__(self, max_size=MAX_CACHED_PROCESSES):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def get(self, pid):
+        """
+        Get the metadata of a process.
+
+        Args:
+            pid (int): The process id
+
+        Returns:
+            dict: 'pid', 'name', 'exe', 'cmdline' and 'create_time', or None if the
+                  process does not exist or cannot be inspected
+        """
+        if not pid:
+            return None
+
+        if time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+            self.prune()
+
+        try:
+            # Creating the handle reads the create time, which identifies the process
+            process = psutil.Process(pid)
+            create_time = process.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, ValueError):
+            with self._lock:
+                self._entries.pop(pid, None)
+            return None
+
+        with self._lock:
+            cached = self._entries.get(pid)
+            if cached is not None and cached['create_time'] == create_time:
+                self._entries.move_to_end(pid)
+                cache_hits_total.inc(cache='process')
+                return cached
+
+        cache_misses_total.inc(cache='process')
+        info = self._read(process, create_time)
+        if info is None:
+            return None
+
+        with self._lock:
+            self._entries[pid] = info
+            self._entries.move_to_end(pid)
+            self._evict()
+        return info
+
+    def get_name(self, pid, default="Unknown"):
+        """Get the name of a process, or a default if it cannot be found."""
+        info = self.get(pid)
+        return info['name'] if info else default
+
+    def prefetch(self, pids):
+        """
+        Look up several processes in parallel, filling the cache for later calls.
+
+        Reading /proc releases the GIL, so a cold enumeration of many windows is
+        spread across a few threads.
+
+        Args:
+            pids (iterable): Process ids to look up; duplicates are read once
+        """
+        pids = {pid for pid in pids if pid}
+        if len(pids) <= 1:
+            for pid in pids:
+                self.get(pid)
+            return
+
+        with ThreadPoolExecutor(max_workers=min(PREFETCH_WORKERS, len(pids))) as executor:
+            list(executor.map(self.get, pids))
+
+    def prune(self):
+        """Drop entries of processes that have exited or whose PID was reused."""
+        with self._lock:
+            entries = list(self._entries.items())
+
+        stale = []
+        for pid, info in entries:
+            try:
+                if psutil.Process(pid).create_time() != info['create_time']:
+                    stale.append(pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, ValueError):
+                stale.append(pid)
+
+        with self._lock:
+            for pid in stale:
+                self._entries.pop(pid, None)
+            self._last_prune = time.monotonic()
+
+    def clear(self):
+        """Forget every cached process."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _read(self, process, create_time):
+        """Read the metadata of a process in one pass."""
+        try:
+            with process.oneshot():
+                name = process.name()
+                try:
+                    exe = process.exe()
+                except (psutil.AccessDenied, psutil.ZombieProcess):
+                    exe = ""
+                try:
+                    cmdline = process.cmdline()
+                except (psutil.AccessDenied, psutil.ZombieProcess):
+                    cmdline = []
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+        return {
+            'pid': process.pid,
+            'name': name,
+            'exe': exe,
+            'cmdline': cmdline,
+            'create_time': create_time,
+        }
+
+    def _evict(self):
+        """Drop least recently used entries beyond the size limit. Must be called with the lock held."""
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+# Shared by every window lookup backend
+process_cache = ProcessInfoCache()
+
+
+def get_process_info(pid):
+    """
+    Get cached metadata of a process.
+
+    Args:
+        pid (int): The process id
+
+    Returns:
+        dict: 'pid', 'name', 'exe', 'cmdline' and 'create_time', or None if not available
+    """
+    return process_cache.get(pid)
+
+def prefetch_processes(pids):
+    """
+    Fill the cache for several processes at once.
+
+    Args:
+        pids (iterable): Process ids to look up
+    """
+    process_cache.prefetch(pids)
+
+def get_process_name(pid, default="Unknown"):
+    """
+    Get the cached name of a process.
+
+    Args:
+        pid (int): The process id
+        default (str): Returned when the process cannot be found
+
+    Returns:
+        str: The process name
+    """
+    return process_cache.get_name(pid, default)
@@ -0,0 +1,160 @@
+import io
+import os
+import pstats
+import cProfile
+import datetime
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from selit.workdir import get_app_data_dir
+
+# Profile the next N clipboard events, e.g. SELIT_PROFILE=5 selit monitor
+PROFILE_ENVIRONMENT_VARIABLE = 'SELIT_PROFILE'
+
+# Frames kept per allocation, and lines in each part of the report
+TRACEMALLOC_FRAMES = 10
+REPORT_TOP = 40
+
+
+def get_profile_dir():
+    """Get or create the directory holding profile reports."""
+    profile_dir = os.path.join(get_app_data_dir(), 'profiles')
+    os.makedirs(profile_dir, exist_ok=True)
+    return profile_dir
+
+def list_profiles():
+    """
+    List the profile reports, newest first.
+
+    Returns:
+        list: Report file names below the profile directory
+    """
+    names = [name for name in os.listdir(get_profile_dir()) if name.endswith('.txt')]
+    return sorted(names, reverse=True)
+
+
+class EventProfiler:
+    """
+    Profiles the next N events with cProfile and tracemalloc, then writes a report.
+
+    Nothing is measured until it is armed, so it costs nothing in normal use.
+    The report combines the CPU profile of all profiled events, sorted by
+    cumulative time, with the allocations they left behind; the raw cProfile
+    data is saved next to it for pstats or snakeviz.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._total = 0
+        self._profile = None
+        self._snapshot = None
+        self.last_report = None
+
+    def arm(self, events):
+        """
+        Profile the next events.
+
+        Args:
+            events (int): Number of events to profile, 0 to cancel
+        """
+        with self._lock:
+            self._remaining = max(0, events)
+            self._total = self._remaining
+            self._profile = cProfile.Profile() if events > 0 else None
+            self._snapshot = None
+
+    def arm_from_environment(self):
+        """Arm with the event count from SELIT_PROFILE, if it is set."""
+        try:
+            events = int(os.environ.get(PROFILE_ENVIRONMENT_VARIABLE, '0'))
+        except ValueError:
+            print(f"Ignoring {PROFILE_ENVIRONMENT_VARIABLE}, it must be a number of events")
+            return
+        if events > 0:
+            print(f"Profiling the next {events} clipboard events")
+            self.arm(events)
+
+    @property
+    def remaining(self):
+        return self._remaining
+
+    @contextmanager
+    def event(self, name='event'):
+        """
+        Run one event, profiling it if the profiler is armed.
+
+        Args:
+            name (str): What is being profiled, used in the report name
+        """
+        with self._lock:
+            profile = self._profile if self._remaining > 0 else None
+        if profile is None:
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        baseline = tracemalloc.take_snapshot()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            self._finish_event(profile, snapshot.compare_to(baseline, 'lineno'), name)
+
+    def _finish_event(self, profile, allocations, name):
+        """Count a profiled event, writing the report after the last one."""
+        with self._lock:
+            if profile is not self._profile:
+                return
+            # Allocation differences of all events, added up
+            if self._snapshot is None:
+                self._snapshot = {}
+            for stat in allocations:
+                key = str(stat.traceback)
+                size, count = self._snapshot.get(key, (0, 0))
+                self._snapshot[key] = (size + stat.size_diff, count + stat.count_diff)
+            self._remaining -= 1
+            if self._remaining > 0:
+                return
+            total, allocation_totals = self._total, self._snapshot
+            self._profile = None
+            self._snapshot = None
+
+        try:
+            self.last_report = self._write_report(profile, allocation_totals, name, total)
+            print(f"Profile written to {self.last_report}")
+        except OSError as e:
+            print(f"Error writing profile: {str(e)}")
+
+    def _write_report(self, profile, allocations, name, events):
+        """Write the text report and the raw cProfile data, returning the report path."""
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        base = os.path.join(get_profile_dir(), f'{stamp}-{name}')
+        profile.dump_stats(f'{base}.prof')
+
+        out = io.StringIO()
+        out.write(f"Profile of {events} {name} event(s), {datetime.datetime.now().isoformat()}\n\n")
+        out.write("CPU time (cProfile, by cumulative time)\n")
+        out.write("=" * 50 + "\n")
+        pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(REPORT_TOP)
+
+        out.write("\nMemory allocated and not freed (tracemalloc, by size)\n")
+        out.write("=" * 50 + "\n")
+        top = sorted(allocations.items(), key=lambda item: -abs(item[1][0]))[:REPORT_TOP]
+        for location, (size, count) in top:
+            out.write(f"{size / 1024:+10.1f} KiB {count:+8d} blocks  {location}\n")
+
+        with open(f'{base}.txt', 'w', encoding='utf-8') as f:
+            f.write(out.getvalue())
+        return f'{base}.txt'
+
+
+# Shared by the clipboard monitor and the web UI's profiling toggle
+event_profiler = EventProfiler()
@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from selit.workdir import get_app_data_dir
+
+# Bumped when the tables change; 0 means the database was just created
+SCHEMA_VERSION = 1
+
+# Seconds a writer waits for another process's transaction before giving up
+BUSY_TIMEOUT = 5.0
+
+
+def get_prompt_store_path():
+    """Get the path of the prompt database."""
+    return os.path.join(get_app_data_dir(), 'prompts.db')
+
+
+class PromptStore:
+    """
+    Window prompts and keyword triggers in a SQLite database.
+
+    Every edit writes just its own row in a short transaction, so editing one
+    prompt costs the same with ten or ten thousand of them, and the web UI, the
+    CLI and the monitor can edit at the same time. Rows come back in the order
+    they were first added, like the keys of the JSON file this replaces.
+    """
+
+    def __init__(self, path=None, seed=None):
+        """
+        Open the database, creating it if needed.
+
+        Args:
+            path (str): Database file, by default prompts.db in the app data directory
+            seed (callable): Called when the database is created; returns prompts in
+                the layout of the old prompts.json to fill it with, or None
+        """
+        self.path = path or get_prompt_store_path()
+        self._lock = threading.Lock()
+        # Transactions are started explicitly, see _transaction()
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.created = self._initialize(seed)
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in a write transaction, taking the database lock up front."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _schema_version(self):
+        """Read the schema version of the database file, 0 for a new one."""
+        with self._lock:
+            return self._conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def _initialize(self, seed):
+        """Create the tables and import the seed prompts, in one transaction so both happen once."""
+        # Opening an existing store only reads, the write lock is taken only to create one
+        if self._schema_version() >= SCHEMA_VERSION:
+            return False
+
+        with self._transaction() as conn:
+            # Another process may have created it while this one waited for the lock
+            if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+                return False
+
+            conn.execute('CREATE TABLE IF NOT EXISTS window_prompts (identifier TEXT PRIMARY KEY, prompt TEXT NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS keyword_triggers (keyword TEXT PRIMARY KEY, prompt TEXT NOT NULL)')
+
+            prompts = seed() if seed else None
+            if prompts:
+                triggers = prompts.get('keyword_triggers') or {}
+                conn.executemany(
+                    'INSERT OR REPLACE INTO window_prompts (identifier, prompt) VALUES (?, ?)',
+                    [(key, prompt) for key, prompt in prompts.items() if key != 'keyword_triggers']
+                )
+                conn.executemany(
+                    'INSERT OR REPLACE INTO keyword_triggers (keyword, prompt) VALUES (?, ?)',
+                    [(keyword, info.get('prompt', '')) for keyword, info in triggers.items()]
+                )
+
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            return True
+
+    def get_data_version(self):
+        """
+        Get a number that changes whenever another connection commits a change.
+
+        Lets callers keep the rows in memory and reload them only when needed;
+        this connection's own writes do not change it.
+        """
+        with self._lock:
+            return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def load(self):
+        """
+        Read every prompt.
+
+        Returns:
+            tuple: (window identifier -> prompt, keyword -> prompt), in the order they were added
+        """
+        with self._lock:
+            window_prompts = dict(self._conn.execute('SELECT identifier, prompt FROM window_prompts ORDER BY rowid'))
+            keyword_triggers = dict(self._conn.execute('SELECT keyword, prompt FROM keyword_triggers ORDER BY rowid'))
+        return window_prompts, keyword_triggers
+
+    def set_window_prompt(self, identifier, prompt):
+        """Add or replace the prompt for a window identifier."""
+        with self._transaction() as conn:
+            # An upsert keeps the row, and so the position, of an existing identifier
+            conn.execute(
+                'INSERT INTO window_prompts (identifier, prompt) VALUES (?, ?) '
+                'ON CONFLICT(identifier) DO UPDATE SET prompt = excluded.prompt',
+                (identifier, prompt)
+            )
+
+    def delete_window_prompt(self, identifier):
+        """
+        Remove the prompt for a window identifier.
+
+        Returns:
+            bool: False if there was none
+        """
+        with self._transaction() as conn:
+            return conn.execute('DELETE FROM window_prompts WHERE identifier = ?', (identifier,)).rowcount > 0
+
+    def set_keyword_trigger(self, keyword, prompt):
+        """Add or replace the prompt of a keyword trigger."""
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT INTO keyword_triggers (keyword, prompt) VALUES (?, ?) '
+                'ON CONFLICT(keyword) DO UPDATE SET prompt = excluded.prompt',
+                (keyword, prompt)
+            )
+
+    def delete_keyword_trigger(self, keyword):
+        """
+        Remove a keyword trigger.
+
+        Returns:
+            bool: False if there was none
+        """
+        with self._transaction() as conn:
+            return conn.execute('DELETE FROM keyword_triggers WHERE keyword = ?', (keyword,)).rowcount > 0
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,288 @@
+import os
+import time
+import threading
+from collections import deque
+
+import psutil
+
+# Seconds between two CPU samples
+SAMPLE_INTERVAL = 1.0
+
+# Number of samples the activity ranking looks back over
+SAMPLE_WINDOW = 10
+
+# Seconds between two scans for started and exited processes
+INDEX_REFRESH_INTERVAL = 2.0
+
+# Environment variables that tie a process to a graphical session
+DISPLAY_VARIABLES = ('DISPLAY', 'WAYLAND_DISPLAY')
+
+_index = None
+_sampler = None
+_lock = threading.Lock()
+
+
+def _get_session_uid():
+    """Get the real user id selit runs as, or None where there is no such notion."""
+    return os.getuid() if hasattr(os, 'getuid') else None
+
+def _get_session_displays():
+    """Get the display variables of the graphical session selit runs in."""
+    return {name: os.environ[name] for name in DISPLAY_VARIABLES if os.environ.get(name)}
+
+
+class SessionProcessIndex:
+    """
+    The processes of the current user's graphical session.
+
+    A process belongs to the session if it runs as the same user, is not a kernel
+    thread, and either descends from a process already in the session or has the
+    session's DISPLAY or WAYLAND_DISPLAY in its environment. Only the differences
+    in the PID list are classified on each refresh, so keeping the index current
+    costs a directory listing of /proc plus a few reads per new process.
+    """
+
+    def __init__(self, interval=INDEX_REFRESH_INTERVAL):
+        self.interval = interval
+        self.running = False
+        self.thread = None
+        self._uid = _get_session_uid()
+        self._displays = _get_session_displays()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._members = set()
+        self._rejected = set()
+
+    def start(self):
+        """Keep the index up to date in the background."""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='selit-session-index', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop updating the index."""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=self.interval * 2)
+
+    def is_alive(self):
+        """Check whether the index is still being updated."""
+        return self.running and self.thread is not None and self.thread.is_alive()
+
+    def get_pids(self):
+        """
+        Get the processes of the session.
+
+        Returns:
+            list: Process ids in ascending order
+        """
+        with self._lock:
+            return sorted(self._members)
+
+    def refresh(self):
+        """Classify processes started since the last refresh and drop those that exited."""
+        with self._refresh_lock:
+            pids = set(psutil.pids())
+            members = self._members & pids
+            rejected = self._rejected & pids
+
+            # Parents usually have lower PIDs, so they are classified before their children
+            for pid in sorted(pids - members - rejected):
+                is_member = self._classify(pid, members)
+                if is_member is None:
+                    continue
+                (members if is_member else rejected).add(pid)
+
+            with self._lock:
+                self._members = members
+            self._rejected = rejected
+
+    def _classify(self, pid, members):
+        """
+        Decide whether a process belongs to the session.
+
+        Returns:
+            bool: Whether it does, or None if the process exited in the meantime
+        """
+        if pid == os.getpid():
+            return False
+
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                if self._uid is not None and process.uids().real != self._uid:
+                    return False
+                # Kernel threads have no command line
+                if not process.cmdline():
+                    return False
+                # The environment is inherited, children of session processes are in the session
+                if process.ppid() in members:
+                    return True
+                environ = process.environ()
+        except psutil.NoSuchProcess:
+            return None
+        except (psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+
+        if self._displays:
+            return any(environ.get(name) == value for name, value in self._displays.items())
+        return any(environ.get(name) for name in DISPLAY_VARIABLES)
+
+    def _run(self):
+        """Refresh until stopped."""
+        while self.running:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error indexing session processes: {e}")
+
+
+class ActivitySampler:
+    """
+    Ranks the user's processes by recent CPU use.
+
+    A background thread samples the CPU time of the session's processes at a fixed
+    interval and keeps the per-process deltas over a sliding window. The busiest
+    process right now can then be read from memory, instead of scanning every
+    process and ranking them by CPU time accumulated over their whole life.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, window=SAMPLE_WINDOW):
+        self.interval = interval
+        self.window = window
+        self.running = False
+        self.thread = None
+        self._lock = threading.Lock()
+        # (pid, create time) -> CPU seconds at the previous sample
+        self._last_cpu = {}
+        # (pid, create time) -> CPU seconds used in each of the recent samples
+        self._deltas = {}
+        self._ranking = []
+
+    def start(self):
+        """Start sampling in the background."""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='selit-activity-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop sampling."""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=self.interval * 2)
+
+    def is_alive(self):
+        """Check whether the ranking is still being updated."""
+        return self.running and self.thread is not None and self.thread.is_alive()
+
+    def get_ranking(self):
+        """
+        Get the session processes ordered by recent CPU use.
+
+        Returns:
+            list: (pid, CPU seconds over the window) tuples, busiest first, idle processes left out
+        """
+        with self._lock:
+            return list(self._ranking)
+
+    def get_most_active_pid(self):
+        """Get the PID of the busiest session process, or None if nothing has been sampled yet."""
+        ranking = self.get_ranking()
+        return ranking[0][0] if ranking else None
+
+    def sample(self):
+        """Take one CPU sample and update the ranking."""
+        seen = set()
+        for pid in get_session_index().get_pids():
+            try:
+                # Creating the handle reads the create time, which tells reused PIDs apart
+                process = psutil.Process(pid)
+                cpu_times = process.cpu_times()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+
+            key = (pid, process.create_time())
+            seen.add(key)
+            total = cpu_times.user + cpu_times.system
+
+            previous = self._last_cpu.get(key)
+            self._last_cpu[key] = total
+            if previous is None:
+                # First sighting, a delta needs two samples
+                continue
+
+            deltas = self._deltas.get(key)
+            if deltas is None:
+                deltas = self._deltas[key] = deque(maxlen=self.window)
+            deltas.append(max(total - previous, 0.0))
+
+        # Forget processes that have exited
+        for key in list(self._last_cpu):
+            if key not in seen:
+                del self._last_cpu[key]
+                self._deltas.pop(key, None)
+
+        ranking = [(key[0], sum(deltas)) for key, deltas in self._deltas.items()]
+        ranking = [item for item in ranking if item[1] > 0]
+        ranking.sort(key=lambda item: item[1], reverse=True)
+
+        with self._lock:
+            self._ranking = ranking
+
+    def _run(self):
+        """Sample until stopped."""
+        while self.running:
+            started = time.monotonic()
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling process activity: {e}")
+            time.sleep(max(self.interval - (time.monotonic() - started), 0.05))
+
+
+def get_session_index():
+    """
+    Get the shared session process index, building it on first use.
+
+    Returns:
+        SessionProcessIndex: The running index
+    """
+    global _index
+
+    with _lock:
+        if _index is None or not _index.is_alive():
+            _index = SessionProcessIndex()
+            _index.refresh()
+            _index.start()
+        return _index
+
+def get_session_pids():
+    """
+    Get the processes of the current user's graphical session.
+
+    Returns:
+        list: Process ids in ascending order
+    """
+    return get_session_index().get_pids()
+
+def get_activity_sampler(start=True):
+    """
+    Get the shared activity sampler.
+
+    Args:
+        start (bool): Start it if it is not running yet
+
+    Returns:
+        ActivitySampler: The sampler, or None if it is not running and start is False
+    """
+    global _sampler
+
+    with _lock:
+        if _sampler is not None and _sampler.is_alive():
+            return _sampler
+        if not start:
+            return None
+        _sampler = ActivitySampler()
+        _sampler.start()
+        return _sampler
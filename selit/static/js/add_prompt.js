@@ -0,0 +1,239 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const windowIdentifierInput = document.getElementById('window_identifier');
+    const windowsList = document.getElementById('windowsList');
+    const windowSearch = document.getElementById('windowSearch');
+    const clearSearchBtn = document.getElementById('clearSearchBtn');
+    const refreshWindowsBtn = document.getElementById('refreshWindowsBtn');
+    const contextForAI = document.getElementById('context_for_ai');
+    const generatePromptBtn = document.getElementById('generatePromptBtn');
+    const promptTextInput = document.getElementById('prompt_text');
+    const aiGenerateStatus = document.getElementById('aiGenerateStatus');
+    const promptTemplateCards = document.querySelectorAll('.prompt-template-card');
+
+    // Step navigation elements
+    const step1Content = document.getElementById('step-1-content');
+    const step2Content = document.getElementById('step-2-content');
+    const step1Indicator = document.getElementById('step-1-indicator');
+    const step2Indicator = document.getElementById('step-2-indicator');
+    const nextStepBtn = document.getElementById('next-step-btn');
+    const prevStepBtn = document.getElementById('prev-step-btn');
+    const selectedWindowDisplay = document.getElementById('selected-window-display');
+    const selectedWindowDisplay2 = document.getElementById('selected-window-display2');
+
+    let allWindows = [];
+    let currentStep = 1;
+
+    // Step navigation
+    nextStepBtn.addEventListener('click', function() {
+        if (windowIdentifierInput.value.trim() === '') {
+            // Show validation error
+            alert('Please select or enter a window identifier before proceeding.');
+            return;
+        }
+
+        // Update the selected window display
+        selectedWindowDisplay.textContent = windowIdentifierInput.value;
+        if (selectedWindowDisplay2) {
+            selectedWindowDisplay2.textContent = windowIdentifierInput.value;
+        }
+
+        // Move to step 2
+        step1Content.style.display = 'none';
+        step2Content.style.display = 'block';
+
+        // Update indicators
+        step1Indicator.querySelector('.step-counter').classList.remove('active');
+        step1Indicator.querySelector('.step-counter').classList.add('completed');
+        step2Indicator.querySelector('.step-counter').classList.add('active');
+
+        currentStep = 2;
+    });
+
+    prevStepBtn.addEventListener('click', function() {
+        // Move back to step 1
+        step2Content.style.display = 'none';
+        step1Content.style.display = 'block';
+
+        // Update indicators
+        step2Indicator.querySelector('.step-counter').classList.remove('active');
+        step1Indicator.querySelector('.step-counter').classList.remove('completed');
+        step1Indicator.querySelector('.step-counter').classList.add('active');
+
+        currentStep = 1;
+    });
+
+    // Add click event listeners to prompt template cards
+    promptTemplateCards.forEach(card => {
+        card.addEventListener('click', function() {
+            const template = this.getAttribute('data-template');
+            promptTextInput.value = template;
+
+            // Temporarily highlight the selected template card
+            this.classList.add('border-primary');
+            setTimeout(() => {
+                this.classList.remove('border-primary');
+            }, 500);
+
+            // Scroll to the prompt text area
+            promptTextInput.scrollIntoView({ behavior: 'smooth' });
+            promptTextInput.focus();
+        });
+
+        // Add hover effect
+        card.classList.add('cursor-pointer');
+    });
+
+    // Function to fetch windows from the server
+    function fetchWindows(refresh) {
+        windowsList.innerHTML = `
+            <div class="d-flex justify-content-center p-4">
+                <div class="spinner-border text-primary" role="status">
+                    <span class="visually-hidden">Loading...</span>
+                </div>
+            </div>
+        `;
+
+        // The server answers 304 from its snapshot unless a refresh is requested
+        fetch(refresh === true ? '/api/windows?refresh=1' : '/api/windows')
+            .then(response => response.json())
+            .then(data => {
+                allWindows = data;
+                renderWindowsList(allWindows);
+            })
+            .catch(error => {
+                windowsList.innerHTML = `
+                    <div class="alert alert-danger m-3">
+                        <i class="bi bi-exclamation-triangle me-2"></i>
+                        Error loading windows: ${error.message}
+                    </div>
+                `;
+            });
+    }
+
+    // Function to render the windows list
+    function renderWindowsList(windows) {
+        if (windows.length === 0) {
+            windowsList.innerHTML = `
+                <div class="alert alert-info m-3">
+                    <i class="bi bi-info-circle me-2"></i>
+                    No windows found.
+                </div>
+            `;
+            return;
+        }
+
+        windowsList.innerHTML = '';
+
+        windows.forEach(window => {
+            const item = document.createElement('div');
+            item.className = 'minimal-window-item';
+
+            item.innerHTML = `
+                <i class="bi bi-window me-2"></i>
+                <div class="minimal-window-title">${window.title}</div>
+                <div class="minimal-process-name">${window.process_name}</div>
+            `;
+
+            item.addEventListener('click', function() {
+                windowIdentifierInput.value = window.title;
+
+                // Remove selected class from all items
+                document.querySelectorAll('.minimal-window-item').forEach(w => {
+                    w.classList.remove('selected');
+                });
+
+                // Add selected class to this item
+                this.classList.add('selected');
+            });
+
+            windowsList.appendChild(item);
+        });
+    }
+
+    // Search functionality
+    windowSearch.addEventListener('input', function() {
+        const searchTerm = this.value.toLowerCase();
+
+        if (!searchTerm) {
+            renderWindowsList(allWindows);
+            return;
+        }
+
+        const filteredWindows = allWindows.filter(window => 
+            window.title.toLowerCase().includes(searchTerm) || 
+            window.process_name.toLowerCase().includes(searchTerm)
+        );
+
+        renderWindowsList(filteredWindows);
+    });
+
+    // Clear search
+    clearSearchBtn.addEventListener('click', function() {
+        windowSearch.value = '';
+        renderWindowsList(allWindows);
+    });
+
+    // Refresh windows list
+    refreshWindowsBtn.addEventListener('click', function() {
+        fetchWindows(true);
+    });
+
+    // Generate prompt with AI
+    generatePromptBtn.addEventListener('click', function() {
+        const context = contextForAI.value.trim();
+        const windowId = windowIdentifierInput.value.trim();
+
+        if (!context) {
+            aiGenerateStatus.innerHTML = `
+                <span class="text-warning">
+                    <i class="bi bi-exclamation-triangle me-1"></i>
+                    Please describe what you want to do.
+                </span>
+            `;
+            aiGenerateStatus.style.display = 'block';
+            return;
+        }
+
+        aiGenerateStatus.innerHTML = `
+            <span class="text-primary">
+                <div class="spinner-border spinner-border-sm me-1" role="status"></div>
+                Creating prompt...
+            </span>
+        `;
+        aiGenerateStatus.style.display = 'block';
+
+        // Runs as a background job on the server, the same request joins a running one
+        selitJobs.run('/api/generate-prompt', {
+            context: context,
+            window_identifier: windowId
+        })
+        .then(data => {
+            promptTextInput.value = data.prompt;
+            promptTextInput.focus();
+
+            // Subtle highlight
+            promptTextInput.classList.add('subtle-highlight');
+            setTimeout(() => {
+                promptTextInput.classList.remove('subtle-highlight');
+            }, 1000);
+
+            aiGenerateStatus.innerHTML = `
+                <span class="text-success">
+                    <i class="bi bi-check-circle me-1"></i>
+                    Prompt created successfully.
+                </span>
+            `;
+        })
+        .catch(error => {
+            aiGenerateStatus.innerHTML = `
+                <span class="text-danger">
+                    <i class="bi bi-exclamation-circle me-1"></i>
+                    Error generating prompt: ${error.message}
+                </span>
+            `;
+        });
+    });
+
+    // Initial fetch
+    fetchWindows();
+});
@@ -0,0 +1,437 @@
+// Set up event listeners for all copy buttons after the page loads
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.copy-btn').forEach(button => {
+        button.addEventListener('click', function(event) {
+            const text = this.getAttribute('data-output');
+            copyToClipboard(text, event.target);
+        });
+    });
+});
+
+// Live updates: entries logged while the page is open are added on top,
+// built from the empty card the page renders in #historyCardTemplate
+function createHistoryCard(entry) {
+    const template = document.getElementById('historyCardTemplate');
+    const card = template.content.firstElementChild.cloneNode(true);
+
+    // Same format as the datetime template filter
+    card.querySelector('.entry-timestamp').textContent = entry.timestamp.replace('T', ' ').slice(0, 19);
+    card.querySelector('.entry-process').textContent = entry.window.process_name;
+    card.querySelector('.entry-title').textContent = entry.window.title;
+    card.querySelector('.entry-trigger').textContent = entry.trigger_word;
+    card.querySelector('.entry-input').textContent = entry.input;
+    card.querySelector('.entry-output').textContent = entry.output;
+
+    card.querySelector('.copy-btn').addEventListener('click', function(event) {
+        copyToClipboard(entry.output, event.target);
+    });
+    return card;
+}
+
+function addHistoryEntry(entry) {
+    let container = document.querySelector('.history-container');
+    if (!container) {
+        // First entry of an empty history replaces the placeholder
+        container = document.createElement('div');
+        container.className = 'history-container';
+        const placeholder = document.querySelector('.empty-history-card');
+        placeholder.parentNode.replaceChild(container, placeholder);
+    }
+    container.insertBefore(createHistoryCard(entry), container.firstChild);
+}
+
+if (window.EventSource) {
+    const historyStream = new EventSource('/history/stream');
+    historyStream.addEventListener('entry', function(event) {
+        addHistoryEntry(JSON.parse(event.data).entry);
+    });
+}
+
+function copyToClipboard(text, element) {
+    navigator.clipboard.writeText(text).then(function() {
+        // Show feedback
+        const copyBtn = element.closest('.copy-btn');
+        const originalText = copyBtn.innerHTML;
+
+        copyBtn.innerHTML = '<i class="bi bi-check-circle me-1"></i>Copied!';
+        copyBtn.classList.add('btn-success');
+        copyBtn.classList.remove('btn-outline-primary');
+
+        setTimeout(function() {
+            copyBtn.innerHTML = originalText;
+            copyBtn.classList.remove('btn-success');
+            copyBtn.classList.add('btn-outline-primary');
+        }, 2000);
+    });
+}
+
+// Day Summary functionality
+document.getElementById('generateSummaryBtn').addEventListener('click', function() {
+    // Get the date from the currently selected days option
+    let date = new Date();
+
+    // Show modal and start loading
+    const summaryModal = new bootstrap.Modal(document.getElementById('summaryModal'));
+    summaryModal.show();
+
+    showSummaryLoading();
+
+    // Get the current date in YYYY-MM-DD format
+    let dateString = date.toISOString().split('T')[0];
+
+    // Fetch summary data
+    fetch(`/history/summary?date=${dateString}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(data => {
+            // Hide loading, show content
+            hideSummaryLoading();
+            showSummaryContent();
+
+            // Populate summary data
+            populateSummaryData(data);
+        })
+        .catch(error => {
+            // Show error message
+            hideSummaryLoading();
+            showSummaryError(error.message);
+        });
+});
+
+function showSummaryLoading() {
+    document.querySelector('.summary-loading').classList.remove('d-none');
+    document.querySelector('.summary-content').classList.add('d-none');
+    document.querySelector('.summary-error').classList.add('d-none');
+}
+
+function hideSummaryLoading() {
+    document.querySelector('.summary-loading').classList.add('d-none');
+}
+
+function showSummaryContent() {
+    document.querySelector('.summary-content').classList.remove('d-none');
+}
+
+function showSummaryError(message) {
+    document.querySelector('.summary-error').classList.remove('d-none');
+    document.getElementById('errorMessage').textContent = message || 'Error generating summary.';
+}
+
+let currentSummaryData = null; // Store the current summary data
+
+function populateSummaryData(data) {
+    // Store the current summary data for AI analysis
+    currentSummaryData = data;
+
+    // Format date nicely - just month and day for compactness
+    const dateObj = new Date(data.date);
+    const monthNames = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
+    const month = monthNames[dateObj.getMonth()];
+    const day = dateObj.getDate();
+    document.getElementById('summaryDate').textContent = `${month} ${day}`;
+
+    // Add total interactions with formatting
+    document.getElementById('totalInteractions').textContent = data.total_interactions;
+
+    // Set content length values
+    document.getElementById('avgInputLengthValue').textContent = Math.round(data.average_input_length);
+    document.getElementById('avgOutputLengthValue').textContent = Math.round(data.average_output_length);
+
+    // Format busiest hour with AM/PM
+    if (data.busiest_hour !== undefined && data.busiest_hour !== null) {
+        const hour = parseInt(data.busiest_hour);
+        const ampm = hour >= 12 ? 'PM' : 'AM';
+        const hour12 = hour % 12 || 12; // Convert to 12-hour format
+        document.getElementById('busiestHour').textContent = `${hour12} ${ampm}`;
+    } else {
+        document.getElementById('busiestHour').textContent = 'N/A';
+    }
+
+    // Populate app usage data with new list layout
+    const appsListEl = document.getElementById('appsList');
+    appsListEl.innerHTML = '';
+    appsListEl.className = 'apps-list';
+
+    // Find the app with the highest count to scale the bars
+    const maxAppUsage = Object.values(data.apps).length > 0 ? 
+        Math.max(...Object.values(data.apps)) : 0;
+
+    // Sort apps by usage count (descending)
+    const appEntries = Object.entries(data.apps)
+        .sort((a, b) => b[1] - a[1])
+        .slice(0, 5); // Show top 5 apps
+
+    if (appEntries.length === 0) {
+        const emptyMessage = document.createElement('div');
+        emptyMessage.className = 'text-muted small text-center py-3';
+        emptyMessage.textContent = 'No application data available';
+        appsListEl.appendChild(emptyMessage);
+        return;
+    }
+
+    // Add each app with its usage stats in elegant list format
+    appEntries.forEach(([appName, count], index) => {
+        const percentage = maxAppUsage > 0 ? 
+            Math.floor((count / maxAppUsage) * 100) : 0;
+
+        // Create app item
+        const appItem = document.createElement('div');
+        appItem.className = 'app-item';
+
+        // Create app icon with first letter
+        const appIcon = document.createElement('div');
+        appIcon.className = 'app-icon-logo';
+        appIcon.textContent = appName.charAt(0).toUpperCase();
+
+        // Create app details container
+        const appDetails = document.createElement('div');
+        appDetails.className = 'app-details';
+
+        // Create name row (app name + count)
+        const nameRow = document.createElement('div');
+        nameRow.className = 'app-name-row';
+
+        // Create app name
+        const appNameEl = document.createElement('div');
+        appNameEl.className = 'app-name';
+        appNameEl.textContent = appName;
+
+        // Create app count
+        const appCount = document.createElement('div');
+        appCount.className = 'app-count';
+        appCount.textContent = count;
+
+        // Create bar background
+        const barBg = document.createElement('div');
+        barBg.className = 'app-bar-bg';
+
+        // Create usage bar
+        const bar = document.createElement('div');
+        bar.className = 'app-bar';
+
+        // Assemble elements
+        nameRow.appendChild(appNameEl);
+        nameRow.appendChild(appCount);
+        barBg.appendChild(bar);
+        appDetails.appendChild(nameRow);
+        appDetails.appendChild(barBg);
+        appItem.appendChild(appIcon);
+        appItem.appendChild(appDetails);
+
+        // Add to list
+        appsListEl.appendChild(appItem);
+
+        // Staggered animation for bars
+        setTimeout(() => {
+            bar.style.width = `${percentage}%`;
+        }, 200 + (index * 100));
+    });
+
+    // Populate hour chart
+    populateHourChart(data.hour_distribution || {});
+
+    // Calculate progress bar values - scale appropriately based on max length
+    // We'll consider anything over 1000 chars as 100%
+    const maxLength = Math.max(data.average_input_length, data.average_output_length, 1000);
+    const inputLengthProgress = Math.min(Math.floor((data.average_input_length / maxLength) * 100), 100);
+    const outputLengthProgress = Math.min(Math.floor((data.average_output_length / maxLength) * 100), 100);
+
+    // Add animation delay to make the transition visible
+    setTimeout(() => {
+        document.getElementById('inputLengthBar').style.width = `${inputLengthProgress}%`;
+        document.getElementById('outputLengthBar').style.width = `${outputLengthProgress}%`;
+    }, 200);
+}
+
+function populateHourChart(hourData) {
+    const hourChartEl = document.getElementById('hourChart');
+    hourChartEl.innerHTML = '';
+
+    // Create container
+    const container = document.createElement('div');
+    container.className = 'hour-palette';
+
+    // Find max value for scaling
+    const hourValues = Object.values(hourData);
+    const maxValue = hourValues.length > 0 ? Math.max(...hourValues) : 0;
+
+    // Create grid layout
+    for (let row = 0; row < 4; row++) {
+        for (let col = 0; col < 6; col++) {
+            const hour = row * 6 + col; // Calculate hour (0-23)
+            const count = hourData[hour] || 0;
+
+            // Create cell wrapper
+            const cellWrapper = document.createElement('div');
+            cellWrapper.className = 'hour-cell-wrapper';
+
+            // Create the cell
+            const cell = document.createElement('div');
+            cell.className = 'hour-cell';
+
+            // Determine activity level (0-4)
+            let level = 0;
+            if (count > 0) {
+                if (maxValue <= 4) {
+                    // If max is 4 or less, level = count
+                    level = count;
+                } else {
+                    // Otherwise scale to 4 levels
+                    level = Math.ceil((count / maxValue) * 4);
+                }
+            }
+
+            // Add level class
+            cell.classList.add('level-' + level);
+
+            // Add count inside the cell (visible on hover)
+            const countEl = document.createElement('div');
+            countEl.className = 'hour-count';
+            countEl.textContent = count;
+            cell.appendChild(countEl);
+
+            // Create hour label
+            const hourLabel = document.createElement('div');
+            hourLabel.className = 'hour-label';
+            hourLabel.textContent = `${hour < 10 ? '0' + hour : hour}`;
+            cell.appendChild(hourLabel);
+
+            // Add tooltip
+            cell.setAttribute('data-bs-toggle', 'tooltip');
+            cell.setAttribute('data-bs-placement', 'top');
+            cell.setAttribute('title', `${hour < 10 ? '0' + hour : hour}:00: ${count} interaction${count !== 1 ? 's' : ''}`);
+
+            // Add cell to wrapper
+            cellWrapper.appendChild(cell);
+
+            // Add to container
+            container.appendChild(cellWrapper);
+        }
+    }
+
+    hourChartEl.appendChild(container);
+
+    // Initialize tooltips
+    const tooltipTriggerList = [].slice.call(hourChartEl.querySelectorAll('[data-bs-toggle="tooltip"]'));
+    tooltipTriggerList.map(function (tooltipTriggerEl) {
+        return new bootstrap.Tooltip(tooltipTriggerEl);
+    });
+}
+
+// AI Analysis functionality
+document.getElementById('analyzeWithAiBtn').addEventListener('click', function() {
+    runAiAnalysis(false);
+});
+
+// Skips the saved analysis, for example to get another take on the same day
+document.getElementById('reanalyzeWithAiBtn').addEventListener('click', function() {
+    runAiAnalysis(true);
+});
+
+function runAiAnalysis(refresh) {
+    if (!currentSummaryData) {
+        showAiAnalysisError('No summary data available. Please generate a summary first.');
+        return;
+    }
+
+    // Show loading state
+    showAiAnalysisLoading();
+
+    // Analyze in a background job; asking again for the same day joins it
+    selitJobs.run('/history/summary/analyze' + (refresh ? '?refresh=1' : ''), currentSummaryData)
+    .then(data => {
+        // Hide loading, show content
+        hideAiAnalysisLoading();
+        document.getElementById('reanalyzeWithAiBtn').classList.remove('d-none');
+
+        showAiAnalysisContent(data.analysis);
+        if (data.cached) {
+            // Same log content as the last analysis, nothing was sent to the AI
+            const cachedNote = document.createElement('p');
+            cachedNote.className = 'text-muted small mb-2';
+            cachedNote.textContent = 'Showing the saved analysis, no new interactions since it was generated.';
+            document.getElementById('aiAnalysisText').prepend(cachedNote);
+        }
+    })
+    .catch(error => {
+        // Show error message
+        hideAiAnalysisLoading();
+        showAiAnalysisError(error.message);
+    });
+}
+
+function showAiAnalysisLoading() {
+    document.querySelector('.ai-analysis-loading').classList.remove('d-none');
+    document.querySelector('.ai-analysis-content').classList.add('d-none');
+    document.querySelector('.ai-analysis-error').classList.add('d-none');
+}
+
+function hideAiAnalysisLoading() {
+    document.querySelector('.ai-analysis-loading').classList.add('d-none');
+}
+
+function showAiAnalysisContent(text) {
+    document.querySelector('.ai-analysis-content').classList.remove('d-none');
+
+    // Add Bootstrap classes for section headers
+    let formattedText = text
+        // Format section headers
+        .replace(/SECTION 1 - USAGE ANALYSIS:/g, '<h5 class="mt-2 mb-3 text-primary">USAGE ANALYSIS</h5>')
+        .replace(/SECTION 2 - DAILY WORK REPORT:/g, '<h5 class="mt-4 mb-3 text-primary">DAILY WORK REPORT</h5>')
+
+        // Format other headers that may appear
+        .replace(/^(#+)\s+(.*?)$/gm, function(match, hashes, content) {
+            const level = hashes.length + 5; // h5 or h6
+            return `<h${level} class="mt-3 mb-2">${content}</h${level}>`;
+        })
+
+        // Basic markdown formatting
+        .replace(/\n/g, '<br>')
+        .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
+        .replace(/\*(.*?)\*/g, '<em>$1</em>')
+
+        // Format numbered lists
+        .replace(/(\d+\.\s+)(.*?)(<br>)/g, '<div class="ms-2 mb-1">$1$2</div>$3');
+
+    document.getElementById('aiAnalysisText').innerHTML = formattedText;
+
+    // Add copy button for the work report section
+    const aiAnalysisEl = document.getElementById('aiAnalysisText');
+    const workReportSection = aiAnalysisEl.innerHTML.split('<h5 class="mt-4 mb-3 text-primary">DAILY WORK REPORT</h5>')[1];
+
+    if (workReportSection) {
+        // Add a button to copy just the work report part
+        const copyButton = document.createElement('button');
+        copyButton.className = 'btn btn-sm btn-outline-primary mt-2';
+        copyButton.innerHTML = '<i class="bi bi-clipboard me-1"></i>Copy Work Report';
+        copyButton.onclick = function() {
+            // Extract the work report text without HTML tags
+            const tempDiv = document.createElement('div');
+            tempDiv.innerHTML = workReportSection;
+            const plainText = tempDiv.textContent || tempDiv.innerText || '';
+
+            // Copy to clipboard
+            navigator.clipboard.writeText(plainText.trim()).then(function() {
+                copyButton.innerHTML = '<i class="bi bi-check-circle me-1"></i>Copied!';
+                setTimeout(function() {
+                    copyButton.innerHTML = '<i class="bi bi-clipboard me-1"></i>Copy Work Report';
+                }, 2000);
+            });
+        };
+
+        // Insert copy button after the work report heading
+        const workReportHeading = aiAnalysisEl.querySelector('h5:nth-of-type(2)');
+        if (workReportHeading) {
+            workReportHeading.insertAdjacentElement('afterend', copyButton);
+        }
+    }
+}
+
+function showAiAnalysisError(message) {
+    document.querySelector('.ai-analysis-error').classList.remove('d-none');
+    document.getElementById('aiErrorMessage').textContent = message || 'Unable to generate AI analysis.';
+}
@@ -0,0 +1,9 @@
+// Count calls logged while the dashboard is open
+if (window.EventSource) {
+    const historyStream = new EventSource('/history/stream');
+    historyStream.addEventListener('entry', function() {
+        const count = document.getElementById('todayCallCount');
+        count.textContent = parseInt(count.textContent, 10) + 1;
+        document.getElementById('viewHistoryLink').classList.remove('d-none');
+    });
+}
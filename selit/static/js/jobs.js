@@ -0,0 +1,101 @@
+// Long AI requests run as background jobs on the server: submitting returns a job
+// right away, and the result is followed over Server-Sent Events, or by polling
+// where EventSource is not available.
+const selitJobs = (function() {
+    const POLL_INTERVAL = 1000;
+
+    function submit(url, body) {
+        return fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(body)
+        })
+        .then(response => response.json().then(data => {
+            if (!response.ok) {
+                throw new Error(data.error || data.message || 'Network response was not ok');
+            }
+            return data;
+        }));
+    }
+
+    function settle(job, resolve, reject) {
+        if (job.status === 'done') {
+            resolve(job.result);
+        } else if (job.status === 'failed') {
+            reject(new Error(job.error || 'The job failed'));
+        } else {
+            return false;
+        }
+        return true;
+    }
+
+    function poll(job, onProgress) {
+        return new Promise((resolve, reject) => {
+            function check() {
+                fetch(job.status_url)
+                    .then(response => {
+                        if (!response.ok) {
+                            throw new Error('The job is no longer available');
+                        }
+                        return response.json();
+                    })
+                    .then(state => {
+                        if (onProgress && state.progress) {
+                            onProgress(state.progress, state);
+                        }
+                        if (!settle(state, resolve, reject)) {
+                            setTimeout(check, POLL_INTERVAL);
+                        }
+                    })
+                    .catch(reject);
+            }
+            check();
+        });
+    }
+
+    function follow(job, onProgress) {
+        if (!window.EventSource) {
+            return poll(job, onProgress);
+        }
+
+        return new Promise((resolve, reject) => {
+            const events = new EventSource(job.events_url);
+            let finished = false;
+
+            events.addEventListener('status', function(event) {
+                const state = JSON.parse(event.data);
+                if (onProgress && state.progress) {
+                    onProgress(state.progress, state);
+                }
+                finished = settle(state, resolve, reject);
+                if (finished) {
+                    events.close();
+                }
+            });
+
+            events.onerror = function() {
+                // Stream interrupted before the end, fall back to polling
+                events.close();
+                if (!finished) {
+                    poll(job, onProgress).then(resolve, reject);
+                }
+            };
+        });
+    }
+
+    // Submit a job and resolve with its result once it is done
+    function run(url, body, options) {
+        const onProgress = options && options.onProgress;
+        return submit(url, body).then(job => {
+            return new Promise((resolve, reject) => {
+                if (!settle(job, resolve, reject)) {
+                    follow(job, onProgress).then(resolve, reject);
+                }
+            });
+        });
+    }
+
+    return { submit: submit, follow: follow, run: run };
+})();
@@ -0,0 +1,68 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Keyword trigger AI assist
+    const keywordInput = document.getElementById('keyword');
+    const promptTextInput = document.getElementById('prompt_text');
+    const contextForAI = document.getElementById('contextForAI');
+    const generatePromptBtn = document.getElementById('generatePromptBtn');
+    const aiGenerateStatus = document.getElementById('aiGenerateStatus');
+
+    // Skip if elements don't exist on this page
+    if (generatePromptBtn && keywordInput && promptTextInput) {
+        // Generate prompt with AI
+        generatePromptBtn.addEventListener('click', function() {
+            const context = contextForAI.value.trim();
+            const keyword = keywordInput.value.trim();
+
+            if (!context) {
+                aiGenerateStatus.innerHTML = `
+                    <span class="text-warning">
+                        <i class="bi bi-exclamation-triangle me-1"></i>
+                        Please describe what you want to do.
+                    </span>
+                `;
+                aiGenerateStatus.style.display = 'block';
+                return;
+            }
+
+            aiGenerateStatus.innerHTML = `
+                <span class="text-primary">
+                    <div class="spinner-border spinner-border-sm me-1" role="status"></div>
+                    Creating prompt...
+                </span>
+            `;
+            aiGenerateStatus.style.display = 'block';
+
+            // Runs as a background job on the server, the same request joins a running one
+            selitJobs.run('/api/generate-prompt', {
+                context: context,
+                keyword: keyword,
+                is_keyword_trigger: true
+            })
+            .then(data => {
+                promptTextInput.value = data.prompt;
+                promptTextInput.focus();
+
+                // Subtle highlight
+                promptTextInput.classList.add('subtle-highlight');
+                setTimeout(() => {
+                    promptTextInput.classList.remove('subtle-highlight');
+                }, 1000);
+
+                aiGenerateStatus.innerHTML = `
+                    <span class="text-success">
+                        <i class="bi bi-check-circle me-1"></i>
+                        Prompt created successfully.
+                    </span>
+                `;
+            })
+            .catch(error => {
+                aiGenerateStatus.innerHTML = `
+                    <span class="text-danger">
+                        <i class="bi bi-exclamation-circle me-1"></i>
+                        Error generating prompt: ${error.message}
+                    </span>
+                `;
+            });
+        });
+    }
+});
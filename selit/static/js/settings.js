@@ -0,0 +1,69 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Toggle password visibility
+    function setupPasswordToggle(inputId, toggleId) {
+        const input = document.getElementById(inputId);
+        const toggle = document.getElementById(toggleId);
+
+        if (input && toggle) {
+            // Set initial state
+            input.setAttribute('type', 'password');
+
+            toggle.addEventListener('click', function() {
+                const type = input.getAttribute('type') === 'password' ? 'text' : 'password';
+                input.setAttribute('type', type);
+                toggle.innerHTML = type === 'password' ? 
+                    '<i class="bi bi-eye"></i>' : 
+                    '<i class="bi bi-eye-slash"></i>';
+            });
+        }
+    }
+
+    setupPasswordToggle('api_key', 'toggleGeminiApiKey');
+    setupPasswordToggle('openai_api_key', 'toggleOpenAIApiKey');
+    setupPasswordToggle('deepseek_api_key', 'toggleDeepSeekApiKey');
+
+    // AI Service selector
+    const aiServiceCards = document.querySelectorAll('.ai-service-card');
+    const geminiSection = document.querySelector('.gemini-section');
+    const openaiSection = document.querySelector('.openai-section');
+    const deepseekSection = document.querySelector('.deepseek-section');
+
+    function updateVisibility() {
+        const selectedService = document.querySelector('input[name="ai_service"]:checked').value;
+
+        if (selectedService === 'gemini') {
+            geminiSection.style.display = 'block';
+            openaiSection.style.display = 'none';
+            deepseekSection.style.display = 'none';
+        } else if (selectedService === 'openai') {
+            geminiSection.style.display = 'none';
+            openaiSection.style.display = 'block';
+            deepseekSection.style.display = 'none';
+        } else {
+            geminiSection.style.display = 'none';
+            openaiSection.style.display = 'none';
+            deepseekSection.style.display = 'block';
+        }
+
+        // Update active card styling
+        aiServiceCards.forEach(card => {
+            if (card.dataset.service === selectedService) {
+                card.classList.add('active');
+            } else {
+                card.classList.remove('active');
+            }
+        });
+    }
+
+    // Initial visibility
+    updateVisibility();
+
+    // Listen for changes on the cards
+    aiServiceCards.forEach(card => {
+        card.addEventListener('click', function() {
+            const radio = this.querySelector('input[type="radio"]');
+            radio.checked = true;
+            updateVisibility();
+        });
+    });
+});
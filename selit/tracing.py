@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+
+from selit.workdir import get_app_data_dir
+
+# Set to 0 to turn tracing off
+TRACE_ENVIRONMENT_VARIABLE = 'SELIT_TRACE'
+
+# The trace file is rotated past this size, keeping this many older files
+MAX_TRACE_FILE_SIZE = 5 * 1024 * 1024
+TRACE_FILE_BACKUPS = 3
+
+TRACE_FILE_NAME = 'trace.json'
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def get_trace_dir():
+    """Get or create the directory holding trace files."""
+    trace_dir = os.path.join(get_app_data_dir(), 'traces')
+    os.makedirs(trace_dir, exist_ok=True)
+    return trace_dir
+
+def get_trace_files():
+    """
+    List the trace files, current one first.
+
+    Returns:
+        list: File names below the trace directory
+    """
+    trace_dir = get_trace_dir()
+    names = [TRACE_FILE_NAME] + [_backup_name(number) for number in range(1, TRACE_FILE_BACKUPS + 1)]
+    return [name for name in names if os.path.exists(os.path.join(trace_dir, name))]
+
+def is_enabled():
+    return os.environ.get(TRACE_ENVIRONMENT_VARIABLE, '1') != '0'
+
+def _backup_name(number):
+    stem, ext = os.path.splitext(TRACE_FILE_NAME)
+    return f'{stem}.{number}{ext}'
+
+def _rotate(trace_dir):
+    """Shift trace.json to trace.1.json, trace.1.json to trace.2.json and so on, dropping the oldest."""
+    for number in range(TRACE_FILE_BACKUPS, 0, -1):
+        source = os.path.join(trace_dir, _backup_name(number - 1) if number > 1 else TRACE_FILE_NAME)
+        if os.path.exists(source):
+            os.replace(source, os.path.join(trace_dir, _backup_name(number)))
+
+def _write_events(events):
+    """
+    Append events to the trace file, in Chrome's JSON array trace format.
+
+    The closing bracket of the array is optional in that format, so events are
+    appended without rewriting the file, and it opens in chrome://tracing or
+    Perfetto at any time.
+    """
+    lines = ''.join(json.dumps(event, separators=(',', ':')) + ',\n' for event in events)
+    with _write_lock:
+        trace_dir = get_trace_dir()
+        trace_file = os.path.join(trace_dir, TRACE_FILE_NAME)
+        try:
+            size = os.path.getsize(trace_file)
+        except OSError:
+            size = 0
+        if size >= MAX_TRACE_FILE_SIZE:
+            _rotate(trace_dir)
+            size = 0
+        with open(trace_file, 'a', encoding='utf-8') as f:
+            if size == 0:
+                f.write('[\n')
+            f.write(lines)
+
+@contextmanager
+def span(name, **args):
+    """
+    Time a block as a span of the trace.
+
+    Spans nest; the spans of a thread are written to the trace file together when
+    its outermost span ends, so a traced clipboard event costs one small write.
+
+    Args:
+        name (str): The stage, e.g. 'process_call'
+        **args: Details shown with the span, such as the provider
+    """
+    if not is_enabled():
+        yield
+        return
+
+    if not hasattr(_local, 'events'):
+        _local.events = []
+        _local.depth = 0
+
+    _local.depth += 1
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter_ns() - started
+        _local.depth -= 1
+        event = {
+            'name': name,
+            'cat': 'selit',
+            'ph': 'X',
+            # perf_counter has no fixed epoch, which trace viewers do not need
+            'ts': started // 1000,
+            'dur': duration // 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_native_id(),
+        }
+        if args:
+            event['args'] = args
+        _local.events.append(event)
+
+        if _local.depth == 0:
+            events, _local.events = _local.events, []
+            try:
+                _write_events(events)
+            except OSError as e:
+                print(f"Error writing trace: {str(e)}")
+
+def traced(name=None):
+    """Decorate a function so every call is a span, named after the function by default."""
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
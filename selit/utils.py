@@ -1,8 +1,18 @@
 import os
+import shutil
 import platform
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
 import psutil
 
+from selit import x11, wayland
+from selit.process_cache import get_process_info, get_process_name, prefetch_processes
+from selit.session_processes import get_activity_sampler, get_session_pids
+
+# Concurrent xdotool calls when listing windows without wmctrl
+XDOTOOL_WORKERS = 8
+
 def get_window_info(get_active_only=False):
     """
     Get window information using platform-specific methods.
@@ -26,11 +36,7 @@ def get_window_info(get_active_only=False):
                 _, process_id = win32process.GetWindowThreadProcessId(hwnd)
                 window_title = win32gui.GetWindowText(hwnd)
                 
-                try:
-                    process = psutil.Process(process_id)
-                    process_name = process.name()
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    process_name = "Unknown"
+                process_name = get_process_name(process_id)
                 
                 return {
                     "hwnd": hwnd,
@@ -44,18 +50,16 @@ def get_window_info(get_active_only=False):
         else:
             # Get all windows
             windows = []
+            seen_titles = set()
             
             def enum_windows_callback(hwnd, results):
                 if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
                     window_title = win32gui.GetWindowText(hwnd)
-                    try:
-                        _, process_id = win32process.GetWindowThreadProcessId(hwnd)
-                        process = psutil.Process(process_id)
-                        process_name = process.name()
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        process_name = "Unknown"
+                    _, process_id = win32process.GetWindowThreadProcessId(hwnd)
+                    process_name = get_process_name(process_id)
                     
-                    if window_title and window_title not in [w["title"] for w in results]:
+                    if window_title and window_title not in seen_titles:
+                        seen_titles.add(window_title)
                         results.append({
                             "hwnd": hwnd,
                             "title": window_title,
@@ -69,6 +73,16 @@ def get_window_info(get_active_only=False):
             
     elif platform.system() == 'Linux':
         if get_active_only:
+            # On sway or Hyprland ask the compositor, the X helpers only see XWayland windows
+            active_window = _get_active_window_with_wayland()
+            if active_window:
+                return active_window
+            
+            # Read the EWMH properties directly over a persistent X connection
+            active_window = _get_active_window_with_x11()
+            if active_window:
+                return active_window
+            
             # Try to use xdotool to get the active window (more reliable than wmctrl for active window)
             active_window = _get_active_window_with_xdotool()
             if active_window:
@@ -87,8 +101,15 @@ def get_window_info(get_active_only=False):
             # Fallback to the most active process
             return _get_most_active_process()
         else:
-            # Get all windows
-            windows = _get_all_windows_with_wmctrl()
+            # Get all windows, straight from the compositor or the X server if possible
+            windows = _get_all_windows_with_wayland()
+            
+            if not windows:
+                windows = _get_all_windows_with_x11()
+            
+            # Otherwise a single wmctrl call
+            if not windows:
+                windows = _get_all_windows_with_wmctrl()
             
             # If wmctrl didn't work, try xdotool
             if not windows:
@@ -115,6 +136,30 @@ def get_window_info(get_active_only=False):
                 "process_name": "Unknown"
             }]
 
+def _get_active_window_with_wayland():
+    """
+    Try to get the active window info from a Wayland compositor over its IPC socket.
+    Returns window info dict or None if failed.
+    """
+    try:
+        return wayland.get_active_window_info()
+    except Exception as e:
+        print(f"Error using Wayland compositor IPC: {e}")
+    
+    return None
+
+def _get_active_window_with_x11():
+    """
+    Try to get the active window info from the X server without spawning processes.
+    Returns window info dict or None if failed.
+    """
+    try:
+        return x11.get_active_window_info()
+    except Exception as e:
+        print(f"Error using X11: {e}")
+    
+    return None
+
 def _get_active_window_with_xprop():
     """
     Try to get the active window info using xprop.
@@ -177,11 +222,7 @@ def _get_active_window_with_xprop():
                                 pid = None
                     
                     if pid:
-                        try:
-                            process = psutil.Process(pid)
-                            process_name = process.name()
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            process_name = "Unknown"
+                        process_name = get_process_name(pid)
                     else:
                         process_name = "Unknown"
                     
@@ -253,11 +294,7 @@ def _get_active_window_with_wmctrl():
                                     pid = int(parts[2])
                                     window_title = parts[4]
                                     
-                                    try:
-                                        process = psutil.Process(pid)
-                                        process_name = process.name()
-                                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                        process_name = "Unknown"
+                                    process_name = get_process_name(pid)
                                         
                                     return {
                                         "hwnd": window_id,
@@ -278,11 +315,7 @@ def _get_active_window_with_wmctrl():
                                 pid = int(parts[2])
                                 window_title = parts[4]
                                 
-                                try:
-                                    process = psutil.Process(pid)
-                                    process_name = process.name()
-                                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                    process_name = "Unknown"
+                                process_name = get_process_name(pid)
                                     
                                 return {
                                     "hwnd": window_id,
@@ -343,11 +376,7 @@ def _get_active_window_with_xdotool():
                     window_title = title_output.stdout.strip()
                     pid = int(pid_output.stdout.strip())
                     
-                    try:
-                        process = psutil.Process(pid)
-                        process_name = process.name()
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        process_name = "Unknown"
+                    process_name = get_process_name(pid)
                     
                     return {
                         "hwnd": window_id,
@@ -360,12 +389,33 @@ def _get_active_window_with_xdotool():
     
     return None
 
+def _get_process_title(info):
+    """Build a descriptive pseudo window title from cached process metadata."""
+    cmdline = info['cmdline']
+    if not cmdline:
+        return info['name']
+    cmd_str = ' '.join(cmdline[:2]) if len(cmdline) > 1 else cmdline[0]
+    return f"{info['name']}: {cmd_str[:40]}"
+
 def _get_most_active_process():
     """
     Fallback method to get the most active process as a window.
     Returns window info dict or a fallback if none found.
     """
     try:
+        # Busiest session process over the last few seconds, sampled in the background
+        sampler = get_activity_sampler()
+        for pid, _ in sampler.get_ranking():
+            info = get_process_info(pid)
+            if info:
+                return {
+                    "hwnd": pid,
+                    "title": _get_process_title(info),
+                    "process_id": pid,
+                    "process_name": info['name'],
+                }
+        
+        # Nothing sampled yet, rank by the CPU time used over each process' lifetime
         processes = []
         
         # Get our own PID to exclude it
@@ -391,27 +441,15 @@ def _get_most_active_process():
             active_proc = processes[0]
             pid = active_proc['pid']
             
-            try:
-                # Get more detailed info
-                process = psutil.Process(pid)
-                process_name = process.name()
-                
-                # Try to get command line for a better title
-                try:
-                    cmdline = process.cmdline()
-                    cmd_str = ' '.join(cmdline[:2]) if len(cmdline) > 1 else cmdline[0] if cmdline else ""
-                    window_title = f"{process_name}: {cmd_str[:40]}"
-                except:
-                    window_title = process_name
-                    
+            # Get more detailed info
+            info = get_process_info(pid)
+            if info:
                 return {
                     "hwnd": pid,
-                    "title": window_title,
+                    "title": _get_process_title(info),
                     "process_id": pid,
-                    "process_name": process_name,
+                    "process_name": info['name'],
                 }
-            except:
-                pass
     except Exception as e:
         print(f"Error getting most active process: {e}")
     
@@ -423,6 +461,30 @@ def _get_most_active_process():
         "process_name": "Unknown",
     }
 
+def _get_all_windows_with_wayland():
+    """
+    Get all windows from a Wayland compositor over its IPC socket.
+    Returns a list of window info dicts or empty list if failed.
+    """
+    try:
+        return wayland.list_windows() or []
+    except Exception as e:
+        print(f"Error using Wayland compositor IPC for listing windows: {e}")
+    
+    return []
+
+def _get_all_windows_with_x11():
+    """
+    Get all windows from the X server without spawning processes.
+    Returns a list of window info dicts or empty list if failed.
+    """
+    try:
+        return x11.list_windows() or []
+    except Exception as e:
+        print(f"Error using X11 for listing windows: {e}")
+    
+    return []
+
 def _get_all_windows_with_wmctrl():
     """
     Get all windows using wmctrl.
@@ -432,15 +494,8 @@ def _get_all_windows_with_wmctrl():
     
     try:
         # Check if wmctrl is installed
-        wmctrl_check = subprocess.run(
-            ["which", "wmctrl"], 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        if wmctrl_check.returncode == 0:
-            # List all windows
+        if shutil.which("wmctrl"):
+            # List all windows with a single call
             wmctrl_output = subprocess.run(
                 ["wmctrl", "-l", "-p"], 
                 stdout=subprocess.PIPE, 
@@ -449,37 +504,63 @@ def _get_all_windows_with_wmctrl():
             )
 
             if wmctrl_output.returncode == 0:
+                rows = []
+                seen_titles = set()
                 lines = wmctrl_output.stdout.strip().split('\n')
                 for line in lines:
                     if line.strip():
                         # Parse window info: format is typically "WINDOW_ID DESKTOP_ID PID HOSTNAME WINDOW_TITLE"
                         parts = line.split(None, 4)
                         if len(parts) >= 5:
-                            window_id = parts[0]
                             try:
                                 pid = int(parts[2])
-                                window_title = parts[4]
-                                
-                                try:
-                                    process = psutil.Process(pid)
-                                    process_name = process.name()
-                                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                    process_name = "Unknown"
-                                
-                                if window_title and window_title not in [w["title"] for w in windows]:
-                                    windows.append({
-                                        "hwnd": window_id,
-                                        "title": window_title,
-                                        "process_id": pid,
-                                        "process_name": process_name
-                                    })
-                            except (ValueError, IndexError):
-                                pass
+                            except ValueError:
+                                continue
+                            window_title = parts[4]
+                            if window_title and window_title not in seen_titles:
+                                seen_titles.add(window_title)
+                                rows.append((parts[0], window_title, pid))
+                
+                # Resolve all process names at once
+                prefetch_processes(pid for _, _, pid in rows)
+                
+                for window_id, window_title, pid in rows:
+                    windows.append({
+                        "hwnd": window_id,
+                        "title": window_title,
+                        "process_id": pid,
+                        "process_name": get_process_name(pid)
+                    })
     except Exception as e:
         print(f"Error using wmctrl for listing windows: {e}")
     
     return windows
 
+def _get_xdotool_window(window_id):
+    """
+    Read the title and PID of one window with xdotool.
+    Returns a (window_id, title, pid) tuple.
+    """
+    name_output = subprocess.run(
+        ["xdotool", "getwindowname", window_id], 
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    pid_output = subprocess.run(
+        ["xdotool", "getwindowpid", window_id], 
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    
+    window_title = name_output.stdout.strip() if name_output.returncode == 0 else "Unknown"
+    try:
+        pid = int(pid_output.stdout.strip()) if pid_output.returncode == 0 else 0
+    except ValueError:
+        pid = 0
+    return window_id, window_title, pid
+
 def _get_all_windows_with_xdotool():
     """
     Get all windows using xdotool.
@@ -489,14 +570,7 @@ def _get_all_windows_with_xdotool():
     
     try:
         # Check if xdotool is installed
-        xdotool_check = subprocess.run(
-            ["which", "xdotool"], 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        if xdotool_check.returncode == 0:
+        if shutil.which("xdotool"):
             # Get window list
             window_list_output = subprocess.run(
                 ["xdotool", "search", "--onlyvisible", "--name", ""], 
@@ -506,51 +580,24 @@ def _get_all_windows_with_xdotool():
             )
             
             if window_list_output.returncode == 0 and window_list_output.stdout.strip():
-                window_ids = window_list_output.stdout.strip().split('\n')
+                window_ids = [w.strip() for w in window_list_output.stdout.strip().split('\n') if w.strip()]
                 
-                for window_id in window_ids:
-                    if not window_id.strip():
-                        continue
-                        
-                    # Get window name/title
-                    name_output = subprocess.run(
-                        ["xdotool", "getwindowname", window_id], 
-                        stdout=subprocess.PIPE, 
-                        stderr=subprocess.PIPE,
-                        text=True
-                    )
-                    
-                    # Try to get PID
-                    try:
-                        pid_output = subprocess.run(
-                            ["xdotool", "getwindowpid", window_id], 
-                            stdout=subprocess.PIPE, 
-                            stderr=subprocess.PIPE,
-                            text=True
-                        )
-                        
-                        window_title = name_output.stdout.strip() if name_output.returncode == 0 else "Unknown"
-                        
-                        if pid_output.returncode == 0:
-                            pid = int(pid_output.stdout.strip())
-                            try:
-                                process = psutil.Process(pid)
-                                process_name = process.name()
-                            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                process_name = "Unknown"
-                        else:
-                            pid = 0
-                            process_name = "Unknown"
-                        
-                        if window_title and window_title not in [w["title"] for w in windows]:
-                            windows.append({
-                                "hwnd": window_id,
-                                "title": window_title,
-                                "process_id": pid,
-                                "process_name": process_name
-                            })
-                    except:
-                        pass
+                # xdotool answers one window per call, so run the calls side by side
+                with ThreadPoolExecutor(max_workers=min(XDOTOOL_WORKERS, len(window_ids))) as executor:
+                    rows = list(executor.map(_get_xdotool_window, window_ids))
+                
+                prefetch_processes(pid for _, _, pid in rows)
+                
+                seen_titles = set()
+                for window_id, window_title, pid in rows:
+                    if window_title and window_title not in seen_titles:
+                        seen_titles.add(window_title)
+                        windows.append({
+                            "hwnd": window_id,
+                            "title": window_title,
+                            "process_id": pid,
+                            "process_name": get_process_name(pid)
+                        })
     except Exception as e:
         print(f"Error using xdotool for window listing: {e}")
     
@@ -564,37 +611,31 @@ def _get_all_processes_as_windows():
     windows = []
     
     try:
-        # Skip our own process
-        current_pid = os.getpid()
+        seen_titles = set()
         
-        # Get user processes with a GUI (heuristic)
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            if proc.info['pid'] == current_pid:
-                continue
-                
-            try:
-                info = proc.info
-                name = info.get('name', '')
-                cmdline = info.get('cmdline', [])
-                
-                # Skip processes without cmdline (usually system processes)
-                if not cmdline:
-                    continue
-                    
-                # Create a descriptive title
-                cmd_str = ' '.join(cmdline[:2]) if len(cmdline) > 1 else cmdline[0]
-                window_title = f"{name}: {cmd_str[:40]}"
-                
-                # Skip duplicates
-                if window_title and window_title not in [w["title"] for w in windows]:
-                    windows.append({
-                        "hwnd": info['pid'],  # Use PID as handle
-                        "title": window_title,
-                        "process_id": info['pid'],
-                        "process_name": name
-                    })
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
+        # Only the processes of the user's graphical session, kept up to date in the background
+        pids = get_session_pids()
+        prefetch_processes(pids)
+        
+        for pid in pids:
+            info = get_process_info(pid)
+            
+            # Skip processes without cmdline (usually system processes)
+            if not info or not info['cmdline']:
                 continue
+            
+            # Create a descriptive title
+            window_title = _get_process_title(info)
+            
+            # Skip duplicates
+            if window_title and window_title not in seen_titles:
+                seen_titles.add(window_title)
+                windows.append({
+                    "hwnd": pid,  # Use PID as handle
+                    "title": window_title,
+                    "process_id": pid,
+                    "process_name": info['name']
+                })
     except Exception as e:
         print(f"Error listing processes as windows: {e}")
         
@@ -0,0 +1,508 @@
+import os
+import json
+import time
+import socket
+import struct
+import threading
+
+from selit.process_cache import get_process_name, prefetch_processes
+
+# i3-ipc protocol, spoken by sway
+I3_IPC_MAGIC = b'i3-ipc'
+I3_IPC_HEADER = struct.Struct('=6sII')
+I3_IPC_SUBSCRIBE = 2
+I3_IPC_GET_TREE = 4
+I3_IPC_EVENT_MASK = 1 << 31
+I3_IPC_WINDOW_EVENT = I3_IPC_EVENT_MASK | 3
+
+# Hyprland events that change the focused window or its title
+HYPRLAND_FOCUS_EVENTS = {'activewindow', 'activewindowv2', 'windowtitle', 'windowtitlev2'}
+HYPRLAND_WINDOW_LIST_EVENTS = {'openwindow', 'closewindow'}
+
+# Seconds to wait for a compositor reply
+SOCKET_TIMEOUT = 2.0
+
+# Seconds to wait before trying to reach the compositor again after a failed connection
+RECONNECT_DELAY = 5.0
+
+_connection = None
+_connection_lock = threading.Lock()
+_connection_failed_at = 0.0
+
+_focus_tracker = None
+_focus_tracker_lock = threading.Lock()
+
+
+def get_sway_socket_path():
+    """Get the sway IPC socket of the current session, or None if sway is not running."""
+    path = os.environ.get('SWAYSOCK')
+    return path if path and os.path.exists(path) else None
+
+def get_hyprland_socket_dir():
+    """Get the Hyprland socket directory of the current session, or None if Hyprland is not running."""
+    signature = os.environ.get('HYPRLAND_INSTANCE_SIGNATURE')
+    if not signature:
+        return None
+
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR', f"/run/user/{os.getuid()}")
+    for base in (os.path.join(runtime_dir, 'hypr'), '/tmp/hypr'):
+        path = os.path.join(base, signature)
+        if os.path.exists(os.path.join(path, '.socket.sock')):
+            return path
+    return None
+
+def detect_compositor():
+    """
+    Find out which supported Wayland compositor selit runs under.
+
+    Returns:
+        str: 'sway' or 'hyprland', or None if neither is reachable
+    """
+    if get_sway_socket_path():
+        return 'sway'
+    if get_hyprland_socket_dir():
+        return 'hyprland'
+    return None
+
+def _unique_titles(items, key):
+    """Keep the first of the windows that share a title, skipping untitled ones."""
+    seen_titles = set()
+    unique = []
+    for item in items:
+        title = item.get(key)
+        if title and title not in seen_titles:
+            seen_titles.add(title)
+            unique.append(item)
+    return unique
+
+def _get_window_info(hwnd, title, pid):
+    """Build the window info dict used across selit."""
+    return {
+        "hwnd": hwnd,
+        "title": title,
+        "process_id": pid,
+        "process_name": get_process_name(pid),
+    }
+
+
+class SwayConnection:
+    """A connection to sway's IPC socket."""
+
+    def __init__(self, path):
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(SOCKET_TIMEOUT)
+        try:
+            self.sock.connect(path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.alive = True
+        self._lock = threading.Lock()
+
+    def send(self, message_type, payload=b''):
+        """Send one message."""
+        self.sock.sendall(I3_IPC_HEADER.pack(I3_IPC_MAGIC, len(payload), message_type) + payload)
+
+    def receive(self):
+        """
+        Read one message.
+
+        Returns:
+            tuple: (message type, decoded JSON payload)
+        """
+        magic, length, message_type = I3_IPC_HEADER.unpack(self._read_exactly(I3_IPC_HEADER.size))
+        if magic != I3_IPC_MAGIC:
+            raise OSError("Unexpected reply from sway")
+        return message_type, json.loads(self._read_exactly(length))
+
+    def request(self, message_type, payload=b''):
+        """Send a message and wait for its reply."""
+        with self._lock:
+            try:
+                self.send(message_type, payload)
+                while True:
+                    reply_type, reply = self.receive()
+                    # Events are only delivered to subscribed connections, but skip them anyway
+                    if not reply_type & I3_IPC_EVENT_MASK:
+                        return reply
+            except (OSError, ValueError):
+                self.close()
+                raise
+
+    def get_tree(self):
+        """Get the layout tree of all outputs, workspaces and windows."""
+        return self.request(I3_IPC_GET_TREE)
+
+    def subscribe(self, events):
+        """Subscribe this connection to a list of event names."""
+        reply = self.request(I3_IPC_SUBSCRIBE, json.dumps(events).encode())
+        if not reply.get('success'):
+            raise OSError("sway refused the event subscription")
+
+    def get_active_window(self):
+        """
+        Get the focused window.
+
+        Returns:
+            dict: Window info, or None if no window has focus
+        """
+        for node in _iter_sway_windows(self.get_tree()):
+            if node.get('focused'):
+                return _get_sway_window_info(node)
+        return None
+
+    def list_windows(self):
+        """
+        List all windows.
+
+        Returns:
+            list: Window info dicts with unique titles
+        """
+        nodes = _unique_titles(_iter_sway_windows(self.get_tree()), 'name')
+        prefetch_processes(node.get('pid') for node in nodes)
+        return [_get_sway_window_info(node) for node in nodes]
+
+    def fileno(self):
+        """The socket, for select()."""
+        return self.sock.fileno()
+
+    def close(self):
+        """Close the connection."""
+        self.alive = False
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def _read_exactly(self, length):
+        """Read a given number of bytes from the socket."""
+        data = b''
+        while len(data) < length:
+            chunk = self.sock.recv(length - len(data))
+            if not chunk:
+                raise OSError("sway closed the connection")
+            data += chunk
+        return data
+
+
+def _iter_sway_windows(node):
+    """Walk a sway layout tree and yield the nodes that are windows."""
+    children = node.get('nodes', []) + node.get('floating_nodes', [])
+    # Only views, the leaves that hold an application window, have a PID
+    if node.get('type') in ('con', 'floating_con') and node.get('pid') is not None:
+        yield node
+    for child in children:
+        yield from _iter_sway_windows(child)
+
+def _get_sway_window_info(node):
+    """Build window info from a sway layout node."""
+    return _get_window_info(node.get('id'), node.get('name') or "", node.get('pid'))
+
+
+class HyprlandConnection:
+    """
+    Talks to Hyprland's request socket.
+
+    Hyprland answers one request per connection and closes it, so every request
+    opens the socket anew. Both are local and take well under a millisecond.
+    """
+
+    def __init__(self, socket_dir):
+        self.socket_dir = socket_dir
+        self.path = os.path.join(socket_dir, '.socket.sock')
+        self.alive = os.path.exists(self.path)
+
+    def request(self, command):
+        """
+        Send a command and read the whole reply.
+
+        Args:
+            command (str): A hyprctl command such as 'j/activewindow'
+
+        Returns:
+            The decoded JSON reply
+        """
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(SOCKET_TIMEOUT)
+                sock.connect(self.path)
+                sock.sendall(command.encode())
+                chunks = []
+                while True:
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            return json.loads(b''.join(chunks))
+        except (OSError, ValueError):
+            self.alive = os.path.exists(self.path)
+            raise
+
+    def get_active_window(self):
+        """
+        Get the focused window.
+
+        Returns:
+            dict: Window info, or None if no window has focus
+        """
+        client = self.request('j/activewindow')
+        if not client or not client.get('address'):
+            return None
+        return _get_hyprland_window_info(client)
+
+    def list_windows(self):
+        """
+        List all mapped windows.
+
+        Returns:
+            list: Window info dicts with unique titles
+        """
+        clients = _unique_titles((client for client in self.request('j/clients') if client.get('mapped', True)), 'title')
+        prefetch_processes(client.get('pid') for client in clients)
+        return [_get_hyprland_window_info(client) for client in clients]
+
+    def open_event_socket(self):
+        """Connect to Hyprland's event socket, which streams one 'event>>data' line per event."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(os.path.join(self.socket_dir, '.socket2.sock'))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def close(self):
+        """Nothing stays open between requests."""
+        self.alive = False
+
+
+def _get_hyprland_window_info(client):
+    """Build window info from a Hyprland client description."""
+    return _get_window_info(client.get('address'), client.get('title') or "", client.get('pid'))
+
+def _connect():
+    """Open a connection to the detected compositor, or return None."""
+    compositor = detect_compositor()
+    if compositor == 'sway':
+        return SwayConnection(get_sway_socket_path())
+    if compositor == 'hyprland':
+        return HyprlandConnection(get_hyprland_socket_dir())
+    return None
+
+
+class FocusTracker:
+    """
+    Keeps the focused window's details in memory, updated from compositor events.
+
+    sway pushes window events (focus, title, new, close) to a subscribed
+    connection. Hyprland streams events on a second socket; on a focus or title
+    event the focused window is read once from the request socket.
+    """
+
+    def __init__(self, connection):
+        """
+        Args:
+            connection (SwayConnection or HyprlandConnection): A connection used only by this tracker
+        """
+        self.connection = connection
+        self.running = False
+        self.thread = None
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._listeners = []
+        self._events = None
+
+    def start(self):
+        """Subscribe to focus changes and start the background thread."""
+        if isinstance(self.connection, SwayConnection):
+            self.connection.subscribe(['window'])
+        else:
+            self._events = self.connection.open_event_socket()
+        self._refresh()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='selit-wayland-focus-tracker', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop tracking and close the connection."""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        self.connection.close()
+        if self._events is not None:
+            self._events.close()
+
+    def add_window_list_listener(self, callback):
+        """Call a function (without arguments) whenever windows are opened or closed."""
+        self._listeners.append(callback)
+
+    def is_alive(self):
+        """Check whether snapshots are still being kept up to date."""
+        return self.running and self.thread is not None and self.thread.is_alive()
+
+    def get_snapshot(self):
+        """
+        Get the focused window as last seen.
+
+        Returns:
+            dict: Window info, or None if no window has focus
+        """
+        with self._lock:
+            return dict(self._snapshot) if self._snapshot else None
+
+    def _set_snapshot(self, snapshot):
+        """Replace the focused window's details."""
+        with self._lock:
+            self._snapshot = snapshot
+
+    def _refresh(self):
+        """Read the focused window from the compositor."""
+        if isinstance(self.connection, SwayConnection):
+            # A subscribed connection receives events, a separate one answers the query
+            connection = get_connection()
+            snapshot = connection.get_active_window() if connection else None
+        else:
+            snapshot = self.connection.get_active_window()
+        self._set_snapshot(snapshot)
+
+    def _notify_window_list(self):
+        """Tell the listeners that windows were opened or closed."""
+        for callback in list(self._listeners):
+            callback()
+
+    def _run(self):
+        """Apply events until stopped or the compositor goes away."""
+        try:
+            if isinstance(self.connection, SwayConnection):
+                self._run_sway()
+            else:
+                self._run_hyprland()
+        except Exception as e:
+            if self.running:
+                print(f"Error tracking focused window: {e}")
+        finally:
+            self.running = False
+
+    def _run_sway(self):
+        """Apply sway window events."""
+        # Block without a timeout, events can be minutes apart
+        self.connection.sock.settimeout(None)
+        while self.running:
+            message_type, event = self.connection.receive()
+            if message_type != I3_IPC_WINDOW_EVENT:
+                continue
+
+            change = event.get('change')
+            container = event.get('container') or {}
+            if change == 'focus':
+                self._set_snapshot(_get_sway_window_info(container))
+            elif change == 'title' and container.get('focused'):
+                self._set_snapshot(_get_sway_window_info(container))
+            elif change in ('new', 'close'):
+                if change == 'close' and container.get('focused'):
+                    self._set_snapshot(None)
+                self._notify_window_list()
+
+    def _run_hyprland(self):
+        """Apply Hyprland events, one 'event>>data' line each."""
+        buffer = b''
+        while self.running:
+            chunk = self._events.recv(65536)
+            if not chunk:
+                raise OSError("Hyprland closed the event socket")
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+
+            names = {line.split(b'>>', 1)[0].decode(errors='replace') for line in lines}
+            if names & HYPRLAND_FOCUS_EVENTS:
+                self._refresh()
+            if names & HYPRLAND_WINDOW_LIST_EVENTS:
+                self._notify_window_list()
+
+
+def get_connection():
+    """
+    Get the shared compositor connection, opening it on first use.
+
+    Returns:
+        SwayConnection or HyprlandConnection: The connection, or None if no supported compositor is reachable
+    """
+    global _connection, _connection_failed_at
+
+    if _connection is not None and _connection.alive:
+        return _connection
+
+    with _connection_lock:
+        if _connection is not None and _connection.alive:
+            return _connection
+        # Do not hammer an unreachable compositor on every lookup
+        if time.monotonic() - _connection_failed_at < RECONNECT_DELAY:
+            return None
+
+        try:
+            _connection = _connect()
+        except OSError as e:
+            print(f"Error connecting to the Wayland compositor: {e}")
+            _connection = None
+        if _connection is None:
+            _connection_failed_at = time.monotonic()
+        return _connection
+
+def get_active_window_info():
+    """
+    Get the active window from the compositor.
+
+    Returns:
+        dict: Window info, or None if no supported compositor is reachable or no window has focus
+    """
+    tracker = get_focus_tracker()
+    if tracker is not None:
+        return tracker.get_snapshot()
+
+    connection = get_connection()
+    if connection is None:
+        return None
+    return connection.get_active_window()
+
+def list_windows():
+    """
+    List all windows known to the compositor.
+
+    Returns:
+        list: Window info dicts, or None if no supported compositor is reachable
+    """
+    connection = get_connection()
+    if connection is None:
+        return None
+    return connection.list_windows()
+
+def start_focus_tracker():
+    """
+    Start the shared focus tracker if a supported compositor is reachable.
+
+    Returns:
+        FocusTracker: The running tracker, or None if there is nothing to track
+    """
+    global _focus_tracker
+
+    with _focus_tracker_lock:
+        if _focus_tracker is not None and _focus_tracker.is_alive():
+            return _focus_tracker
+
+        try:
+            # The tracker blocks on its own socket, so it gets a dedicated connection
+            connection = _connect()
+            if connection is None:
+                return None
+            _focus_tracker = FocusTracker(connection)
+            _focus_tracker.start()
+        except (OSError, ValueError) as e:
+            print(f"Error starting Wayland focus tracker: {e}")
+            _focus_tracker = None
+        return _focus_tracker
+
+def get_focus_tracker():
+    """Get the shared focus tracker if it is running, otherwise None."""
+    tracker = _focus_tracker
+    return tracker if tracker is not None and tracker.is_alive() else None
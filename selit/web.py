@@ -1,29 +1,175 @@
 import os
 import platform
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, get_flashed_messages, jsonify, Response, stream_with_context, stream_template, make_response, session, send_from_directory
 from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, SubmitField, HiddenField, SelectField, RadioField
-from wtforms.validators import DataRequired
+from wtforms import StringField, TextAreaField, SubmitField, HiddenField, SelectField, RadioField, IntegerField
+from wtforms.validators import DataRequired, NumberRange
 import threading
 import datetime
+import hashlib
 import json
+import mimetypes
 
 if platform.system() == 'Windows':
     import win32gui
     import win32process
 
-from selit.main import ConfigManager, PromptManager, GeminiAPI, OpenAIAPI, DeepSeekAPI, ClipboardMonitor, process_call
+from selit.main import get_config_manager, get_prompt_manager, GeminiAPI, OpenAIAPI, DeepSeekAPI, ClipboardMonitor, process_call
 from selit.utils import get_window_info
-from selit.history_logger import get_call_history, generate_day_summary, get_history_dir
+from selit.window_list import window_list_cache
+from selit.history_analyzer import get_day_analysis, get_day_content_hash
+from selit.events import event_bus, HISTORY_TOPIC
+from selit.jobs import job_runner, get_job_topic, report_progress, QUEUED
+from selit.metrics import registry, job_queue_depth, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from selit.tracing import get_trace_dir, get_trace_files, is_enabled as is_tracing_enabled
+from selit.profiling import event_profiler, get_profile_dir, list_profiles
+from selit.assets import DIST_DIR, get_built_name, find_variant
+from selit.compression import negotiate_encoding, iter_encoded
+from selit.history_logger import generate_day_summary, get_history_entries, get_history_entry, get_history_entry_count, export_history, get_log_file_for_date, iter_recent_history
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
 app.template_folder = os.path.join(os.path.dirname(__file__), 'templates')
 app.static_folder = os.path.join(os.path.dirname(__file__), 'static')
 
-# Initialize managers
-config_manager = ConfigManager()
-prompt_manager = PromptManager()
+# Production server defaults
+SERVER_THREADS = 8
+SERVER_TIMEOUT = 120
+SERVER_CONNECTION_LIMIT = 100
+
+# Seconds between keep-alive comments on idle event streams, a closed tab frees its thread at the next one
+STREAM_HEARTBEAT_INTERVAL = 5
+
+# Every open event stream holds a server thread, this many are always left for pages and API calls
+STREAM_RESERVED_THREADS = 4
+
+# Limits the open event streams under the production server, None when every request gets its own thread
+_stream_slots = None
+
+# Cache-Control of responses that can change, and of past days that never do
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+# Built assets have content-hashed names, so browsers can keep them forever
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Changes the ETags on every start, so pages rendered by older code are not reused
+ETAG_SALT = os.urandom(4).hex()
+
+def _get_file_validators(paths):
+    """
+    Build an ETag and Last-Modified time from the size and modification time of files.
+
+    Only the files are stat'ed, none is read.
+
+    Args:
+        paths (iterable): Files the response is built from; missing ones count too
+
+    Returns:
+        tuple: (ETag string, Last-Modified datetime or None if no file exists)
+    """
+    parts = [ETAG_SALT]
+    latest = None
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            parts.append('-')
+            continue
+        parts.append(f'{stat.st_mtime_ns:x}.{stat.st_size:x}')
+        latest = max(latest or 0, stat.st_mtime)
+    
+    etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+    last_modified = datetime.datetime.fromtimestamp(latest, datetime.timezone.utc) if latest is not None else None
+    return etag, last_modified
+
+def _is_not_modified(etag, last_modified):
+    """Check whether the client's cached copy, described by its request validators, is still current."""
+    # If-None-Match is exact, it takes precedence over the one-second resolution of If-Modified-Since
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def _with_validators(response, etag, last_modified, cache_control=REVALIDATE_CACHE_CONTROL):
+    """Attach the validators and caching policy to a response."""
+    response = make_response(response)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def _render_conditional(page, etag, last_modified):
+    """
+    Answer a page request that can be revalidated, rendering it only if needed.
+
+    Flashed messages are shown once, so pages with pending ones are always
+    rendered and never stored, otherwise a later 304 would show them again.
+
+    Args:
+        page (callable): Renders the page with _stream_page
+        etag (str): The page's ETag, before the content coding is added
+        last_modified (datetime.datetime): The page's Last-Modified time
+    """
+    if '_flashes' in session:
+        response = make_response(page())
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    
+    # Identity, gzip and br bodies are different representations, a strong ETag must tell them apart.
+    # _stream_page negotiates the same encoding.
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding:
+        etag = f'{etag}-{encoding}'
+    
+    if _is_not_modified(etag, last_modified):
+        return _not_modified(etag, last_modified)
+    return _with_validators(page(), etag, last_modified)
+
+def _stream_page(template_name, **context):
+    """
+    Render a template while it is being sent, compressed if the client accepts it.
+
+    Nothing waits for the whole page, and with an iterator in the context only the
+    part being rendered is held in memory.
+    """
+    # The session cookie is saved before the body is rendered, so pending flashed messages
+    # are taken out of the session now. The template gets them from the request's cache.
+    get_flashed_messages()
+
+    encoding = negotiate_encoding(request.accept_encodings)
+    response = Response(iter_encoded(stream_template(template_name, **context), encoding), mimetype='text/html')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def _not_modified(etag, last_modified, cache_control=REVALIDATE_CACHE_CONTROL):
+    """Answer a conditional request whose cached copy is still current."""
+    return _with_validators(Response(status=304), etag, last_modified, cache_control)
+
+@app.template_global()
+def asset_url(source):
+    """URL of a static asset's fingerprinted build, or of the source itself if it was not built."""
+    built_name = get_built_name(source)
+    if built_name is None:
+        return url_for('static', filename=source)
+    return url_for('asset', filename=built_name)
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """Serve a built asset, precompressed if the client accepts it."""
+    variant, encoding = find_variant(filename, request.accept_encodings)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    
+    response = send_from_directory(DIST_DIR, variant, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    return response
 
 # Register template filters
 @app.template_filter('datetime')
@@ -76,29 +222,46 @@ class DeleteKeywordTriggerForm(FlaskForm):
     keyword = HiddenField('Keyword', validators=[DataRequired()])
     submit = SubmitField('Delete')
 
+class ProfileForm(FlaskForm):
+    events = IntegerField('Clipboard events to profile', default=5, validators=[NumberRange(min=0, max=1000)])
+    submit = SubmitField('Start Profiling')
+
 def get_all_windows():
     """Get a list of all visible windows with their titles and process names."""
     return get_window_info(get_active_only=False)
 
 @app.route('/')
 def index():
-    # Get today's call history for the dashboard
-    today_history = get_call_history(days=1)
-    
-    return render_template('index.html', 
-                          api_key=config_manager.get_api_key(),
-                          openai_api_key=config_manager.get_openai_api_key(),
-                          deepseek_api_key=config_manager.get_deepseek_api_key(),
-                          ai_service=config_manager.get_ai_service(),
-                          openai_model=config_manager.get_openai_model(),
-                          deepseek_model=config_manager.get_deepseek_model(),
-                          trigger_word=config_manager.get_trigger_word(),
-                          default_prompt=config_manager.get_default_prompt(),
-                          prompts=prompt_manager.prompts,
-                          today_history=today_history)
+    # The dashboard shows today's history, the configuration and the prompts
+    config_manager = get_config_manager()
+    prompt_manager = get_prompt_manager()
+    etag, last_modified = _get_file_validators([
+        get_log_file_for_date(datetime.datetime.now().date()),
+        config_manager.config_file,
+        prompt_manager.prompts_file
+    ])
+    
+    def render():
+        # The dashboard only shows how many calls were made today, the index knows without parsing them
+        today_count = get_history_entry_count(datetime.datetime.now().date())
+        
+        return _stream_page('index.html', 
+                              api_key=config_manager.get_api_key(),
+                              openai_api_key=config_manager.get_openai_api_key(),
+                              deepseek_api_key=config_manager.get_deepseek_api_key(),
+                              ai_service=config_manager.get_ai_service(),
+                              openai_model=config_manager.get_openai_model(),
+                              deepseek_model=config_manager.get_deepseek_model(),
+                              trigger_word=config_manager.get_trigger_word(),
+                              default_prompt=config_manager.get_default_prompt(),
+                              prompts=prompt_manager.prompts,
+                              today_count=today_count)
+    
+    return _render_conditional(render, etag, last_modified)
 
 @app.route('/settings', methods=['GET', 'POST'])
 def settings():
+    config_manager = get_config_manager()
     form = ConfigForm()
     
     if request.method == 'GET':
@@ -112,22 +275,27 @@ def settings():
         form.default_prompt.data = config_manager.get_default_prompt()
     
     if form.validate_on_submit():
-        config_manager.set_ai_service(form.ai_service.data)
-        config_manager.set_api_key(form.api_key.data)
-        config_manager.set_openai_api_key(form.openai_api_key.data)
-        config_manager.set_openai_model(form.openai_model.data)
-        config_manager.set_deepseek_api_key(form.deepseek_api_key.data)
-        config_manager.set_deepseek_model(form.deepseek_model.data)
-        config_manager.set_trigger_word(form.trigger_word.data)
-        config_manager.set_default_prompt(form.default_prompt.data)
-        config_manager._save_config()
-        flash('Settings updated successfully!', 'success')
-        return redirect(url_for('index'))
+        # One validated, atomic write for the whole form
+        updated = config_manager.update(
+            ai_service=form.ai_service.data,
+            api_key=form.api_key.data,
+            openai_api_key=form.openai_api_key.data,
+            openai_model=form.openai_model.data,
+            deepseek_api_key=form.deepseek_api_key.data,
+            deepseek_model=form.deepseek_model.data,
+            trigger_word=form.trigger_word.data,
+            default_prompt=form.default_prompt.data
+        )
+        if updated:
+            flash('Settings updated successfully!', 'success')
+            return redirect(url_for('index'))
+        flash('Failed to save settings.', 'danger')
     
     return render_template('settings.html', form=form)
 
 @app.route('/prompts', methods=['GET'])
 def prompts():
+    prompt_manager = get_prompt_manager()
     prompt_form = PromptForm()
     delete_form = DeletePromptForm()
     keyword_trigger_form = KeywordTriggerForm()
@@ -152,6 +320,7 @@ def add_keyword_trigger_page():
 
 @app.route('/prompts/add', methods=['POST'])
 def add_prompt():
+    prompt_manager = get_prompt_manager()
     form = PromptForm()
     if form.validate_on_submit():
         window_identifier = form.window_identifier.data
@@ -162,6 +331,7 @@ def add_prompt():
 
 @app.route('/prompts/edit/<window_id>', methods=['GET'])
 def edit_prompt(window_id):
+    prompt_manager = get_prompt_manager()
     form = PromptForm()
     if window_id in prompt_manager.prompts:
         form.window_identifier.data = window_id
@@ -170,6 +340,7 @@ def edit_prompt(window_id):
 
 @app.route('/prompts/update/<window_id>', methods=['POST'])
 def update_prompt(window_id):
+    prompt_manager = get_prompt_manager()
     form = PromptForm()
     if form.validate_on_submit():
         # If window identifier changed, remove the old one
@@ -183,6 +354,7 @@ def update_prompt(window_id):
 
 @app.route('/prompts/delete', methods=['POST'])
 def delete_prompt():
+    prompt_manager = get_prompt_manager()
     form = DeletePromptForm()
     if form.validate_on_submit():
         window_identifier = form.window_identifier.data
@@ -194,6 +366,7 @@ def delete_prompt():
 
 @app.route('/prompts/add_keyword_trigger', methods=['POST'])
 def add_keyword_trigger():
+    prompt_manager = get_prompt_manager()
     form = KeywordTriggerForm()
     if form.validate_on_submit():
         keyword = form.keyword.data
@@ -206,6 +379,7 @@ def add_keyword_trigger():
 
 @app.route('/prompts/delete_keyword_trigger', methods=['POST'])
 def delete_keyword_trigger():
+    prompt_manager = get_prompt_manager()
     form = DeleteKeywordTriggerForm()
     if form.validate_on_submit():
         keyword = form.keyword.data
@@ -218,6 +392,7 @@ def delete_keyword_trigger():
 @app.route('/prompts/edit_keyword_trigger/<keyword>', methods=['GET'])
 def edit_keyword_trigger(keyword):
     """Edit a keyword trigger prompt."""
+    prompt_manager = get_prompt_manager()
     if keyword in prompt_manager.keyword_triggers:
         form = KeywordTriggerForm()
         form.keyword.data = keyword
@@ -230,6 +405,7 @@ def edit_keyword_trigger(keyword):
 @app.route('/prompts/update_keyword_trigger/<keyword>', methods=['POST'])
 def update_keyword_trigger(keyword):
     """Update a keyword trigger prompt."""
+    prompt_manager = get_prompt_manager()
     form = KeywordTriggerForm()
     if form.validate_on_submit():
         new_keyword = form.keyword.data
@@ -258,10 +434,17 @@ def history():
     except ValueError:
         days = 1
     
-    # Get call history
-    call_history = get_call_history(days)
+    # Answer revalidations from the day logs' metadata alone
+    today = datetime.datetime.now().date()
+    etag, last_modified = _get_file_validators(
+        get_log_file_for_date(today - datetime.timedelta(days=i)) for i in range(days)
+    )
+    
+    def render():
+        # Entries are read chunk by chunk while the page is sent
+        return _stream_page('history.html', history=iter_recent_history(days), days=days)
     
-    return render_template('history.html', history=call_history, days=days)
+    return _render_conditional(render, etag, last_modified)
 
 @app.route('/history/summary')
 def history_summary():
@@ -279,13 +462,167 @@ def history_summary():
         # No date specified, use today
         date = datetime.datetime.now().date()
     
+    # Past days are never written to again, today's summary has to be revalidated
+    cache_control = IMMUTABLE_CACHE_CONTROL if date < datetime.datetime.now().date() else REVALIDATE_CACHE_CONTROL
+    etag, last_modified = _get_file_validators([get_log_file_for_date(date)])
+    if _is_not_modified(etag, last_modified):
+        return _not_modified(etag, last_modified, cache_control)
+    
     # Generate summary
     summary = generate_day_summary(date)
     
-    return jsonify(summary)
+    return _with_validators(jsonify(summary), etag, last_modified, cache_control)
+
+@app.route('/history/entries')
+def history_entries():
+    """Return one page of a day's history, decoding only the requested entries."""
+    date_str = request.args.get('date')
+    try:
+        date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else datetime.datetime.now().date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    
+    entries = get_history_entries(date, offset, limit)
+    
+    return jsonify({
+        'date': date.strftime('%Y-%m-%d'),
+        'total': get_history_entry_count(date),
+        'offset': offset,
+        'entries': entries
+    })
+
+@app.route('/history/entry/<date_str>/<int:number>')
+def history_entry(date_str, number):
+    """Return a single history entry by its number within the day."""
+    try:
+        date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    
+    entry = get_history_entry(date, number)
+    if entry is None:
+        return jsonify({'error': 'Entry not found'}), 404
+    
+    return jsonify(entry)
+
+def _open_stream(topic, generate):
+    """
+    Start a Server-Sent Events response if a server thread can be spared for it.
+
+    Refused streams get 204 No Content, which tells EventSource not to reconnect.
+    The pages then simply go without live updates, and jobs are polled instead.
+    Only accepted streams subscribe to the topic, and the subscription is closed
+    with the response, even if the client left before the body was started.
+
+    Args:
+        topic (str): The event bus topic to follow
+        generate (callable): Takes the subscription and returns the generator of the event stream
+
+    Returns:
+        Response: The event stream, or an empty 204 response
+    """
+    slots = _stream_slots
+    if slots is not None and not slots.acquire(blocking=False):
+        return Response(status=204)
+
+    subscription = event_bus.subscribe(topic)
+    response = Response(
+        stream_with_context(generate(subscription)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.call_on_close(subscription.close)
+    if slots is not None:
+        response.call_on_close(slots.release)
+    return response
+
+def _format_history_event(date_str, number, entry):
+    """Encode a history entry as a Server-Sent Event, identified by its day and number."""
+    return f"id: {date_str}:{number}\nevent: entry\ndata: {json.dumps({'date': date_str, 'number': number, 'entry': entry})}\n\n"
+
+@app.route('/history/stream')
+def history_stream():
+    """Push each new history entry to the browser as a Server-Sent Event."""
+    # A reconnecting EventSource sends the id of the last event it received
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    try:
+        last_date_str, last_number = last_event_id.rsplit(':', 1)
+        last_seen = (datetime.date.fromisoformat(last_date_str).isoformat(), int(last_number))
+    except ValueError:
+        last_seen = None
+    
+    def generate(subscription):
+        nonlocal last_seen
+        # Subscribed before catching up, so nothing logged in between is missed
+        yield "retry: 3000\n\n"
+        
+        # Replay what was logged that day while the client was disconnected
+        if last_seen is not None:
+            date_str, number = last_seen
+            date = datetime.date.fromisoformat(date_str)
+            for entry in get_history_entries(date, number + 1):
+                number += 1
+                if entry is not None:
+                    yield _format_history_event(date_str, number, entry)
+            last_seen = (date_str, number)
+        
+        while True:
+            event = subscription.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+            if event is None:
+                # Lets the server notice clients that went away
+                yield ": keep-alive\n\n"
+                continue
+            if last_seen is not None and (event['date'], event['number']) <= last_seen:
+                continue
+            last_seen = (event['date'], event['number'])
+            yield _format_history_event(event['date'], event['number'], event['entry'])
+    
+    return _open_stream(HISTORY_TOPIC, generate)
+
+@app.route('/history/export')
+def history_export():
+    """Stream the call history of a date range as NDJSON or CSV."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': "format must be 'ndjson' or 'csv'"}), 400
+    
+    today = datetime.datetime.now().date()
+    try:
+        start_date = datetime.date.fromisoformat(request.args['start']) if request.args.get('start') else today
+        end_date = datetime.date.fromisoformat(request.args['end']) if request.args.get('end') else today
+        start_time = datetime.time.fromisoformat(request.args['from']) if request.args.get('from') else None
+        end_time = datetime.time.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid date or time, expected YYYY-MM-DD and HH:MM'}), 400
+    
+    if end_date < start_date:
+        return jsonify({'error': 'end must not be before start'}), 400
+    
+    chunks = export_history(
+        fmt, start_date, end_date,
+        app=request.args.get('app') or None,
+        trigger=request.args.get('trigger') or None,
+        start_time=start_time,
+        end_time=end_time
+    )
+    
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/csv'
+    filename = f'selit_history_{start_date}_{end_date}.{fmt}'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 @app.route('/history/summary/analyze', methods=['POST'])
 def analyze_summary():
+    config_manager = get_config_manager()
     # Get the summary data and date from request
     request_data = request.json
     
@@ -304,167 +641,160 @@ def analyze_summary():
         # Invalid date format, default to today
         date = datetime.datetime.now().date()
     
-    # Get the full interaction data for that date
-    history_data = get_detailed_history_for_date(date)
-    
-    # Format the history data and summary into a meaningful text for AI analysis
-    analysis_text = format_detailed_history_for_ai(history_data, request_data)
-    
-    # Determine which AI service to use
+    # Process with the configured AI service
     ai_service = config_manager.get_ai_service()
-    
-    # Prepare the prompt for AI
-    prompt = (
-        "You are an assistant analyzing daily usage patterns of an AI assistant tool called 'Select it!'.\n\n"
-        "Below is a summary of a user's interactions for a day, followed by the detailed list of all interactions "
-        "including input text, output text, and the applications where they were used. "
-        "Please provide two distinct sections in your response:\n\n"
-        
-        "SECTION 1 - USAGE ANALYSIS:\n"
-        "Please analyze the data and provide insights about their usage patterns, including:\n"
-        "1. When they were most active\n"
-        "2. Which applications they used most frequently\n"
-        "3. Common themes or topics in their inputs\n"
-        "4. Patterns in the types of tasks they're using the assistant for\n"
-        "5. Any other interesting observations\n\n"
-        
-        "SECTION 2 - DAILY WORK REPORT:\n"
-        "Based on the interactions and their content, create a professional daily work report that the user could share with their boss. "
-        "This report should:\n"
-        "1. Summarize the main work activities performed today\n"
-        "2. Highlight key accomplishments and progress made\n"
-        "3. Identify the main projects or tasks worked on\n"
-        "4. Be written in a professional first-person tone (as if the user wrote it)\n"
-        "5. Be concise but comprehensive (approximately 150-250 words)\n\n"
-        
-        f"{analysis_text}\n\n"
-        
-        "Format both sections with appropriate headers. For the work report section, focus only on professional work-related activities "
-        "that would be appropriate to share with management, ignoring any personal conversations or activities."
+    if ai_service == 'gemini':
+        api = GeminiAPI()
+    elif ai_service == 'openai':
+        api = OpenAIAPI()
+    elif ai_service == 'deepseek':
+        api = DeepSeekAPI()
+    else:
+        # Default to Gemini if service not recognized
+        api = GeminiAPI()
+    model = f'{ai_service}:{api.model}'
+
+    # Unchanged days are served from the analysis cache, and a reload joins the running job
+    refresh = request.args.get('refresh') == '1'
+    job = job_runner.submit(
+        _analyze_day_job, date, request_data, api, model, refresh,
+        key=f'analyze:{date}:{model}:{get_day_content_hash(date)}', reuse_finished=not refresh
     )
-    
-    try:
-        # Process with the configured AI service
-        if ai_service == 'gemini':
-            api = GeminiAPI()
-            result = api.generate_text(prompt)
-        elif ai_service == 'openai':
-            api = OpenAIAPI()
-            result = api.generate_text(prompt)
-        elif ai_service == 'deepseek':
-            api = DeepSeekAPI()
-            result = api.generate_text(prompt)
+    return _job_response(job)
+
+def _analyze_day_job(date, summary_data, api, model, refresh):
+    """Run the AI analysis of a day in the background."""
+    report_progress('Analyzing interactions')
+    result, cached = get_day_analysis(date, summary_data, api.generate_text, model=model, refresh=refresh)
+    return {'analysis': result, 'cached': cached}
+
+def _job_response(job):
+    """Describe a submitted job and where to follow it."""
+    data = job.to_dict()
+    data['status_url'] = url_for('get_job', job_id=job.id)
+    data['events_url'] = url_for('job_events', job_id=job.id)
+    return jsonify(data), 202
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Poll the status and result of a background job."""
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Follow a background job as Server-Sent Events until it finishes."""
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate(subscription):
+        # Subscribed before reading the state, so a change in between is not missed
+        state = job.to_dict()
+        while True:
+            yield f"event: status\ndata: {json.dumps(state)}\n\n"
+            if state['status'] in ('done', 'failed'):
+                return
+            state = subscription.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+            while state is None:
+                yield ": keep-alive\n\n"
+                state = subscription.get(timeout=STREAM_HEARTBEAT_INTERVAL)
+    
+    return _open_stream(get_job_topic(job_id), generate)
+
+
+@app.route('/diagnostics', methods=['GET'])
+def diagnostics():
+    """Show the trace files and profile reports, and arm the profiler."""
+    trace_dir = get_trace_dir()
+    traces = [(name, os.path.getsize(os.path.join(trace_dir, name))) for name in get_trace_files()]
+    return render_template('diagnostics.html',
+                          form=ProfileForm(),
+                          tracing_enabled=is_tracing_enabled(),
+                          traces=traces,
+                          profiles=list_profiles(),
+                          profiling_remaining=event_profiler.remaining)
+
+@app.route('/diagnostics/profile', methods=['POST'])
+def start_profiling():
+    """Profile the next clipboard events with cProfile and tracemalloc, 0 to cancel."""
+    form = ProfileForm()
+    if form.validate_on_submit():
+        event_profiler.arm(form.events.data)
+        if form.events.data:
+            flash(f'Profiling the next {form.events.data} clipboard events', 'success')
         else:
-            # Default to Gemini if service not recognized
-            api = GeminiAPI()
-            result = api.generate_text(prompt)
-            
-        return jsonify({'analysis': result})
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+            flash('Profiling cancelled', 'success')
+    else:
+        flash('Enter a number of events between 0 and 1000', 'danger')
+    return redirect(url_for('diagnostics'))
+
+@app.route('/diagnostics/traces/<name>')
+def download_trace(name):
+    """Download a trace file, to open in chrome://tracing or Perfetto."""
+    if name not in get_trace_files():
+        return jsonify({'error': 'Trace not found'}), 404
+    return send_from_directory(get_trace_dir(), name, as_attachment=True, mimetype='application/json')
+
+@app.route('/diagnostics/profiles/<name>')
+def view_profile(name):
+    """Show a profile report."""
+    if name not in list_profiles():
+        return jsonify({'error': 'Profile not found'}), 404
+    with open(os.path.join(get_profile_dir(), name), 'r', encoding='utf-8') as f:
+        report = f.read()
+    raw_name = name[:-len('.txt')] + '.prof'
+    has_raw = os.path.exists(os.path.join(get_profile_dir(), raw_name))
+    return render_template('profile_report.html', name=name, report=report, raw_name=raw_name if has_raw else None)
+
+@app.route('/diagnostics/profiles/<name>/raw')
+def download_profile(name):
+    """Download the raw cProfile data of a report, for pstats or snakeviz."""
+    if not name.endswith('.prof') or name[:-len('.prof')] + '.txt' not in list_profiles():
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_from_directory(get_profile_dir(), name, as_attachment=True)
+
+# Read at scrape time, the runner already knows its queue
+job_queue_depth.set_function(lambda: job_runner.count(QUEUED))
+
+@app.route('/metrics')
+def metrics():
+    """Expose the clipboard pipeline's metrics in the Prometheus text format."""
+    return Response(registry.render(), content_type=METRICS_CONTENT_TYPE, headers={'Cache-Control': 'no-store'})
 
 
-def get_detailed_history_for_date(date):
-    """Get detailed history data for a specific date"""
-    date_str = date.strftime('%Y-%m-%d')
-    log_file = os.path.join(get_history_dir(), f'selit_{date_str}.log')
+@app.route('/api/windows', methods=['GET'])
+def get_windows():
+    """
+    API endpoint to get all open windows.
     
-    interactions = []
+    The list comes from a shared snapshot. Clients can revalidate with If-None-Match,
+    or pass ?since=<version> to only get the windows added and removed since then.
+    """
+    since = request.args.get('since', type=int)
+    if since is not None:
+        return jsonify(window_list_cache.diff(since))
     
-    if os.path.exists(log_file):
-        try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        entry = json.loads(line.strip())
-                        interactions.append(entry)
-                    except json.JSONDecodeError:
-                        # Skip invalid lines
-                        continue
-        except Exception as e:
-            print(f"Error reading history from {log_file}: {str(e)}")
-    
-    # Sort by timestamp (oldest first for chronological analysis)
-    interactions.sort(key=lambda x: x.get('timestamp', ''))
-    return interactions
-
-
-def format_detailed_history_for_ai(history_data, summary_data):
-    """Format detailed history and summary data into text for AI analysis"""
-    
-    # Start with a summary section
-    text = "=== DAILY SUMMARY ===\n"
-    text += f"Date: {summary_data['date']}\n"
-    text += f"Total Interactions: {summary_data['total_interactions']}\n"
-    
-    # Add busiest hour if available
-    if summary_data.get('busiest_hour') is not None:
-        hour = summary_data['busiest_hour']
-        text += f"Busiest Hour: {hour}:00 - {hour}:59\n"
-    
-    # Add average lengths
-    text += f"Average Input Length: {summary_data['average_input_length']} characters\n"
-    text += f"Average Output Length: {summary_data['average_output_length']} characters\n\n"
-    
-    # Add applications usage
-    text += "Most Used Applications:\n"
-    for app_name, count in summary_data.get('apps', {}).items():
-        text += f"- {app_name}: {count} interactions\n"
-    
-    # Add hour distribution
-    text += "\nActivity by Hour:\n"
-    for hour, count in summary_data.get('hour_distribution', {}).items():
-        if count > 0:
-            text += f"- {hour}:00 - {hour}:59: {count} interactions\n"
-    
-    # Add detailed interactions
-    text += "\n\n=== DETAILED INTERACTIONS ===\n"
-    
-    for i, entry in enumerate(history_data, 1):
-        timestamp = entry.get('timestamp', '')
-        try:
-            dt = datetime.datetime.fromisoformat(timestamp)
-            formatted_time = dt.strftime('%H:%M:%S')
-        except (ValueError, TypeError):
-            formatted_time = timestamp
-            
-        text += f"\n--- INTERACTION {i} (Time: {formatted_time}) ---\n"
-        
-        # Add window information
-        window = entry.get('window', {})
-        text += f"Application: {window.get('process_name', 'Unknown')}\n"
-        text += f"Window Title: {window.get('title', 'Unknown')}\n"
-        
-        # Add trigger word
-        text += f"Triggered by: {entry.get('trigger_word', 'Unknown')}\n\n"
-        
-        # Add input and output (truncate if too long to avoid hitting context limits)
-        input_text = entry.get('input', '')
-        output_text = entry.get('output', '')
-        
-        # Limit input/output length to 1000 chars if needed
-        max_length = 1000
-        if len(input_text) > max_length:
-            input_text = input_text[:max_length] + "... [truncated]"
-        if len(output_text) > max_length:
-            output_text = output_text[:max_length] + "... [truncated]"
-            
-        text += f"INPUT:\n{input_text}\n\n"
-        text += f"OUTPUT:\n{output_text}\n"
+    version, windows = window_list_cache.get(refresh=request.args.get('refresh') == '1')
+    etag = window_list_cache.get_etag(version)
     
-    return text
-
-
-@app.route('/api/windows', methods=['GET'])
-def get_windows():
-    """API endpoint to get all open windows."""
-    windows = get_all_windows()
-    return jsonify(windows)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(windows)
+    
+    response.set_etag(etag)
+    response.headers['X-Windows-Version'] = str(version)
+    # Let browsers keep the list but always revalidate it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/generate-prompt', methods=['POST'])
 def generate_prompt():
     """Generate a prompt template using AI based on user context."""
+    config_manager = get_config_manager()
     data = request.json
     context = data.get('context', '')
     window_identifier = data.get('window_identifier', '')
@@ -477,70 +807,95 @@ def generate_prompt():
             'message': 'Context is required'
         }), 400
     
-    try:
-        ai_service = config_manager.get_ai_service()
+    ai_service = config_manager.get_ai_service()
+    
+    # Prepare the system prompt for generating a template
+    if is_keyword_trigger:
+        system_prompt = f"""
+        I need to create a prompt template for an AI assistant that will be triggered by a specific keyword. Here's the context:
         
-        # Prepare the system prompt for generating a template
-        if is_keyword_trigger:
-            system_prompt = f"""
-            I need to create a prompt template for an AI assistant that will be triggered by a specific keyword. Here's the context:
-            
-            - Trigger keyword: {keyword}
-            - Use case context: {context}
-            
-            Please generate a well-structured prompt template that will be triggered when this keyword is found in copied text.
-            The template should include placeholder {{text}} where the user's input will be inserted.
-            Make the prompt clear, specific, and optimized for good AI responses related to the keyword "{keyword}".
-            
-            Return ONLY the prompt template text without any explanations or additional text.
-            """
-        else:
-            system_prompt = f"""
-            I need to create a prompt template for an AI assistant. Here's the context:
-            
-            - Application/Window: {window_identifier}
-            - Context: {context}
-            
-            Please generate a well-structured prompt template that I can use for this application.
-            The template should include placeholder {{text}} where the user's input will be inserted.
-            Make the prompt clear, specific, and optimized for good AI responses.
-            
-            Return ONLY the prompt template text without any explanations or additional text.
-            """
+        - Trigger keyword: {keyword}
+        - Use case context: {context}
         
-        if ai_service == "gemini":
-            api = GeminiAPI()
-        elif ai_service == "openai":
-            api = OpenAIAPI()
-        else:  # deepseek
-            api = DeepSeekAPI()
-            
-        result = api.generate_text(system_prompt)
+        Please generate a well-structured prompt template that will be triggered when this keyword is found in copied text.
+        The template should include placeholder {{text}} where the user's input will be inserted.
+        Make the prompt clear, specific, and optimized for good AI responses related to the keyword "{keyword}".
         
-        if result:
-            return jsonify({
-                'success': True,
-                'prompt': result
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': 'Failed to generate prompt template'
-            }), 500
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': f'Error: {str(e)}'
-        }), 500
+        Return ONLY the prompt template text without any explanations or additional text.
+        """
+    else:
+        system_prompt = f"""
+        I need to create a prompt template for an AI assistant. Here's the context:
+        
+        - Application/Window: {window_identifier}
+        - Context: {context}
+        
+        Please generate a well-structured prompt template that I can use for this application.
+        The template should include placeholder {{text}} where the user's input will be inserted.
+        Make the prompt clear, specific, and optimized for good AI responses.
+        
+        Return ONLY the prompt template text without any explanations or additional text.
+        """
+    
+    # A second click while the request is still running joins it, once finished every click asks for a new variant
+    key = 'generate-prompt:' + hashlib.sha256(f'{ai_service}\0{system_prompt}'.encode('utf-8')).hexdigest()
+    job = job_runner.submit(_generate_prompt_job, system_prompt, ai_service, key=key, reuse_finished=False)
+    return _job_response(job)
+
+def _generate_prompt_job(system_prompt, ai_service):
+    """Ask the AI service for a prompt template in the background."""
+    if ai_service == "gemini":
+        api = GeminiAPI()
+    elif ai_service == "openai":
+        api = OpenAIAPI()
+    else:  # deepseek
+        api = DeepSeekAPI()
+    
+    report_progress('Generating prompt template')
+    result = api.generate_text(system_prompt)
+    if not result:
+        raise RuntimeError('Failed to generate prompt template')
+    return {'prompt': result}
+
+def run_web_server(host='127.0.0.1', port=5000, debug=False, server='dev', threads=SERVER_THREADS,
+                   timeout=SERVER_TIMEOUT, connection_limit=SERVER_CONNECTION_LIMIT):
+    """
+    Run the web server for the UI.
+
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        debug (bool): Run Flask in debug mode (development server only)
+        server (str): 'dev' for the Flask development server, 'waitress' for the production server
+        threads (int): Worker threads of the production server. STREAM_RESERVED_THREADS of them
+                       always serve pages, the others also serve live update streams
+        timeout (int): Seconds the production server keeps an idle or stalled connection open,
+                       both between keep-alive requests and while a request is being received
+        connection_limit (int): Simultaneous connections the production server accepts
+    """
+    global _stream_slots
 
-def run_web_server(host='127.0.0.1', port=5000, debug=False):
-    """Run the web server for the UI."""
     # Start clipboard monitor in a background thread
     monitor = ClipboardMonitor(process_call)
     monitor_thread = threading.Thread(target=monitor.monitor_clipboard, daemon=True)
     monitor_thread.start()
     print("Clipboard monitor started in background")
     
+    if server == 'waitress':
+        try:
+            from waitress import serve
+        except ImportError:
+            print("waitress is not installed, run: pip install 'selit[server]'")
+            print("Falling back to the development server")
+        else:
+            stream_threads = max(threads - STREAM_RESERVED_THREADS, 0)
+            _stream_slots = threading.BoundedSemaphore(stream_threads)
+            if not stream_threads:
+                print(f"Live updates are off, they need more than {STREAM_RESERVED_THREADS} threads")
+            serve(app, host=host, port=port, threads=threads, channel_timeout=timeout,
+                  connection_limit=connection_limit, ident='selit')
+            return
+    
     # Run Flask app
     app.run(host=host, port=port, debug=debug)
 
@@ -0,0 +1,116 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from selit.utils import get_window_info
+from selit import wayland, x11
+
+# Seconds a window list snapshot is served before it is enumerated again
+SNAPSHOT_TTL = 2.0
+
+# Number of past versions kept to answer diff requests
+MAX_VERSIONS = 32
+
+
+def _window_key(window):
+    """Identify a window across snapshots."""
+    return (str(window.get('hwnd')), window.get('title'), window.get('process_id'))
+
+
+class WindowListCache:
+    """
+    A versioned snapshot of the open windows.
+
+    The snapshot is re-enumerated when it is older than its TTL or when a
+    focus tracker reports that windows were opened or closed. The version only
+    changes when the list itself changes, so clients can revalidate with an ETag
+    or ask for the windows added and removed since a version they already have.
+    """
+
+    def __init__(self, ttl=SNAPSHOT_TTL, max_versions=MAX_VERSIONS):
+        self.ttl = ttl
+        self.max_versions = max_versions
+        # Distinguishes versions of different server runs in ETags
+        self.instance = os.urandom(4).hex()
+        self.version = 0
+        self._windows = []
+        self._refreshed_at = 0.0
+        self._stale = True
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+        self._trackers = []
+
+    def invalidate(self):
+        """Force the next read to enumerate windows again."""
+        self._stale = True
+
+    def get(self, refresh=False):
+        """
+        Get the current window list.
+
+        Args:
+            refresh (bool): Enumerate again even if the snapshot is still fresh
+
+        Returns:
+            tuple: (version, list of window info dicts)
+        """
+        self._watch_window_events()
+
+        with self._lock:
+            if refresh or self._stale or time.monotonic() - self._refreshed_at > self.ttl:
+                self._stale = False
+                windows = get_window_info(get_active_only=False)
+                self._refreshed_at = time.monotonic()
+
+                if windows != self._windows or not self._versions:
+                    self.version += 1
+                    self._windows = windows
+                    self._versions[self.version] = OrderedDict((_window_key(w), w) for w in windows)
+                    while len(self._versions) > self.max_versions:
+                        self._versions.popitem(last=False)
+
+            return self.version, self._windows
+
+    def get_etag(self, version):
+        """Get the entity tag for a version of the list."""
+        return f"windows-{self.instance}-{version}"
+
+    def diff(self, since_version):
+        """
+        Describe how the window list changed since a given version.
+
+        Args:
+            since_version (int): A version the client already has
+
+        Returns:
+            dict: 'version', 'added' and 'removed' lists; if the version is no longer
+                  known, 'full' is True and 'windows' holds the complete list instead
+        """
+        version, windows = self.get()
+
+        with self._lock:
+            previous = self._versions.get(since_version)
+            current = self._versions.get(version)
+
+        if previous is None or current is None:
+            return {'version': version, 'full': True, 'windows': windows}
+
+        return {
+            'version': version,
+            'full': False,
+            'added': [w for key, w in current.items() if key not in previous],
+            'removed': [w for key, w in previous.items() if key not in current],
+        }
+
+    def _watch_window_events(self):
+        """Subscribe to window list changes once a focus tracker is running."""
+        self._trackers = [tracker for tracker in self._trackers if tracker.is_alive()]
+        for tracker in (wayland.get_focus_tracker(), x11.get_focus_tracker()):
+            if tracker is not None and not any(tracker is known for known in self._trackers):
+                tracker.add_window_list_listener(self.invalidate)
+                self._trackers.append(tracker)
+
+
+# Shared by the web UI
+window_list_cache = WindowListCache()
@@ -0,0 +1,693 @@
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import threading
+
+from selit.process_cache import get_process_name, prefetch_processes
+
+# Xlib constants
+SUCCESS = 0
+ANY_PROPERTY_TYPE = 0
+NO_EVENT_MASK = 0
+PROPERTY_CHANGE_MASK = 1 << 22
+PROPERTY_NOTIFY = 28
+# XEventsQueued mode that only counts events Xlib has already read from the socket
+QUEUED_ALREADY = 0
+
+# Seconds to wait before trying to reach the X server again after a failed connection
+RECONNECT_DELAY = 5.0
+
+_xlib = None
+_xlib_loaded = False
+_xlib_lock = threading.Lock()
+
+# XCB underneath Xlib, to send many requests before reading their replies
+_xcb = None
+_xcb_loaded = False
+
+# Keep references to the C callbacks so they are not garbage collected
+_error_handler = None
+_io_error_exit_handler = None
+
+_last_error = threading.local()
+
+_display = None
+_display_lock = threading.Lock()
+_display_failed_at = 0.0
+
+# Every open connection, so a lost server can be flagged on all of them
+_open_displays = []
+
+_focus_tracker = None
+_focus_tracker_lock = threading.Lock()
+
+
+def _load_xlib():
+    """
+    Load libX11 and declare the functions used here.
+
+    Returns:
+        The ctypes library handle, or None if libX11 is not available
+    """
+    global _xlib, _xlib_loaded, _error_handler, _io_error_exit_handler
+
+    with _xlib_lock:
+        if _xlib_loaded:
+            return _xlib
+        _xlib_loaded = True
+
+        library_path = ctypes.util.find_library('X11')
+        if not library_path:
+            return None
+
+        try:
+            xlib = ctypes.CDLL(library_path)
+        except OSError as e:
+            print(f"Error loading libX11: {e}")
+            return None
+
+        xlib.XInitThreads.restype = ctypes.c_int
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        xlib.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+        xlib.XInternAtom.restype = ctypes.c_ulong
+        xlib.XGetWindowProperty.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_long, ctypes.c_long,
+            ctypes.c_int, ctypes.c_ulong,
+            ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_int),
+            ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong),
+            ctypes.POINTER(ctypes.POINTER(ctypes.c_ubyte)),
+        ]
+        xlib.XGetWindowProperty.restype = ctypes.c_int
+        xlib.XFree.argtypes = [ctypes.c_void_p]
+        xlib.XSelectInput.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_long]
+        xlib.XFlush.argtypes = [ctypes.c_void_p]
+        xlib.XPending.argtypes = [ctypes.c_void_p]
+        xlib.XPending.restype = ctypes.c_int
+        xlib.XEventsQueued.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XEventsQueued.restype = ctypes.c_int
+        xlib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        xlib.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        xlib.XConnectionNumber.restype = ctypes.c_int
+
+        # Several connections are used from different threads
+        xlib.XInitThreads()
+
+        # The default error handler terminates the process on errors such as BadWindow,
+        # which happen whenever a window closes between two requests
+        error_handler_type = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+        def on_error(display, event):
+            _last_error.failed = True
+            return 0
+
+        _error_handler = error_handler_type(on_error)
+        xlib.XSetErrorHandler.argtypes = [error_handler_type]
+        xlib.XSetErrorHandler(_error_handler)
+
+        # libX11 >= 1.7 lets a lost server connection be survived instead of calling exit()
+        if hasattr(xlib, 'XSetIOErrorExitHandler'):
+            io_exit_handler_type = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p)
+
+            def on_io_error_exit(display, user_data):
+                _forget_display(display)
+
+            _io_error_exit_handler = io_exit_handler_type(on_io_error_exit)
+            xlib.XSetIOErrorExitHandler.argtypes = [ctypes.c_void_p, io_exit_handler_type, ctypes.c_void_p]
+
+        _xlib = xlib
+        return _xlib
+
+
+class XcbCookie(ctypes.Structure):
+    """Identifies a sent XCB request whose reply is read later."""
+    _fields_ = [('sequence', ctypes.c_uint)]
+
+
+class XcbGetPropertyReply(ctypes.Structure):
+    """The fixed part of a GetProperty reply, the value follows it."""
+    _fields_ = [
+        ('response_type', ctypes.c_uint8),
+        ('format', ctypes.c_uint8),
+        ('sequence', ctypes.c_uint16),
+        ('length', ctypes.c_uint32),
+        ('type', ctypes.c_uint32),
+        ('bytes_after', ctypes.c_uint32),
+        ('value_len', ctypes.c_uint32),
+        ('pad0', ctypes.c_uint8 * 12),
+    ]
+
+
+def _load_xcb():
+    """
+    Load libxcb and libX11-xcb and declare the functions used here.
+
+    Returns:
+        A namespace of the ctypes functions, or None if either library is not available
+    """
+    global _xcb, _xcb_loaded
+
+    with _xlib_lock:
+        if _xcb_loaded:
+            return _xcb
+        _xcb_loaded = True
+
+        paths = [ctypes.util.find_library(name) for name in ('xcb', 'X11-xcb', 'c')]
+        if not all(paths):
+            return None
+        try:
+            xcb, x11_xcb, libc = (ctypes.CDLL(path) for path in paths)
+        except OSError:
+            return None
+
+        x11_xcb.XGetXCBConnection.argtypes = [ctypes.c_void_p]
+        x11_xcb.XGetXCBConnection.restype = ctypes.c_void_p
+        xcb.xcb_get_property.argtypes = [
+            ctypes.c_void_p, ctypes.c_uint8, ctypes.c_uint32, ctypes.c_uint32,
+            ctypes.c_uint32, ctypes.c_uint32, ctypes.c_uint32,
+        ]
+        xcb.xcb_get_property.restype = XcbCookie
+        xcb.xcb_get_property_reply.argtypes = [ctypes.c_void_p, XcbCookie, ctypes.POINTER(ctypes.c_void_p)]
+        xcb.xcb_get_property_reply.restype = ctypes.POINTER(XcbGetPropertyReply)
+        xcb.xcb_get_property_value.argtypes = [ctypes.POINTER(XcbGetPropertyReply)]
+        xcb.xcb_get_property_value.restype = ctypes.c_void_p
+        xcb.xcb_get_property_value_length.argtypes = [ctypes.POINTER(XcbGetPropertyReply)]
+        xcb.xcb_get_property_value_length.restype = ctypes.c_int
+        libc.free.argtypes = [ctypes.c_void_p]
+
+        xcb.XGetXCBConnection = x11_xcb.XGetXCBConnection
+        xcb.free = libc.free
+        _xcb = xcb
+        return _xcb
+
+
+class XPropertyEvent(ctypes.Structure):
+    """The PropertyNotify member of the XEvent union."""
+    _fields_ = [
+        ('type', ctypes.c_int),
+        ('serial', ctypes.c_ulong),
+        ('send_event', ctypes.c_int),
+        ('display', ctypes.c_void_p),
+        ('window', ctypes.c_ulong),
+        ('atom', ctypes.c_ulong),
+        ('time', ctypes.c_ulong),
+        ('state', ctypes.c_int),
+    ]
+
+
+class XEvent(ctypes.Union):
+    """Storage large enough for any X event (Xlib pads the union to 24 longs)."""
+    _fields_ = [
+        ('type', ctypes.c_int),
+        ('xproperty', XPropertyEvent),
+        ('pad', ctypes.c_long * 24),
+    ]
+
+
+class X11Display:
+    """A connection to the X server that reads window properties directly."""
+
+    def __init__(self, xlib, display_name=None):
+        """
+        Open a connection to the X server.
+
+        Args:
+            xlib: The library handle returned by _load_xlib
+            display_name (str, optional): The display to connect to. Defaults to $DISPLAY.
+
+        Raises:
+            OSError: If the display cannot be opened
+        """
+        self.xlib = xlib
+        self.handle = xlib.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.handle:
+            raise OSError(f"Cannot open X display {display_name or os.environ.get('DISPLAY', '')}")
+
+        if _io_error_exit_handler is not None:
+            xlib.XSetIOErrorExitHandler(self.handle, _io_error_exit_handler, None)
+
+        self.alive = True
+        self.lock = threading.RLock()
+        self.root = xlib.XDefaultRootWindow(self.handle)
+        self._atoms = {}
+        _open_displays.append(self)
+
+    def atom(self, name):
+        """Get (and remember) the atom for a property or type name."""
+        if name not in self._atoms:
+            self._atoms[name] = self.xlib.XInternAtom(self.handle, name.encode(), False)
+        return self._atoms[name]
+
+    def get_property(self, window, name, max_length=1024):
+        """
+        Read a window property.
+
+        Args:
+            window (int): The window id
+            name (str): The property name, e.g. '_NET_WM_PID'
+            max_length (int): Maximum number of 32-bit units to read
+
+        Returns:
+            tuple: (format, data) where data is bytes for 8-bit properties and a list of ints
+                   for 32-bit ones, or None if the property is missing or the window is gone
+        """
+        actual_type = ctypes.c_ulong()
+        actual_format = ctypes.c_int()
+        item_count = ctypes.c_ulong()
+        bytes_after = ctypes.c_ulong()
+        data = ctypes.POINTER(ctypes.c_ubyte)()
+
+        with self.lock:
+            if not self.alive:
+                return None
+            _last_error.failed = False
+            status = self.xlib.XGetWindowProperty(
+                self.handle, window, self.atom(name), 0, max_length, False, ANY_PROPERTY_TYPE,
+                ctypes.byref(actual_type), ctypes.byref(actual_format),
+                ctypes.byref(item_count), ctypes.byref(bytes_after), ctypes.byref(data)
+            )
+
+        if status != SUCCESS or getattr(_last_error, 'failed', False):
+            if data:
+                self.xlib.XFree(data)
+            return None
+        if not data:
+            return None
+
+        try:
+            count = item_count.value
+            if actual_format.value == 32:
+                # Xlib hands out 32-bit items as C longs
+                values = ctypes.cast(data, ctypes.POINTER(ctypes.c_ulong))
+                return 32, [values[i] for i in range(count)]
+            if actual_format.value == 8:
+                return 8, ctypes.string_at(data, count)
+            return None
+        finally:
+            self.xlib.XFree(data)
+
+    def get_cardinal(self, window, name):
+        """Read the first 32-bit value of a property, or None."""
+        result = self.get_property(window, name, max_length=1)
+        if result and result[0] == 32 and result[1]:
+            return result[1][0]
+        return None
+
+    def get_active_window(self):
+        """Get the id of the focused window from _NET_ACTIVE_WINDOW, or None."""
+        window = self.get_cardinal(self.root, '_NET_ACTIVE_WINDOW')
+        return window or None
+
+    def get_window_title(self, window):
+        """Get a window title from _NET_WM_NAME, falling back to WM_NAME."""
+        result = self.get_property(window, '_NET_WM_NAME')
+        if result and result[0] == 8:
+            return _decode_title(result, None)
+        return _decode_title(None, self.get_property(window, 'WM_NAME'))
+
+    def get_client_list(self):
+        """Get the ids of all managed windows from _NET_CLIENT_LIST in one request."""
+        result = self.get_property(self.root, '_NET_CLIENT_LIST', max_length=65536)
+        if result and result[0] == 32:
+            return result[1]
+        return []
+
+    def get_window_pid(self, window):
+        """Get the process id owning a window from _NET_WM_PID, or None."""
+        return self.get_cardinal(window, '_NET_WM_PID')
+
+    def get_titles_and_pids(self, windows):
+        """
+        Read the title and process id of many windows in a single round trip.
+
+        The GetProperty requests for every window are sent through the XCB connection
+        underneath Xlib before the first reply is read, instead of waiting for each
+        reply in turn. Without libxcb the windows are read one after another.
+
+        Args:
+            windows (list): Window ids
+
+        Returns:
+            list: (title or None, pid or None) for each window, in the same order
+        """
+        xcb = _load_xcb()
+        if xcb is None:
+            return [(self.get_window_title(window), self.get_window_pid(window)) for window in windows]
+
+        atoms = [self.atom(name) for name in ('_NET_WM_NAME', 'WM_NAME', '_NET_WM_PID')]
+        with self.lock:
+            if not self.alive:
+                return [(None, None) for _ in windows]
+            connection = xcb.XGetXCBConnection(self.handle)
+            cookies = [
+                [xcb.xcb_get_property(connection, 0, window, atom, ANY_PROPERTY_TYPE, 0, 1024) for atom in atoms]
+                for window in windows
+            ]
+            replies = [[_read_xcb_property(xcb, connection, cookie) for cookie in row] for row in cookies]
+
+        results = []
+        for net_wm_name, wm_name, pid in replies:
+            title = _decode_title(net_wm_name if net_wm_name and net_wm_name[0] == 8 else None, wm_name)
+            results.append((title, pid[1][0] if pid and pid[0] == 32 and pid[1] else None))
+        return results
+
+    def select_input(self, window, event_mask):
+        """Choose which events of a window this connection receives."""
+        with self.lock:
+            if self.alive:
+                _last_error.failed = False
+                self.xlib.XSelectInput(self.handle, window, event_mask)
+                self.xlib.XFlush(self.handle)
+
+    def fileno(self):
+        """Get the socket of the connection, to wait for events with select()."""
+        return self.xlib.XConnectionNumber(self.handle)
+
+    def has_queued_events(self):
+        """
+        Check whether events already sit in Xlib's queue.
+
+        Replies to other requests can pull events off the socket into the queue,
+        where select() on the socket no longer sees them.
+        """
+        with self.lock:
+            return self.alive and self.xlib.XEventsQueued(self.handle, QUEUED_ALREADY) > 0
+
+    def next_events(self):
+        """
+        Read every event already received, without blocking.
+
+        Returns:
+            list: (event type, window, atom) tuples; atom is None for non-property events
+        """
+        events = []
+        event = XEvent()
+        with self.lock:
+            while self.alive and self.xlib.XPending(self.handle) > 0:
+                self.xlib.XNextEvent(self.handle, ctypes.byref(event))
+                if event.type == PROPERTY_NOTIFY:
+                    events.append((event.type, event.xproperty.window, event.xproperty.atom))
+                else:
+                    events.append((event.type, None, None))
+        return events
+
+    def close(self):
+        """Close the connection."""
+        with self.lock:
+            if self.alive:
+                self.alive = False
+                self.xlib.XCloseDisplay(self.handle)
+            if self in _open_displays:
+                _open_displays.remove(self)
+
+
+class FocusTracker:
+    """
+    Keeps the focused window's details in memory, updated from X events.
+
+    The tracker listens to _NET_ACTIVE_WINDOW changes on the root window and to
+    title changes on the focused window, so reading the current window is a
+    dictionary copy instead of a round trip at the moment of a copy.
+    """
+
+    def __init__(self, display):
+        """
+        Args:
+            display (X11Display): A connection used only by this tracker
+        """
+        self.display = display
+        self.running = False
+        self.thread = None
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._window = None
+        self._listeners = []
+        self._client_list_atom = display.atom('_NET_CLIENT_LIST')
+        self._watched_atoms = {
+            display.atom('_NET_ACTIVE_WINDOW'),
+            display.atom('_NET_WM_NAME'),
+            display.atom('WM_NAME'),
+        }
+
+    def start(self):
+        """Subscribe to focus changes and start the background thread."""
+        self.display.select_input(self.display.root, PROPERTY_CHANGE_MASK)
+        self._refresh()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='selit-focus-tracker', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop tracking and close the connection."""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        self.display.close()
+
+    def add_window_list_listener(self, callback):
+        """Call a function (without arguments) whenever windows are opened or closed."""
+        self._listeners.append(callback)
+
+    def is_alive(self):
+        """Check whether snapshots are still being kept up to date."""
+        return self.running and self.display.alive and self.thread is not None and self.thread.is_alive()
+
+    def get_snapshot(self):
+        """
+        Get the focused window as last seen.
+
+        Returns:
+            dict: Window info, or None if no window has focus
+        """
+        with self._lock:
+            return dict(self._snapshot) if self._snapshot else None
+
+    def _refresh(self):
+        """Re-read the focused window and move the title subscription to it."""
+        window = self.display.get_active_window()
+
+        if window != self._window:
+            # Only the focused window's title is of interest
+            if self._window:
+                self.display.select_input(self._window, NO_EVENT_MASK)
+            if window:
+                self.display.select_input(window, PROPERTY_CHANGE_MASK)
+            self._window = window
+
+        snapshot = get_window_details(self.display, window) if window else None
+        with self._lock:
+            self._snapshot = snapshot
+
+    def _run(self):
+        """Wait for property changes and refresh the snapshot when a relevant one arrives."""
+        try:
+            while self.running and self.display.alive:
+                # Only wait when nothing is queued yet, _refresh() round trips may have queued events.
+                # Wake up regularly so stop() does not hang on an idle desktop.
+                if not self.display.has_queued_events():
+                    select.select([self.display.fileno()], [], [], 0.5)
+                events = self.display.next_events()
+                if any(atom in self._watched_atoms for _, _, atom in events):
+                    self._refresh()
+                if any(atom == self._client_list_atom for _, _, atom in events):
+                    for callback in list(self._listeners):
+                        callback()
+        except Exception as e:
+            print(f"Error tracking focused window: {e}")
+        finally:
+            self.running = False
+
+
+def _decode_title(net_wm_name, wm_name):
+    """Turn _NET_WM_NAME (UTF-8) or else WM_NAME (Latin-1) property results into a title, or None."""
+    if net_wm_name and net_wm_name[0] == 8:
+        return net_wm_name[1].decode('utf-8', errors='replace')
+    if wm_name and wm_name[0] == 8:
+        return wm_name[1].decode('latin-1')
+    return None
+
+def _read_xcb_property(xcb, connection, cookie):
+    """
+    Wait for the reply of an XCB GetProperty request.
+
+    Returns:
+        tuple: (format, data) like X11Display.get_property, or None if the property
+               is missing or the window is gone
+    """
+    error = ctypes.c_void_p()
+    reply = xcb.xcb_get_property_reply(connection, cookie, ctypes.byref(error))
+    if error:
+        # Typically BadWindow, for a window closed since the client list was read
+        xcb.free(error)
+    if not reply:
+        return None
+
+    try:
+        length = xcb.xcb_get_property_value_length(reply)
+        value = xcb.xcb_get_property_value(reply)
+        if reply.contents.format == 8:
+            return 8, ctypes.string_at(value, length)
+        if reply.contents.format == 32:
+            # Unlike Xlib, XCB hands out 32-bit items as 32-bit integers
+            return 32, list((ctypes.c_uint32 * (length // 4)).from_address(value))
+        return None
+    finally:
+        xcb.free(reply)
+
+def _forget_display(handle):
+    """Mark connections as dead after the X server went away."""
+    global _display, _display_failed_at
+    for display in list(_open_displays):
+        if display.handle == handle:
+            display.alive = False
+    if _display is not None and _display.handle == handle:
+        _display = None
+        _display_failed_at = time.monotonic()
+
+def get_display():
+    """
+    Get the shared X connection, opening it on first use.
+
+    Returns:
+        X11Display: The connection, or None if there is no X server to talk to
+    """
+    global _display, _display_failed_at
+
+    if _display is not None and _display.alive:
+        return _display
+
+    if not os.environ.get('DISPLAY'):
+        return None
+
+    with _display_lock:
+        if _display is not None and _display.alive:
+            return _display
+        # Do not hammer an unreachable server on every lookup
+        if time.monotonic() - _display_failed_at < RECONNECT_DELAY:
+            return None
+
+        xlib = _load_xlib()
+        if xlib is None:
+            _display_failed_at = time.monotonic()
+            return None
+
+        try:
+            _display = X11Display(xlib)
+        except OSError as e:
+            print(f"Error connecting to X server: {e}")
+            _display = None
+            _display_failed_at = time.monotonic()
+        return _display
+
+def get_window_details(display, window):
+    """
+    Build the window info dict used across selit for one window.
+
+    Args:
+        display (X11Display): The connection to read through
+        window (int): The window id
+
+    Returns:
+        dict: Window info, or None if the window has no title
+    """
+    window_title = display.get_window_title(window)
+    if window_title is None:
+        return None
+
+    pid = display.get_window_pid(window)
+    process_name = get_process_name(pid)
+
+    return {
+        "hwnd": f"0x{window:08x}",
+        "title": window_title,
+        "process_id": pid,
+        "process_name": process_name,
+    }
+
+def get_active_window_info():
+    """
+    Get the active window through the shared X connection.
+
+    Returns:
+        dict: Window info, or None if there is no X server or no active window
+    """
+    display = get_display()
+    if display is None:
+        return None
+
+    window = display.get_active_window()
+    if not window:
+        return None
+    return get_window_details(display, window)
+
+def start_focus_tracker():
+    """
+    Start the shared focus tracker if an X server is reachable.
+
+    Returns:
+        FocusTracker: The running tracker, or None if X is not available
+    """
+    global _focus_tracker
+
+    with _focus_tracker_lock:
+        if _focus_tracker is not None and _focus_tracker.is_alive():
+            return _focus_tracker
+
+        if not os.environ.get('DISPLAY'):
+            return None
+
+        xlib = _load_xlib()
+        if xlib is None:
+            return None
+
+        try:
+            # The tracker blocks on its own socket, so it gets a dedicated connection
+            _focus_tracker = FocusTracker(X11Display(xlib))
+            _focus_tracker.start()
+        except OSError as e:
+            print(f"Error starting focus tracker: {e}")
+            _focus_tracker = None
+        return _focus_tracker
+
+def get_focus_tracker():
+    """Get the shared focus tracker if it is running, otherwise None."""
+    tracker = _focus_tracker
+    return tracker if tracker is not None and tracker.is_alive() else None
+
+def list_windows():
+    """
+    List all managed windows through the shared X connection.
+
+    The window ids come from one _NET_CLIENT_LIST request, and the titles and PIDs
+    of all of them from requests sent together and answered in one round trip.
+    Process names are filled in parallel.
+
+    Returns:
+        list: Window info dicts with unique titles, or None if there is no X server
+    """
+    display = get_display()
+    if display is None:
+        return None
+
+    rows = []
+    seen_titles = set()
+    windows = display.get_client_list()
+    for window, (window_title, pid) in zip(windows, display.get_titles_and_pids(windows)):
+        if not window_title or window_title in seen_titles:
+            continue
+        seen_titles.add(window_title)
+        rows.append((window, window_title, pid))
+
+    prefetch_processes(pid for _, _, pid in rows)
+
+    return [{
+        "hwnd": f"0x{window:08x}",
+        "title": window_title,
+        "process_id": pid,
+        "process_name": get_process_name(pid),
+    } for window, window_title, pid in rows]